@@ -0,0 +1,530 @@
+"""Relatórios e manutenção dos dados pela linha de comando (cron, sem navegador)
+
+Lê os tempos em blocos: arquivo ativo, partições mensais do histórico e
+arquivo morto (Parquet, lido em lotes). Cada processo é contado uma vez
+(o ativo vale sobre o histórico, que vale sobre o arquivo morto) e os
+resumos são somados bloco a bloco, sem montar o histórico inteiro em memória.
+
+Relatórios (--de/--ate filtram pela data de atualização, --os por OS):
+    python administracao.py resumo-os --de 2025-10-01 --ate 2025-10-31
+    python administracao.py resumo-processos --formato csv --saida processos.csv
+    python administracao.py resumo-produtos --por linha     # ou sku, design, formato
+    python administracao.py tempos-padrao --por formato     # segundos por peça (P25/P50/P75/P90)
+    python administracao.py tempos-em-turno --de 2025-10-01 # trechos refeitos pelo calendário de turnos
+    python administracao.py exportar --de 2025-10-01 --saida outubro.csv
+
+Manutenção (--simular só mostra o que mudaria):
+    python administracao.py deduplicar      # OS e processos repetidos
+    python administracao.py recalcular      # status/tempos inconsistentes, partição de cada linha
+    python administracao.py arquivar        # OS finalizadas -> arquivo morto
+
+Uso:
+    python administracao.py [--github | --pasta DIR] <comando> [opções]
+"""
+import argparse
+import io
+import json
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import calendario_turnos
+import intervalos
+import motor_tempos
+import tempos_padrao
+from cadastro_produtos import ARQUIVO_PRODUTOS, ATRIBUTOS, anexar_produtos, ler_produtos
+from catalogo_processos import CATALOGO
+from importacao_os import ARQUIVO_OS, COLUNAS_OS
+from mesclagem import CHAVES_OS, CHAVES_TEMPOS
+from migracao_datas import normalizar_tempos
+from particionamento import (ARQUIVO_ATIVO, ARQUIVO_MORTO_LEGADO, ARQUIVO_MORTO_OS, ARQUIVO_MORTO_TEMPOS,
+                             PASTA_ARQUIVO_MORTO, PASTA_HISTORICO, anexar_ao_arquivo_morto, caminho_arquivo_morto,
+                             caminho_particao, de_parquet, juntar_com_arquivo_morto, mes_atual, meses_das_linhas,
+                             para_parquet, particoes_arquivo_morto)
+
+# Linhas por lote ao ler o arquivo morto
+TAMANHO_LOTE = 100_000
+
+
+def formatar_tempo(segundos):
+    """Segundos -> HH:MM:SS"""
+    if pd.isna(segundos):
+        return "00:00:00"
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
+def ler_periodo(de, ate):
+    """Datas AAAA-MM-DD (hora local) -> intervalo [de, ate] em epoch ms; ate inclui o dia inteiro"""
+    inicio = motor_tempos.para_ms(datetime.strptime(de, "%Y-%m-%d")) if de else None
+    fim = motor_tempos.para_ms(datetime.strptime(ate, "%Y-%m-%d") + timedelta(days=1)) - 1 if ate else None
+    return inicio, fim
+
+
+def _ler_csv(armazem, caminho, colunas):
+    """DataFrame e SHA de um CSV do armazém (vazio com as colunas se não existir)"""
+    conteudo, sha = armazem.ler(caminho)
+    if conteudo is None:
+        return pd.DataFrame(columns=colunas), None
+    return pd.read_csv(io.BytesIO(conteudo)), sha
+
+
+def _ler_tempos(armazem, caminho):
+    df, sha = _ler_csv(armazem, caminho, motor_tempos.COLUNAS_TEMPOS)
+    return normalizar_tempos(df), sha
+
+
+def particoes(armazem):
+    """Caminhos dos CSVs mensais do histórico, do mais recente ao mais antigo"""
+    return sorted((c for c in armazem.listar(PASTA_HISTORICO) if c.endswith(".csv")), reverse=True)
+
+
+def particoes_mortas(armazem, tipo):
+    """Caminhos das partições do arquivo morto de um tipo, da mais antiga à mais recente (com o legado, se houver)"""
+    return particoes_arquivo_morto(armazem.listar(PASTA_ARQUIVO_MORTO) + [ARQUIVO_MORTO_LEGADO[tipo]], tipo)
+
+
+def _mes_da_particao(caminho):
+    return caminho[:-len(".csv")].rsplit("_", 1)[-1]
+
+
+def _particao_no_periodo(caminho, de, ate):
+    """Descarta pelo nome as partições fora do período (meses ou dias em UTC, com folga de um dia)"""
+    rotulo = _mes_da_particao(caminho)
+    if len(rotulo) not in (7, 10):
+        return True
+    formato = "%Y-%m" if len(rotulo) == 7 else "%Y-%m-%d"
+    folga = 24 * 3600 * 1000
+    limites = [motor_tempos.ms_para_datetime(ms).strftime(formato) if ms is not None else None
+               for ms in ((de - folga) if de is not None else None, (ate + folga) if ate is not None else None)]
+    return (limites[0] is None or rotulo >= limites[0]) and (limites[1] is None or rotulo <= limites[1])
+
+
+def _blocos_brutos(armazem, de=None, ate=None):
+    """Blocos de tempos na ordem de precedência: ativo, histórico (mais recente primeiro), arquivo morto"""
+    yield _ler_tempos(armazem, ARQUIVO_ATIVO)[0]
+    for caminho in particoes(armazem):
+        if _particao_no_periodo(caminho, de, ate):
+            yield _ler_tempos(armazem, caminho)[0]
+
+    # Partições do arquivo morto da mais recente à mais antiga (o arquivamento mais novo vence)
+    for caminho in particoes_mortas(armazem, ARQUIVO_MORTO_TEMPOS)[::-1]:
+        conteudo, _ = armazem.ler(caminho)
+        if conteudo is None:
+            continue
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(io.BytesIO(conteudo)).iter_batches(batch_size=TAMANHO_LOTE):
+            yield normalizar_tempos(lote.to_pandas())
+
+
+def _mais_recentes(df):
+    """Uma linha por processo, a de data_atualizacao mais recente (empate: a última), na ordem original"""
+    if not df.duplicated(subset=CHAVES_TEMPOS).any():
+        return df
+    ordem = df.assign(_data=df['data_atualizacao'].fillna(-1)).sort_values('_data', kind='stable')
+    return ordem.drop_duplicates(subset=CHAVES_TEMPOS, keep='last').sort_index().drop(columns='_data')
+
+
+def iterar_tempos(armazem, de=None, ate=None, numeros_os=None):
+    """Blocos de tempos filtrados, cada processo (numero_os, processo) uma única vez"""
+    vistos = set()
+    for bloco in _blocos_brutos(armazem, de, ate):
+        if bloco.empty:
+            continue
+        bloco = bloco.assign(numero_os=pd.to_numeric(bloco['numero_os'], errors='coerce'))
+        bloco = bloco.dropna(subset=['numero_os']).astype({'numero_os': 'int64'})
+        bloco = _mais_recentes(bloco)
+        # Precedência decidida antes do filtro: uma versão mais nova fora do período esconde a antiga
+        chaves = list(zip(bloco['numero_os'].tolist(), bloco['processo'].tolist()))
+        novo = np.fromiter((chave not in vistos for chave in chaves), dtype=bool, count=len(chaves))
+        vistos.update(chaves)
+        bloco = bloco[novo]
+
+        data = bloco['data_atualizacao']
+        if de is not None:
+            bloco = bloco[(data >= de).fillna(False)]
+            data = bloco['data_atualizacao']
+        if ate is not None:
+            bloco = bloco[(data <= ate).fillna(False)]
+        if numeros_os:
+            bloco = bloco[bloco['numero_os'].isin(numeros_os)]
+        if not bloco.empty:
+            yield bloco
+
+
+def carregar_os(armazem):
+    """OS do conjunto de trabalho junto com as do arquivo morto (numero_os, produto, quantidade, status_os)"""
+    df_os = _ler_csv(armazem, ARQUIVO_OS, COLUNAS_OS)[0]
+    partes = [armazem.ler(caminho)[0] for caminho in particoes_mortas(armazem, ARQUIVO_MORTO_OS)]
+    partes = [de_parquet(conteudo) for conteudo in partes if conteudo is not None]
+    if partes:
+        df_os = juntar_com_arquivo_morto(df_os, pd.concat(partes, ignore_index=True), CHAVES_OS)
+    df_os = df_os.assign(numero_os=pd.to_numeric(df_os['numero_os'], errors='coerce'),
+                         quantidade=pd.to_numeric(df_os['quantidade'], errors='coerce'))
+    df_os = df_os.dropna(subset=['numero_os']).astype({'numero_os': 'int64'})
+    return df_os.drop_duplicates(subset=CHAVES_OS, keep='last').set_index('numero_os')[
+        ['produto', 'quantidade', 'status_os']]
+
+
+def resumo_por_os(armazem, de=None, ate=None, numeros_os=None):
+    """Tempo total, tempo por peça e número de processos de cada OS"""
+    parciais = [
+        bloco.groupby('numero_os').agg(tempo_total_segundos=('tempo_total_segundos', 'sum'),
+                                       processos=('processo', 'size'))
+        for bloco in iterar_tempos(armazem, de, ate, numeros_os)
+    ]
+    if not parciais:
+        return pd.DataFrame(columns=['numero_os', 'produto', 'quantidade', 'tempo_total_segundos',
+                                     'tempo_por_peca_segundos', 'processos'])
+
+    resumo = pd.concat(parciais).groupby(level=0).sum().join(carregar_os(armazem), how='left')
+    quantidade = resumo['quantidade'].where(resumo['quantidade'] > 0)
+    resumo['tempo_por_peca_segundos'] = (resumo['tempo_total_segundos'] / quantidade).fillna(0)
+    resumo = resumo.rename_axis('numero_os').reset_index()
+    return resumo[['numero_os', 'produto', 'quantidade', 'tempo_total_segundos', 'tempo_por_peca_segundos',
+                   'processos']]
+
+
+def resumo_por_produto(armazem, de=None, ate=None, numeros_os=None, por='linha'):
+    """Tempo total, OS, peças e tempo por peça agrupados por um atributo do produto (sku, linha, design, formato)"""
+    if por not in ATRIBUTOS:
+        raise ValueError(f"Atributo de produto desconhecido: {por}")
+    parciais = [bloco.groupby('numero_os')['tempo_total_segundos'].sum()
+                for bloco in iterar_tempos(armazem, de, ate, numeros_os)]
+    if not parciais:
+        return pd.DataFrame(columns=[por, 'os', 'pecas', 'tempo_total_segundos', 'tempo_por_peca_segundos'])
+
+    tempos = pd.concat(parciais).groupby(level=0).sum()
+    # Só as OS com tempos no período passam pela dimensão de produtos
+    df = anexar_produtos(carregar_os(armazem).join(tempos, how='inner'), ler_produtos(armazem.ler(ARQUIVO_PRODUTOS)[0]))
+    resumo = df.groupby(df[por].fillna('-')).agg(os=('quantidade', 'size'), pecas=('quantidade', 'sum'),
+                                                 tempo_total_segundos=('tempo_total_segundos', 'sum'))
+    resumo['tempo_por_peca_segundos'] = (resumo['tempo_total_segundos'] / resumo['pecas'].where(resumo['pecas'] > 0)).fillna(0)
+    return resumo.rename_axis(por).reset_index()
+
+
+def resumo_por_processo(armazem, de=None, ate=None, numeros_os=None):
+    """Tempo total, número de OS, média por OS e tempo por peça de cada processo (código e nome)"""
+    quantidades = carregar_os(armazem)['quantidade']
+    parciais = []
+    for bloco in iterar_tempos(armazem, de, ate, numeros_os):
+        bloco = bloco.assign(quantidade=bloco['numero_os'].map(quantidades))
+        parciais.append(bloco.groupby('processo').agg(tempo_total_segundos=('tempo_total_segundos', 'sum'),
+                                                      os=('numero_os', 'size'),
+                                                      pecas=('quantidade', 'sum')))
+    if not parciais:
+        return pd.DataFrame(columns=['processo', 'nome', 'os', 'tempo_total_segundos', 'tempo_medio_os_segundos',
+                                     'tempo_por_peca_segundos'])
+
+    resumo = pd.concat(parciais).groupby(level=0).sum()
+    resumo['tempo_medio_os_segundos'] = resumo['tempo_total_segundos'] / resumo['os']
+    resumo['tempo_por_peca_segundos'] = (resumo['tempo_total_segundos'] / resumo['pecas'].where(resumo['pecas'] > 0)).fillna(0)
+    resumo = resumo.rename_axis('processo').reset_index()
+    resumo['nome'] = resumo['processo'].map(CATALOGO.nome)
+    return resumo[['processo', 'nome', 'os', 'tempo_total_segundos', 'tempo_medio_os_segundos',
+                   'tempo_por_peca_segundos']]
+
+
+# Agrupamentos do tempo padrão -> nível do estimador
+NIVEIS_TEMPO_PADRAO = {'linha-formato': 0, 'formato': 1, 'linha': 2, 'processo': 3}
+
+
+def estimar_tempos_padrao(armazem, de=None, ate=None, numeros_os=None, por='linha-formato'):
+    """Segundos por peça de cada processo (percentis sem os valores fora do padrão), das OS finalizadas"""
+    colunas = ['numero_os', 'processo', 'status', 'tempo_total_segundos']
+    blocos = [bloco.loc[bloco['status'] == 'finalizado', colunas] for bloco in iterar_tempos(armazem, de, ate, numeros_os)]
+    tempos = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=colunas)
+    amostras = tempos_padrao.amostras_por_peca(tempos, carregar_os(armazem).reset_index(),
+                                               ler_produtos(armazem.ler(ARQUIVO_PRODUTOS)[0]))
+    tabela = tempos_padrao.EstimadorTempos.ajustar(amostras).tabela(NIVEIS_TEMPO_PADRAO[por])
+    tabela.insert(1, 'nome', tabela['processo'].map(CATALOGO.nome))
+    return tabela.round({'p25': 2, 'p50': 2, 'p75': 2, 'p90': 2, 'media': 2})
+
+
+def tempos_em_turno(armazem, de=None, ate=None, numeros_os=None, calendario=None):
+    """Tempo de cada processo pelos trechos gravados (--de/--ate pelo início): relógio, apontado, dentro e fora dos turnos"""
+    calendario = calendario_turnos.CALENDARIO if calendario is None else calendario
+    if calendario is None:
+        raise ValueError(f"Calendário de turnos não configurado ({calendario_turnos.ARQUIVO_CALENDARIO})")
+
+    partes = [intervalos.ler_intervalos(armazem.ler(caminho)[0])
+              for caminho in armazem.listar(intervalos.PASTA_INTERVALOS)
+              if caminho.endswith(".csv") and _particao_no_periodo(caminho, de, ate)]
+    df = intervalos.anexar_intervalos(None, pd.concat(partes, ignore_index=True) if partes else None)
+    if de is not None:
+        df = df[df['inicio'] >= de]
+    if ate is not None:
+        df = df[df['inicio'] <= ate]
+    if numeros_os:
+        df = df[df['numero_os'].isin(numeros_os)]
+
+    # fim é o instante de relógio da pausa: o trecho é refeito com as janelas de trabalho e comparado
+    # com o tempo contado (igual ao em turno nos trechos gravados com calendário, maior nos anteriores)
+    df = df.assign(relogio_segundos=(df['fim'] - df['inicio']).clip(lower=0) / 1000,
+                   em_turno_segundos=calendario.segundos_trabalhados(df['inicio'].to_numpy(), df['fim'].to_numpy()))
+    resumo = df.groupby(CHAVES_TEMPOS).agg(trechos=('inicio', 'size'), relogio_segundos=('relogio_segundos', 'sum'),
+                                           apontado_segundos=('duracao_segundos', 'sum'),
+                                           em_turno_segundos=('em_turno_segundos', 'sum')).reset_index()
+    resumo['fora_do_turno_segundos'] = (resumo['relogio_segundos'] - resumo['em_turno_segundos']).clip(lower=0)
+    resumo['contado_fora_segundos'] = (resumo['apontado_segundos'] - resumo['em_turno_segundos']).clip(lower=0)
+    resumo.insert(2, 'nome', resumo['processo'].map(CATALOGO.nome))
+    return resumo
+
+
+def exportar(armazem, saida, de=None, ate=None, numeros_os=None):
+    """Grava os tempos filtrados em CSV bloco a bloco; retorna o número de linhas"""
+    linhas = 0
+    for bloco in iterar_tempos(armazem, de, ate, numeros_os):
+        bloco[motor_tempos.COLUNAS_TEMPOS].to_csv(saida, index=False, header=(linhas == 0))
+        linhas += len(bloco)
+    if linhas == 0:
+        pd.DataFrame(columns=motor_tempos.COLUNAS_TEMPOS).to_csv(saida, index=False)
+    return linhas
+
+
+def _escrever_relatorio(df, formato, saida):
+    if formato == "csv":
+        df.to_csv(saida, index=False)
+    elif formato == "json":
+        json.dump(json.loads(df.to_json(orient="records", force_ascii=False)), saida, ensure_ascii=False, indent=1)
+        saida.write("\n")
+    else:
+        tabela = df.copy()
+        for coluna in [c for c in tabela.columns if c.endswith("_segundos")]:
+            tabela[coluna] = tabela[coluna].map(formatar_tempo)
+        tabela.columns = [c.removesuffix("_segundos") for c in tabela.columns]
+        saida.write(tabela.to_string(index=False) + "\n")
+
+
+class Manutencao:
+    """Comandos de manutenção sobre um armazém (ClienteGitHub ou ArquivosLocais); com simular, nada é gravado"""
+
+    def __init__(self, armazem, simular=False):
+        self.armazem = armazem
+        self.simular = simular
+        self.gravados = []
+
+    def gravar(self, caminho, conteudo, sha, motivo):
+        """Grava (um commit no GitHub); SHA obsoleto = alguém gravou durante a manutenção"""
+        self.gravados.append(caminho)
+        if self.simular:
+            return
+        mensagem = f"Manutenção: {motivo} - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        if not self.armazem.gravar(caminho, conteudo, sha, mensagem):
+            raise RuntimeError(f"Não foi possível gravar {caminho} (alterado durante a manutenção; rode de novo)")
+
+    def _gravar_csv(self, caminho, df, sha, motivo):
+        self.gravar(caminho, df.to_csv(index=False), sha, motivo)
+
+    def deduplicar(self):
+        """Remove OS repetidas e processos repetidos (fica a versão mais recente); retorna linhas removidas"""
+        removidas = 0
+        df_os, sha = _ler_csv(self.armazem, ARQUIVO_OS, COLUNAS_OS)
+        unicas = df_os.drop_duplicates(subset=CHAVES_OS, keep='last')
+        if len(unicas) < len(df_os):
+            removidas += len(df_os) - len(unicas)
+            self._gravar_csv(ARQUIVO_OS, unicas, sha, "OS repetidas removidas")
+
+        # Mais recente de cada processo: o ativo vale sobre o histórico (como em juntar_tempos)
+        ativos, sha_ativos = _ler_tempos(self.armazem, ARQUIVO_ATIVO)
+        vencedores = {}
+        for caminho in particoes(self.armazem):
+            df = _ler_tempos(self.armazem, caminho)[0]
+            for chave, data in zip(zip(df['numero_os'].tolist(), df['processo'].tolist()),
+                                   df['data_atualizacao'].fillna(-1).tolist()):
+                if chave not in vencedores or data > vencedores[chave][1]:
+                    vencedores[chave] = (caminho, data)
+        for chave in zip(ativos['numero_os'].tolist(), ativos['processo'].tolist()):
+            vencedores[chave] = (ARQUIVO_ATIVO, None)
+
+        unicos = _mais_recentes(ativos)
+        if len(unicos) < len(ativos):
+            removidas += len(ativos) - len(unicos)
+            self._gravar_csv(ARQUIVO_ATIVO, unicos, sha_ativos, "processos repetidos removidos")
+
+        for caminho in particoes(self.armazem):
+            df, sha = _ler_tempos(self.armazem, caminho)
+            fica = [vencedores.get(chave, (caminho,))[0] == caminho
+                    for chave in zip(df['numero_os'].tolist(), df['processo'].tolist())]
+            unicos = _mais_recentes(df[fica])
+            if len(unicos) < len(df):
+                removidas += len(df) - len(unicos)
+                self._gravar_csv(caminho, unicos, sha, "processos repetidos removidos")
+        return removidas
+
+    @staticmethod
+    def _corrigir(df):
+        """Tempo acumulado inválido vira 0 e em andamento sem início vira pausado; retorna (df, linhas corrigidas)"""
+        tempo = pd.to_numeric(df['tempo_total_segundos'], errors='coerce')
+        tempo_invalido = tempo.isna() | (tempo < 0)
+        status_invalido = ~df['status'].isin(motor_tempos.STATUS_NOMES)
+        sem_inicio = (df['status'] == motor_tempos.EM_ANDAMENTO) & df['inicio_atual'].isna()
+        corrigir = tempo_invalido | status_invalido | sem_inicio
+        if not corrigir.any():
+            return df, 0
+
+        df = df.copy()
+        df['tempo_total_segundos'] = tempo.where(~tempo_invalido, 0.0)
+        df.loc[status_invalido | sem_inicio, 'status'] = motor_tempos.PAUSADO
+        df.loc[df['status'] != motor_tempos.EM_ANDAMENTO, 'inicio_atual'] = pd.NA
+        return df, int(corrigir.sum())
+
+    def _arrumar_particao(self, caminho, df):
+        """Corrige uma partição; retorna (linhas que ficam, finalizadas de outro mês, não finalizadas, corrigidas)"""
+        df, corrigidas = self._corrigir(df)
+        finalizado = df['status'] == motor_tempos.FINALIZADO
+        no_mes = meses_das_linhas(df).map(caminho_particao) == caminho
+        return df[finalizado & no_mes], df[finalizado & ~no_mes], df[~finalizado], corrigidas
+
+    def recalcular(self):
+        """Corrige status/tempos e leva cada linha ao arquivo certo (finalizados no mês da atualização)"""
+        ativos, sha_ativos = _ler_tempos(self.armazem, ARQUIVO_ATIVO)
+        ativos, corrigidas_ativos = self._corrigir(ativos)
+        finalizado = ativos['status'] == motor_tempos.FINALIZADO
+
+        # Primeira passada: só as linhas que mudam de arquivo ficam em memória
+        entram = [ativos[finalizado]]
+        voltam = []
+        alteradas = set()
+        corrigidas = corrigidas_ativos
+        for caminho in particoes(self.armazem):
+            _, fora_do_mes, nao_finalizadas, n = self._arrumar_particao(caminho, _ler_tempos(self.armazem, caminho)[0])
+            corrigidas += n
+            if n or not fora_do_mes.empty or not nao_finalizadas.empty:
+                alteradas.add(caminho)
+            entram.append(fora_do_mes)
+            voltam.append(nao_finalizadas)
+        entram = pd.concat([parte for parte in entram if not parte.empty] or [ativos.iloc[0:0]], ignore_index=True)
+        voltam = [parte for parte in voltam if not parte.empty]
+        destinos = meses_das_linhas(entram).map(caminho_particao)
+
+        # Histórico primeiro: numa falha entre as escritas a linha fica duplicada, nunca perdida
+        for caminho in sorted(alteradas | set(destinos)):
+            df, sha = _ler_tempos(self.armazem, caminho)
+            fica = self._arrumar_particao(caminho, df)[0]
+            partes = [parte for parte in (fica, entram[destinos == caminho]) if not parte.empty]
+            df = pd.concat(partes, ignore_index=True) if partes else fica
+            self._gravar_csv(caminho, df.drop_duplicates(subset=CHAVES_TEMPOS, keep='last'), sha, "histórico recalculado")
+
+        if corrigidas_ativos or finalizado.any() or voltam:
+            novos_ativos = pd.concat([ativos[~finalizado], *voltam], ignore_index=True)
+            novos_ativos = novos_ativos.drop_duplicates(subset=CHAVES_TEMPOS, keep='first')
+            self._gravar_csv(ARQUIVO_ATIVO, novos_ativos, sha_ativos, "tempos recalculados")
+        return corrigidas, len(entram) + sum(len(parte) for parte in voltam)
+
+    def _anexar_parquet(self, tipo, novos, chaves):
+        caminho = caminho_arquivo_morto(tipo, mes_atual())
+        conteudo, sha = self.armazem.ler(caminho)
+        atual = normalizar_tempos(de_parquet(conteudo)) if conteudo is not None else None
+        self.gravar(caminho, para_parquet(anexar_ao_arquivo_morto(atual, novos, chaves)), sha,
+                    "arquivo de OS finalizadas atualizado")
+
+    def arquivar(self):
+        """Move OS finalizadas e seus tempos (ativos e histórico) para o arquivo morto; retorna quantas OS"""
+        df_os, sha_os = _ler_csv(self.armazem, ARQUIVO_OS, COLUNAS_OS)
+        finalizada = df_os['status_os'] == 'finalizada'
+        if not finalizada.any():
+            return 0
+        numeros = set(pd.to_numeric(df_os.loc[finalizada, 'numero_os'], errors='coerce').dropna().astype('int64'))
+
+        arquivos = [(ARQUIVO_ATIVO, *_ler_tempos(self.armazem, ARQUIVO_ATIVO))]
+        arquivos += [(caminho, *_ler_tempos(self.armazem, caminho)) for caminho in particoes(self.armazem)]
+        do_arquivo = {caminho: df['numero_os'].isin(numeros) for caminho, df, _ in arquivos}
+        tempos = [df[do_arquivo[caminho]] for caminho, df, _ in arquivos if do_arquivo[caminho].any()]
+
+        # Grava o arquivo morto antes de remover do conjunto de trabalho
+        self._anexar_parquet(ARQUIVO_MORTO_OS, df_os[finalizada].reset_index(drop=True), CHAVES_OS)
+        if tempos:
+            # Histórico antes do ativo na concatenação: a versão ativa fica por último e vence
+            tempos = pd.concat(tempos[::-1], ignore_index=True)
+            self._anexar_parquet(ARQUIVO_MORTO_TEMPOS, tempos, CHAVES_TEMPOS)
+
+        for caminho, df, sha in arquivos[::-1]:
+            if do_arquivo[caminho].any():
+                self._gravar_csv(caminho, df[~do_arquivo[caminho]], sha, "OS finalizadas arquivadas")
+        self._gravar_csv(ARQUIVO_OS, df_os[~finalizada], sha_os, "OS finalizadas arquivadas")
+        return len(numeros)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatórios e manutenção dos dados de tempos")
+    parser.add_argument("--github", action="store_true", help="usa o GitHub (GITHUB_TOKEN no ambiente)")
+    parser.add_argument("--pasta", default=".", help="pasta dos CSVs (sem --github)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    for nome, ajuda in [("resumo-os", "tempo total e por peça de cada OS"),
+                        ("resumo-processos", "tempo total, médio e por peça de cada processo"),
+                        ("resumo-produtos", "tempo total e por peça por linha, formato, design ou SKU"),
+                        ("tempos-padrao", "segundos por peça de cada processo (para cotação)"),
+                        ("tempos-em-turno", "tempo apontado de cada processo dentro e fora dos turnos"),
+                        ("exportar", "linhas de tempos filtradas em CSV")]:
+        sub = comandos.add_parser(nome, help=ajuda)
+        sub.add_argument("--de", help="data de atualização inicial (AAAA-MM-DD)")
+        sub.add_argument("--ate", help="data de atualização final (AAAA-MM-DD, inclusive)")
+        sub.add_argument("--os", type=int, nargs="+", help="só estas OS")
+        sub.add_argument("--saida", help="arquivo de saída (padrão: tela)")
+        if nome != "exportar":
+            sub.add_argument("--formato", choices=["tabela", "csv", "json"], default="tabela")
+        if nome == "resumo-produtos":
+            sub.add_argument("--por", choices=ATRIBUTOS, default="linha", help="atributo do produto")
+        if nome == "tempos-padrao":
+            sub.add_argument("--por", choices=list(NIVEIS_TEMPO_PADRAO), default="linha-formato",
+                             help="agrupamento dos produtos")
+
+    for nome, ajuda in [("deduplicar", "remove OS e processos repetidos"),
+                        ("recalcular", "corrige status/tempos e a partição de cada linha"),
+                        ("arquivar", "move OS finalizadas para o arquivo morto")]:
+        sub = comandos.add_parser(nome, help=ajuda)
+        sub.add_argument("--simular", action="store_true", help="só mostra o que mudaria")
+
+    args = parser.parse_args()
+
+    from cliente_github import ArquivosLocais, ClienteGitHub
+
+    armazem = ClienteGitHub() if args.github else ArquivosLocais(args.pasta)
+
+    try:
+        if args.comando in ("resumo-os", "resumo-processos", "resumo-produtos", "tempos-padrao", "tempos-em-turno",
+                            "exportar"):
+            de, ate = ler_periodo(args.de, args.ate)
+            saida = open(args.saida, "w", encoding="utf-8", newline="") if args.saida else sys.stdout
+            try:
+                if args.comando == "exportar":
+                    linhas = exportar(armazem, saida, de, ate, args.os)
+                    print(f"{linhas} linhas exportadas", file=sys.stderr)
+                elif args.comando == "resumo-produtos":
+                    _escrever_relatorio(resumo_por_produto(armazem, de, ate, args.os, args.por), args.formato, saida)
+                elif args.comando == "tempos-padrao":
+                    _escrever_relatorio(estimar_tempos_padrao(armazem, de, ate, args.os, args.por), args.formato, saida)
+                elif args.comando == "tempos-em-turno":
+                    _escrever_relatorio(tempos_em_turno(armazem, de, ate, args.os), args.formato, saida)
+                else:
+                    funcao = resumo_por_os if args.comando == "resumo-os" else resumo_por_processo
+                    _escrever_relatorio(funcao(armazem, de, ate, args.os), args.formato, saida)
+            finally:
+                if saida is not sys.stdout:
+                    saida.close()
+            return
+
+        manutencao = Manutencao(armazem, args.simular)
+        if args.comando == "deduplicar":
+            resultado = f"{manutencao.deduplicar()} linhas repetidas removidas"
+        elif args.comando == "recalcular":
+            corrigidas, movidas = manutencao.recalcular()
+            resultado = f"{corrigidas} linhas corrigidas, {movidas} movidas de arquivo"
+        else:
+            resultado = f"{manutencao.arquivar()} OS arquivadas"
+    except (ValueError, RuntimeError) as erro:
+        print(f"ERRO: {erro}", file=sys.stderr)
+        sys.exit(1)
+
+    print(("[simulação] " if args.simular else "") + resultado)
+    for caminho in manutencao.gravados:
+        print(f"  {'alteraria' if args.simular else 'gravado'}: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""API HTTP dos cronômetros, sem Streamlit (leitores, CLPs, app móvel)
+
+Usa os mesmos arquivos do app_github.py (no GitHub ou numa pasta local).
+As consultas saem de uma cópia em memória renovada a cada poucos segundos, sem
+esperar pela rede: enquanto uma thread relê ou grava, as outras usam a cópia atual.
+Cada ação relê o CSV de tempos ativos, aplica o motor de tempos e grava (um
+commit no GitHub), refazendo a operação se outra sessão gravou no meio. Falhas
+de rede respondem 502 e falhas do armazenamento, 503.
+
+Rotas:
+    GET  /saude
+    GET  /os                               OS ativas
+    GET  /status?os=1580                   cronômetros (em andamento/pausados, ou todos de uma OS)
+    POST /iniciar, /pausar, /finalizar     {"numero_os": 1580, "processo": 2}  (código do catálogo ou nome)
+    POST /leitura                          {"codigo": "1580|2|I"}  (formato do leitor de código)
+
+Com API_TOKEN no ambiente, as requisições precisam do cabeçalho
+"Authorization: Bearer <token>".
+
+Uso:
+    python api_tempos.py --porta 8502              # pasta local
+    python api_tempos.py --github --porta 8502     # GitHub (GITHUB_TOKEN no ambiente)
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import requests
+
+import intervalos
+import leitor_codigos
+import motor_tempos
+from catalogo_processos import CATALOGO
+from importacao_os import ARQUIVO_OS, COLUNAS_OS
+from lote_tempos import indexar_tempos, tempos_em_arrays
+from migracao_datas import normalizar_tempos
+from particionamento import ARQUIVO_ATIVO, PASTA_HISTORICO, caminho_particao, meses_das_linhas
+
+# Idade máxima (segundos) da cópia em memória usada nas consultas
+INTERVALO_LEITURA = float(os.environ.get("API_INTERVALO_LEITURA", 2))
+API_TOKEN = os.environ.get("API_TOKEN", "")
+PORTA = int(os.environ.get("API_PORTA", 8502))
+
+
+def _inteiro_ou_none(valor):
+    return None if motor_tempos._vazio(valor) else int(valor)
+
+
+class ConflitoGravacao(RuntimeError):
+    """O arquivo mudou a cada tentativa de gravação"""
+
+
+class ServicoTempos:
+    """Cópia em memória dos dados e ações sobre os cronômetros, sobre um ClienteGitHub ou ArquivosLocais"""
+
+    def __init__(self, armazem, catalogo=CATALOGO, intervalo_leitura=INTERVALO_LEITURA):
+        self.armazem = armazem
+        self.catalogo = catalogo
+        self.intervalo_leitura = intervalo_leitura
+        # _lock só troca as cópias em memória (nunca durante I/O); releituras e ações têm o seu
+        self._lock = threading.Lock()
+        self._lock_leitura = threading.Lock()
+        self._lock_escrita = threading.Lock()
+        self._lido_em = None
+        # Incrementada a cada gravação dos ativos: uma releitura iniciada antes não a desfaz
+        self._versao = 0
+        self.df_os = pd.DataFrame(columns=COLUNAS_OS)
+        self.ativos = normalizar_tempos(pd.DataFrame(columns=motor_tempos.COLUNAS_TEMPOS))
+        self.tempos = tempos_em_arrays(self.ativos)
+        # Partições do histórico (caminho -> DataFrame) e onde está cada processo finalizado
+        self.historico = {}
+        self._indice_historico = {}
+
+    def _ler_csv(self, caminho, colunas):
+        """DataFrame e SHA de um CSV do armazém (vazio com as colunas se não existir)"""
+        conteudo, sha = self.armazem.ler(caminho)
+        if conteudo is None:
+            return pd.DataFrame(columns=colunas), None
+        return pd.read_csv(io.BytesIO(conteudo)), sha
+
+    def _ler_tempos(self, caminho):
+        df, sha = self._ler_csv(caminho, motor_tempos.COLUNAS_TEMPOS)
+        return normalizar_tempos(df), sha
+
+    def _definir_ativos(self, ativos):
+        # Substitui (nunca altera no lugar): consultas em andamento continuam com a cópia anterior
+        tempos = tempos_em_arrays(ativos)
+        with self._lock:
+            self.ativos, self.tempos = ativos, tempos
+            self._versao += 1
+
+    def _copia_ativos(self):
+        """Tempos ativos e seus arrays da mesma versão"""
+        with self._lock:
+            return self.ativos, self.tempos
+
+    def _definir_particao(self, caminho, df):
+        # Índice novo trocado de uma vez (chamar só com o _lock_escrita: uma gravação por vez)
+        indice = {chave: origem for chave, origem in self._indice_historico.items() if origem != caminho}
+        indice.update(dict.fromkeys(indexar_tempos(df), caminho))
+        with self._lock:
+            self.historico = {**self.historico, caminho: df}
+            self._indice_historico = indice
+
+    def carregar(self):
+        """Lê OS, tempos ativos e todas as partições do histórico"""
+        with self._lock_escrita:
+            for caminho in self.armazem.listar(PASTA_HISTORICO):
+                if caminho.endswith(".csv"):
+                    self._definir_particao(caminho, self._ler_tempos(caminho)[0])
+        self.atualizar(forcar=True)
+
+    def atualizar(self, forcar=False):
+        """Relê OS e tempos ativos se a cópia em memória passou do intervalo
+
+        Uma releitura por vez; com outra em andamento, a consulta segue com a cópia atual.
+        """
+        lido_em = self._lido_em
+        if not forcar and lido_em is not None and time.monotonic() - lido_em < self.intervalo_leitura:
+            return
+        if not self._lock_leitura.acquire(blocking=forcar or lido_em is None):
+            return
+        try:
+            versao = self._versao
+            df_os = self._ler_csv(ARQUIVO_OS, COLUNAS_OS)[0]
+            ativos = self._ler_tempos(ARQUIVO_ATIVO)[0]
+            tempos = tempos_em_arrays(ativos)
+            with self._lock:
+                self.df_os = df_os
+                if self._versao == versao:
+                    self.ativos, self.tempos = ativos, tempos
+                self._lido_em = time.monotonic()
+        finally:
+            self._lock_leitura.release()
+
+    def os_ativas(self):
+        """OS com status ativa"""
+        self.atualizar()
+        df = self.df_os[self.df_os['status_os'] == 'ativa']
+        return [
+            {'numero_os': int(linha.numero_os), 'produto': linha.produto,
+             'quantidade': _inteiro_ou_none(linha.quantidade), 'data_criacao': linha.data_criacao}
+            for linha in df.itertuples(index=False)
+        ]
+
+    def status(self, numero_os=None):
+        """Cronômetros com o tempo atual: em andamento/pausados, ou todos os de uma OS (com finalizados)"""
+        self.atualizar()
+        ativos, tempos = self._copia_ativos()
+        segundos = tempos.tempos_atuais()
+        posicoes = range(len(tempos)) if numero_os is None else (tempos.numero_os == numero_os).nonzero()[0]
+        atualizacao = ativos['data_atualizacao'].tolist()
+
+        resultado = [
+            {
+                'numero_os': int(tempos.numero_os[i]),
+                'processo': tempos.processos[tempos.processo[i]],
+                'nome': self.catalogo.nome(tempos.processos[tempos.processo[i]]),
+                'status': motor_tempos.STATUS_NOMES[tempos.status[i]],
+                'tempo_segundos': round(float(segundos[i]), 1),
+                'inicio_atual': _inteiro_ou_none(tempos.inicio[i] or None),
+                'data_atualizacao': _inteiro_ou_none(atualizacao[i]),
+            }
+            for i in posicoes
+        ]
+        if numero_os is not None:
+            vistos = {item['processo'] for item in resultado}
+            for (os_, processo), caminho in self._indice_historico.items():
+                if os_ == numero_os and processo not in vistos:
+                    resultado.append(self._registro_json(self._registro_historico(os_, processo)[0]))
+        return resultado
+
+    def _registro_json(self, registro, agora=None):
+        return {
+            'numero_os': int(registro.numero_os),
+            'processo': int(registro.processo) if str(registro.processo).isdigit() else registro.processo,
+            'nome': self.catalogo.nome(registro.processo),
+            'status': registro.status,
+            'tempo_segundos': round(float(motor_tempos.tempo_atual(registro, agora)), 1),
+            'inicio_atual': registro.inicio,
+            'data_atualizacao': registro.atualizacao,
+        }
+
+    def _registro_historico(self, numero_os, processo):
+        """Registro finalizado do histórico e o caminho da partição (None, None se não há)"""
+        with self._lock:
+            caminho = self._indice_historico.get((numero_os, processo))
+            df = self.historico.get(caminho)
+        if caminho is None:
+            return None, None
+        linha = indexar_tempos(df)[(numero_os, processo)]
+        return motor_tempos.registro_de_linha(df.loc[linha]), caminho
+
+    def _gravar_particao(self, caminho, transformar, mensagem):
+        """Relê a partição, aplica a transformação e grava (refaz se o SHA mudar no meio)"""
+        for tentativa in range(3):
+            df, sha = self._ler_tempos(caminho)
+            df = transformar(df)
+            if self.armazem.gravar(caminho, df.to_csv(index=False), sha, mensagem):
+                self._definir_particao(caminho, df)
+                return
+        raise ConflitoGravacao(f"Não foi possível gravar {caminho} (conflito de versão)")
+
+    @staticmethod
+    def _sem_processo(df, numero_os, processo):
+        return df[~((df['numero_os'] == numero_os) & (df['processo'] == processo))].reset_index(drop=True)
+
+    def executar(self, numero_os, processo, acao):
+        """Aplica iniciar/pausar/finalizar a um processo e grava; retorna (alterou, registro em JSON)"""
+        numero_os = int(numero_os)
+        processo = self.catalogo.codigo(processo)
+        if acao not in leitor_codigos.STATUS_DA_ACAO:
+            raise ValueError(f"Ação desconhecida: {acao}")
+
+        # Ações em série; as consultas não esperam por elas (só pela troca da cópia em memória)
+        with self._lock_escrita:
+            self.atualizar()
+            df_os = self.df_os
+            da_os = df_os[(df_os['numero_os'] == numero_os) & (df_os['status_os'] == 'ativa')]
+            if da_os.empty:
+                raise LookupError(f"OS {numero_os} não está ativa")
+            if processo not in self.catalogo.processos_do_produto(da_os['produto'].iloc[0]):
+                raise ValueError(f"{self.catalogo.nome(processo)} não faz parte do roteiro da OS {numero_os}")
+
+            for tentativa in range(3):
+                ativos, sha = self._ler_tempos(ARQUIVO_ATIVO)
+                linha = indexar_tempos(ativos).get((numero_os, processo))
+                origem_historico = None
+                if linha is not None:
+                    registro = motor_tempos.registro_de_linha(ativos.loc[linha])
+                else:
+                    registro, origem_historico = self._registro_historico(numero_os, processo)
+
+                if registro is None:
+                    registro = motor_tempos.RegistroTempo(numero_os, processo)
+                    alterou = acao == 'iniciar' and motor_tempos.iniciar(registro)
+                elif acao == 'iniciar':
+                    alterou = motor_tempos.iniciar(registro)
+                elif acao == 'pausar':
+                    alterou = motor_tempos.pausar(registro)
+                else:
+                    alterou = registro.status != motor_tempos.FINALIZADO and motor_tempos.finalizar(registro)
+                if not alterou:
+                    return False, self._registro_json(registro)
+
+                nova_linha = normalizar_tempos(pd.DataFrame([motor_tempos.linha_de_registro(registro)]))
+                restantes = ativos if linha is None else self._sem_processo(ativos, numero_os, processo)
+                data = datetime.now().strftime('%d/%m/%Y %H:%M')
+                mensagem = f"API: {acao} OS {numero_os} - {self.catalogo.nome(processo)} - {data}"
+
+                if registro.status == motor_tempos.FINALIZADO:
+                    # Histórico primeiro: numa falha entre as escritas a linha fica duplicada, nunca perdida
+                    caminho = caminho_particao(meses_das_linhas(nova_linha).iloc[0])
+                    self._gravar_particao(caminho, lambda df: pd.concat(
+                        [parte for parte in (self._sem_processo(df, numero_os, processo), nova_linha) if not parte.empty],
+                        ignore_index=True), mensagem)
+                    novos_ativos = restantes
+                elif linha is not None:
+                    novos_ativos = ativos.copy()
+                    valores = motor_tempos.linha_de_registro(registro)
+                    colunas = list(valores)[2:]
+                    novos_ativos.loc[linha, colunas] = [valores[coluna] for coluna in colunas]
+                else:
+                    novos_ativos = pd.concat([parte for parte in (ativos, nova_linha) if not parte.empty],
+                                             ignore_index=True)
+
+                if not self.armazem.gravar(ARQUIVO_ATIVO, novos_ativos.to_csv(index=False), sha, mensagem):
+                    continue  # Outra sessão gravou entre a leitura e a gravação: refaz sobre a versão nova
+                self._definir_ativos(novos_ativos)
+                if linha is not None:
+                    # Trecho encerrado (pausa/finalização de um processo em andamento)
+                    intervalos.gravar_intervalos(
+                        self.armazem, intervalos.intervalos_fechados(ativos.loc[[linha]], nova_linha), mensagem)
+
+                if origem_historico is not None and registro.status != motor_tempos.FINALIZADO:
+                    # Processo retomado: sai do histórico depois de gravado nos ativos
+                    self._gravar_particao(origem_historico,
+                                          lambda df: self._sem_processo(df, numero_os, processo), mensagem)
+                return True, self._registro_json(registro)
+
+        raise ConflitoGravacao(f"Não foi possível gravar {ARQUIVO_ATIVO} (conflito de versão)")
+
+
+class ManipuladorApi(BaseHTTPRequestHandler):
+    """Rotas HTTP sobre o ServicoTempos do servidor"""
+
+    server_version = "ApontamentoTempos/1.0"
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def _responder(self, codigo, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _autorizado(self):
+        token = self.server.token
+        return not token or self.headers.get("Authorization", "") == f"Bearer {token}"
+
+    def _corpo_json(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        if not isinstance(corpo, dict):
+            raise ValueError("Corpo JSON deve ser um objeto")
+        return corpo
+
+    @staticmethod
+    def _campo(corpo, nome):
+        if nome not in corpo:
+            raise ValueError(f"campo ausente: {nome}")
+        return corpo[nome]
+
+    def _tratar(self, rota):
+        if not self._autorizado():
+            return self._responder(401, {'erro': 'não autorizado'})
+        try:
+            codigo, corpo = rota()
+        except ValueError as erro:
+            codigo, corpo = 400, {'erro': str(erro)}
+        except LookupError as erro:
+            codigo, corpo = 404, {'erro': str(erro)}
+        except ConflitoGravacao as erro:
+            codigo, corpo = 409, {'erro': str(erro)}
+        except requests.RequestException as erro:
+            codigo, corpo = 502, {'erro': f"falha ao acessar o GitHub: {erro}"}
+        except (RuntimeError, OSError) as erro:
+            codigo, corpo = 503, {'erro': f"armazenamento indisponível: {erro}"}
+        except Exception:
+            # Erro de programação: responde e deixa o traceback no log do servidor
+            self._responder(500, {'erro': 'erro interno'})
+            raise
+        self._responder(codigo, corpo)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        servico = self.server.servico
+        if url.path == "/saude":
+            rota = lambda: (200, {'ok': True})
+        elif url.path == "/os":
+            rota = lambda: (200, servico.os_ativas())
+        elif url.path == "/status":
+            numero_os = parse_qs(url.query).get("os", [None])[0]
+
+            def rota():
+                if numero_os is not None and not numero_os.isdigit():
+                    raise ValueError(f"Número de OS inválido: {numero_os}")
+                return 200, servico.status(int(numero_os) if numero_os is not None else None)
+        else:
+            return self._responder(404, {'erro': 'rota inexistente'})
+        self._tratar(rota)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        servico = self.server.servico
+        acao = url.path.strip("/")
+
+        def executar():
+            corpo = self._corpo_json()
+            if acao == "leitura":
+                numero_os, processo, acao_lida = leitor_codigos.interpretar_codigo(
+                    self._campo(corpo, "codigo"), servico.catalogo)
+                alterou, registro = servico.executar(numero_os, processo, acao_lida)
+            else:
+                alterou, registro = servico.executar(self._campo(corpo, "numero_os"), self._campo(corpo, "processo"), acao)
+            return 200, {'alterado': alterou, 'registro': registro}
+
+        if acao not in leitor_codigos.STATUS_DA_ACAO and acao != "leitura":
+            return self._responder(404, {'erro': 'rota inexistente'})
+        self._tratar(executar)
+
+
+def criar_servidor(servico, porta=PORTA, host="0.0.0.0", token=API_TOKEN, verboso=False):
+    """Servidor HTTP multithread pronto para serve_forever()"""
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorApi)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    servidor.token = token
+    servidor.verboso = verboso
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP dos cronômetros de processos")
+    parser.add_argument("--github", action="store_true", help="usa o GitHub (GITHUB_TOKEN no ambiente)")
+    parser.add_argument("--pasta", default=".", help="pasta dos CSVs (sem --github)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--verboso", action="store_true", help="registra cada requisição")
+    args = parser.parse_args()
+
+    from cliente_github import ArquivosLocais, ClienteGitHub
+
+    armazem = ClienteGitHub() if args.github else ArquivosLocais(args.pasta)
+    servico = ServicoTempos(armazem)
+    servico.carregar()
+    servidor = criar_servidor(servico, args.porta, args.host, verboso=args.verboso)
+    print(f"API em http://{args.host}:{args.porta} ({'GitHub' if args.github else os.path.abspath(args.pasta)})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,21 @@ from datetime import datetime, timedelta
 import time
 import requests
 import base64
+import io
+import os
+
+import lote_tempos
+import motor_tempos
+from cadastro_produtos import com_produto_id
+from catalogo_processos import CATALOGO
+from mesclagem import mesclar_tres_vias, CHAVES_OS, CHAVES_TEMPOS
+from migracao_datas import normalizar_tempos
+from particionamento import (
+    PASTA_HISTORICO, PASTA_ARQUIVO_MORTO, ARQUIVO_MORTO_OS, ARQUIVO_MORTO_TEMPOS, ARQUIVO_MORTO_LEGADO,
+    particoes_arquivo_morto, carregar_historico_local, carregar_arquivo_morto_local, de_parquet,
+    caminho_particao, meses_das_linhas, meses_alterados, salvar_particao_local,
+    separar_tempos, juntar_tempos, juntar_com_arquivo_morto
+)
 
 # Configuração da página
 st.set_page_config(
@@ -17,6 +32,10 @@ st.set_page_config(
 GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN", "")  # Token será configurado nos secrets
 GITHUB_REPO = "controleciceropapelaria-design/sistema-apontamento-tempos"
 GITHUB_API_BASE = f"https://api.github.com/repos/{GITHUB_REPO}"
+GITHUB_BRANCH = os.environ.get("GITHUB_BRANCH", "main")
+
+# Intervalo (segundos) entre consultas ao último commit do branch
+INTERVALO_VERIFICACAO_REMOTA = int(st.secrets.get("INTERVALO_VERIFICACAO_REMOTA", 0) or 15)
 
 def github_api_request(method, endpoint, data=None, debug=False):
     """Faz requisição para GitHub API"""
@@ -77,23 +96,126 @@ def update_file_to_github(filename, content, sha, commit_message):
     
     return github_api_request("PUT", f"contents/{filename}", data)
 
+@st.cache_data(ttl=INTERVALO_VERIFICACAO_REMOTA, show_spinner=False)
+def obter_shas_remotos():
+    """Consulta o último commit do branch e retorna {arquivo: SHA do blob} (cache compartilhado entre sessões)"""
+    ref = github_api_request("GET", f"git/ref/heads/{GITHUB_BRANCH}")
+    if not ref:
+        return None
+    return obter_arvore_commit(ref["object"]["sha"])
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def obter_arvore_commit(commit_sha):
+    """Lista os SHAs dos arquivos e pastas na raiz de um commit (imutável, cache por SHA)"""
+    arvore = github_api_request("GET", f"git/trees/{commit_sha}")
+    if not arvore:
+        return None
+    return {item["path"]: item["sha"] for item in arvore.get("tree", [])}
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def listar_pasta_github(pasta, sha_pasta):
+    """Caminho -> SHA dos arquivos de uma pasta, pela árvore do git (imutável, cache pelo SHA da pasta)"""
+    arvore = github_api_request("GET", f"git/trees/{sha_pasta}")
+    if not arvore:
+        return {}
+    return {f"{pasta}/{item['path']}": item["sha"] for item in arvore.get("tree", []) if item.get("type") == "blob"}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def baixar_blob_binario(blob_sha):
+    """Baixa o conteúdo de um blob pelo SHA (imutável, baixado uma vez para todas as sessões)"""
+    response = github_api_request("GET", f"git/blobs/{blob_sha}")
+    if response:
+        return base64.b64decode(response["content"])
+    return None
+
+def baixar_blob_github(blob_sha):
+    """Baixa um blob de texto pelo SHA"""
+    dados = baixar_blob_binario(blob_sha)
+    return dados.decode("utf-8") if dados is not None else None
+
+def arquivos_remotos(pasta):
+    """Caminho -> SHA dos arquivos de uma pasta no último commit ({} sem GitHub)"""
+    shas = (obter_shas_remotos() or {}) if GITHUB_TOKEN else {}
+    return dict(listar_pasta_github(pasta, shas[pasta])) if shas.get(pasta) else {}
+
+def carregar_historico():
+    """Partições mensais do histórico de finalizados, do GitHub ou local; retorna (df, {caminho: SHA})"""
+    partes = []
+    shas_particoes = {}
+    for caminho, sha in sorted(arquivos_remotos(PASTA_HISTORICO).items()):
+        dados = baixar_blob_binario(sha) if caminho.endswith(".csv") else None
+        if dados is not None:
+            partes.append(pd.read_csv(io.BytesIO(dados)))
+            shas_particoes[caminho] = sha
+    if partes:
+        return normalizar_tempos(pd.concat(partes, ignore_index=True)), shas_particoes
+    historico = carregar_historico_local()
+    return (normalizar_tempos(historico) if historico is not None else None), {}
+
+def carregar_arquivo_morto(tipo):
+    """Partições do arquivo morto (Parquet) de OS ou tempos, do GitHub ou local"""
+    arquivos = arquivos_remotos(PASTA_ARQUIVO_MORTO)
+    legado = ARQUIVO_MORTO_LEGADO[tipo]
+    sha_legado = (obter_shas_remotos() or {}).get(legado) if GITHUB_TOKEN else None
+    if sha_legado:
+        arquivos[legado] = sha_legado
+    partes = [baixar_blob_binario(arquivos[caminho]) for caminho in particoes_arquivo_morto(arquivos, tipo)]
+    partes = [de_parquet(dados) for dados in partes if dados is not None]
+    if partes:
+        return normalizar_tempos(pd.concat(partes, ignore_index=True))
+    return normalizar_tempos(carregar_arquivo_morto_local(tipo))
+
+def ler_blob_remoto(filename, sha_remoto, sha_sessao):
+    """Lê a versão remota de um CSV se ela for mais nova que a da sessão"""
+    antigos = st.session_state.shas_antigos.setdefault(filename, set())
+    
+    # Ignora versões que esta sessão já substituiu (cache ainda não expirou)
+    if not sha_remoto or sha_remoto == sha_sessao or sha_remoto in antigos:
+        return None
+    
+    content = baixar_blob_github(sha_remoto)
+    if content is None:
+        return None
+    try:
+        df_remoto = normalizar_tempos(pd.read_csv(io.StringIO(content)))
+    except Exception:
+        return None
+    
+    if sha_sessao:
+        antigos.add(sha_sessao)
+    return df_remoto
+
+def aplicar_versao_remota(df_local, df_base, df_remoto, chaves):
+    """Adota a versão remota, preservando alterações locais ainda não enviadas"""
+    if df_base is not None and df_local.equals(df_base):
+        return df_remoto
+    df_mesclado, _ = mesclar_tres_vias(df_base, df_local, df_remoto, chaves)
+    return df_mesclado
+
+def registrar_gravacao(filename, sha_anterior, result):
+    """SHA novo do arquivo gravado; as versões substituídas não voltam pela verificação remota"""
+    antigos = st.session_state.shas_antigos.setdefault(filename, set())
+    antigos.update(sha for sha in sha_anterior if sha)
+    obter_shas_remotos.clear()
+    return result.get("content", {}).get("sha")
+
 def carregar_dados_os():
     """Carrega ordens de serviço do GitHub ou local"""
     # Primeiro tenta GitHub
     content, sha = get_file_from_github("ordens_servico.csv")
     if content:
         try:
-            df = pd.read_csv(pd.StringIO(content))
+            df = com_produto_id(pd.read_csv(io.StringIO(content)))
             return df, sha
         except:
             pass
     
     # Fallback para arquivo local
     try:
-        df = pd.read_csv("ordens_servico.csv")
+        df = com_produto_id(pd.read_csv("ordens_servico.csv"))
         return df, None
     except:
-        df = pd.DataFrame(columns=['numero_os', 'produto', 'quantidade', 'data_criacao', 'status_os'])
+        df = pd.DataFrame(columns=['numero_os', 'produto', 'quantidade', 'data_criacao', 'status_os', 'produto_id'])
         return df, None
 
 def carregar_dados_tempos():
@@ -102,22 +224,47 @@ def carregar_dados_tempos():
     content, sha = get_file_from_github("tempos_processos.csv")
     if content:
         try:
-            df = pd.read_csv(pd.StringIO(content))
+            df = normalizar_tempos(pd.read_csv(io.StringIO(content)))
             return df, sha
         except:
             pass
     
     # Fallback para arquivo local
     try:
-        df = pd.read_csv("tempos_processos.csv")
+        df = normalizar_tempos(pd.read_csv("tempos_processos.csv"))
         return df, None
     except:
-        df = pd.DataFrame(columns=['numero_os', 'processo', 'tempo_total_segundos', 'status', 'inicio_atual', 'data_atualizacao'])
+        df = normalizar_tempos(pd.DataFrame(columns=motor_tempos.COLUNAS_TEMPOS))
         return df, None
 
+def sincronizar_csv_github(filename, df, df_base, sha_base, chaves, commit_msg):
+    """Grava o CSV sobre o SHA da base da sessão; se outro tablet gravou antes, mescla (3 vias) e tenta de novo"""
+    df_envio, sha = df, sha_base
+    conflitos = 0
+    for tentativa in range(3):
+        result = update_file_to_github(filename, df_envio.to_csv(index=False), sha, commit_msg)
+        if result:
+            if conflitos:
+                # Linhas alteradas nos dois tablets: ficou a de data_atualizacao mais recente
+                st.warning(f"⚠️ {filename}: {conflitos} linha(s) alterada(s) também por outro tablet - "
+                           "mantida a versão mais recente de cada uma")
+            return df_envio, registrar_gravacao(filename, (sha_base, sha), result)
+        
+        # SHA obsoleto (409): junta as alterações desta sessão à versão atual do GitHub
+        content, sha = get_file_from_github(filename)
+        if content is None:
+            return None, None
+        try:
+            df_remoto = normalizar_tempos(pd.read_csv(io.StringIO(content)))
+        except Exception:
+            return None, None
+        df_envio, conflitos = mesclar_tres_vias(df_base, df, df_remoto, chaves)
+    
+    return None, None
+
 def salvar_os_github(df, sha):
     """Salva OS no GitHub"""
-    content = df.to_csv(index=False)
+    df = com_produto_id(df)
     commit_msg = f"OS atualizada - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
     
     # Sempre salva local primeiro como backup
@@ -125,18 +272,16 @@ def salvar_os_github(df, sha):
     
     if GITHUB_TOKEN:
         with st.spinner('🔄 Sincronizando com GitHub...'):
-            # Primeiro, busca o SHA mais atual
-            current_content, current_sha = get_file_from_github("ordens_servico.csv")
-            if current_sha:
-                sha = current_sha  # Usa o SHA mais atual
-            
-            result = update_file_to_github("ordens_servico.csv", content, sha, commit_msg)
-            if result:
+            df_mesclado, novo_sha = sincronizar_csv_github(
+                "ordens_servico.csv", df, st.session_state.get('base_os'), sha, CHAVES_OS, commit_msg)
+            if df_mesclado is not None:
                 st.success("✅ OS salva no GitHub com sucesso!")
-                # Atualiza o SHA no session state
-                st.session_state.sha_os = result.get("content", {}).get("sha")
-                # Força recarregamento dos dados
-                st.session_state.df_os, st.session_state.sha_os = carregar_dados_os()
+                # A versão gravada passa a ser a base desta sessão (sem baixar de novo)
+                df_mesclado = com_produto_id(df_mesclado)
+                df_mesclado.to_csv("ordens_servico.csv", index=False)
+                st.session_state.df_os = df_mesclado
+                st.session_state.sha_os = novo_sha
+                st.session_state.base_os = df_mesclado.copy()
                 return True
             else:
                 st.error("❌ Erro ao salvar no GitHub - mantido backup local")
@@ -145,28 +290,68 @@ def salvar_os_github(df, sha):
     
     return False
 
+def salvar_historico_github(finalizados):
+    """Regrava apenas as partições mensais do histórico cujos processos finalizados mudaram"""
+    historico = st.session_state.df_historico
+    meses = meses_alterados(finalizados, historico)
+    if not meses:
+        return True
+    
+    meses_finalizados = meses_das_linhas(finalizados)
+    meses_historico = meses_das_linhas(historico) if historico is not None else None
+    sucesso = True
+    
+    for mes in meses:
+        caminho = caminho_particao(mes)
+        df_mes = finalizados[meses_finalizados == mes]
+        df_base = historico[meses_historico == mes] if historico is not None else None
+        salvar_particao_local(mes, df_mes)
+        
+        if GITHUB_TOKEN:
+            commit_msg = f"Histórico {mes} atualizado - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+            df_mesclado, novo_sha = sincronizar_csv_github(
+                caminho, df_mes, df_base, st.session_state.shas_particoes.get(caminho), CHAVES_TEMPOS, commit_msg)
+            if df_mesclado is None:
+                sucesso = False
+                continue
+            st.session_state.shas_particoes[caminho] = novo_sha
+            df_mes = normalizar_tempos(df_mesclado)
+        
+        # Atualiza o histórico da sessão com a nova partição
+        if historico is not None:
+            historico = historico[meses_historico != mes]
+            meses_historico = meses_historico[meses_historico != mes]
+        historico = pd.concat([df for df in (historico, df_mes) if df is not None], ignore_index=True)
+        meses_historico = meses_das_linhas(historico)
+    
+    st.session_state.df_historico = historico
+    return sucesso
+
 def salvar_tempos_github(df, sha):
-    """Salva tempos no GitHub"""
-    content = df.to_csv(index=False)
+    """Salva tempos no GitHub (ativos no arquivo principal, finalizados no histórico mensal)"""
     commit_msg = f"Tempos atualizados - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    ativos, finalizados = separar_tempos(df)
     
     # Sempre salva local primeiro como backup
-    df.to_csv("tempos_processos.csv", index=False)
+    ativos.to_csv("tempos_processos.csv", index=False)
+    
+    # Histórico primeiro: numa falha entre as escritas a linha fica duplicada, nunca perdida
+    if not salvar_historico_github(finalizados):
+        st.error("❌ Erro ao salvar o histórico no GitHub - mantido backup local")
+        return False
     
     if GITHUB_TOKEN:
         with st.spinner('🔄 Sincronizando tempos com GitHub...'):
-            # Primeiro, busca o SHA mais atual
-            current_content, current_sha = get_file_from_github("tempos_processos.csv")
-            if current_sha:
-                sha = current_sha  # Usa o SHA mais atual
-            
-            result = update_file_to_github("tempos_processos.csv", content, sha, commit_msg)
-            if result:
+            df_mesclado, novo_sha = sincronizar_csv_github(
+                "tempos_processos.csv", ativos, st.session_state.get('base_tempos'), sha, CHAVES_TEMPOS, commit_msg)
+            if df_mesclado is not None:
                 st.success("✅ Tempos salvos no GitHub!")
-                # Atualiza o SHA no session state
-                st.session_state.sha_tempos = result.get("content", {}).get("sha")
-                # Força recarregamento dos dados
-                st.session_state.df_tempos, st.session_state.sha_tempos = carregar_dados_tempos()
+                # A versão gravada passa a ser a base desta sessão (sem baixar de novo)
+                df_mesclado = normalizar_tempos(df_mesclado)
+                df_mesclado.to_csv("tempos_processos.csv", index=False)
+                st.session_state.df_tempos = juntar_tempos(st.session_state.df_historico, df_mesclado)
+                st.session_state.sha_tempos = novo_sha
+                st.session_state.base_tempos = df_mesclado.copy()
                 return True
             else:
                 st.error("❌ Erro ao salvar tempos no GitHub - mantido backup local")
@@ -175,22 +360,31 @@ def salvar_tempos_github(df, sha):
     
     return False
 
+def carregar_tempos_sessao():
+    """Tempos ativos (base da mesclagem) juntos ao histórico mensal de finalizados, na sessão"""
+    df_ativos, st.session_state.sha_tempos = carregar_dados_tempos()
+    st.session_state.base_tempos = df_ativos.copy()
+    st.session_state.df_historico, st.session_state.shas_particoes = carregar_historico()
+    st.session_state.sha_historico = (obter_shas_remotos() or {}).get(PASTA_HISTORICO) if GITHUB_TOKEN else None
+    st.session_state.df_tempos = juntar_tempos(st.session_state.df_historico, df_ativos)
+
 # Inicialização dos dados
 if 'df_os' not in st.session_state or 'sha_os' not in st.session_state:
     st.session_state.df_os, st.session_state.sha_os = carregar_dados_os()
+    # Versão base para a mesclagem de 3 vias com alterações remotas
+    st.session_state.base_os = st.session_state.df_os.copy()
 
 if 'df_tempos' not in st.session_state or 'sha_tempos' not in st.session_state:
-    st.session_state.df_tempos, st.session_state.sha_tempos = carregar_dados_tempos()
-
-# Lista de processos
-PROCESSOS = [
-    "Aviamento de capa",
-    "Aviamento de miolo", 
-    "Encadernação e Finalização",
-    "Montagem de capa",
-    "Montagem de Miolo",
-    "Montagem do kit"
-]
+    carregar_tempos_sessao()
+
+if 'shas_antigos' not in st.session_state:
+    st.session_state.shas_antigos = {}
+
+def processos_da_os(numero_os):
+    """Códigos dos processos do roteiro do produto da OS (catálogo de processos)"""
+    df_os = st.session_state.df_os
+    produto = df_os.loc[df_os['numero_os'] == numero_os, 'produto']
+    return CATALOGO.processos_do_produto(produto.iloc[0] if not produto.empty else "")
 
 def formatar_tempo(segundos):
     """Formata tempo em HH:MM:SS"""
@@ -202,88 +396,53 @@ def formatar_tempo(segundos):
     segundos = int(segundos % 60)
     return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
 
+def _registro_tempo(numero_os, processo):
+    """Máscara da linha do processo e seu registro no motor de tempos (None se não existe)"""
+    df = st.session_state.df_tempos
+    mask = (df['numero_os'] == numero_os) & (df['processo'] == processo)
+    if not mask.any():
+        return mask, None
+    return mask, motor_tempos.registro_de_linha(df.loc[mask].iloc[0])
+
+def _gravar_registro(mask, registro):
+    """Grava o registro do motor de volta no DataFrame de tempos"""
+    linha = motor_tempos.linha_de_registro(registro)
+    if mask.any():
+        colunas = list(linha)[2:]
+        st.session_state.df_tempos.loc[mask, colunas] = [linha[coluna] for coluna in colunas]
+    else:
+        st.session_state.df_tempos = pd.concat([st.session_state.df_tempos, pd.DataFrame([linha])], ignore_index=True)
+
 def iniciar_processo(numero_os, processo):
     """Inicia cronômetro do processo"""
-    agora = datetime.now()
-    
-    # Verifica se já existe registro
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
+    mask, registro = _registro_tempo(numero_os, processo)
+    registro = registro or motor_tempos.RegistroTempo(numero_os, processo)
     
-    if mask.any():
-        # Atualiza registro existente
-        st.session_state.df_tempos.loc[mask, 'status'] = 'em_andamento'
-        st.session_state.df_tempos.loc[mask, 'inicio_atual'] = agora.isoformat()
-        st.session_state.df_tempos.loc[mask, 'data_atualizacao'] = agora.isoformat()
-    else:
-        # Cria novo registro
-        novo_registro = {
-            'numero_os': numero_os,
-            'processo': processo,
-            'tempo_total_segundos': 0,
-            'status': 'em_andamento',
-            'inicio_atual': agora.isoformat(),
-            'data_atualizacao': agora.isoformat()
-        }
-        st.session_state.df_tempos = pd.concat([st.session_state.df_tempos, pd.DataFrame([novo_registro])], ignore_index=True)
-    
-    # Salva no GitHub
-    salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    if motor_tempos.iniciar(registro):
+        _gravar_registro(mask, registro)
+        salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
 
 def pausar_processo(numero_os, processo):
     """Pausa cronômetro do processo"""
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
+    mask, registro = _registro_tempo(numero_os, processo)
     
-    if mask.any():
-        agora = datetime.now()
-        inicio_str = st.session_state.df_tempos.loc[mask, 'inicio_atual'].iloc[0]
-        
-        if pd.notna(inicio_str) and inicio_str:
-            inicio = datetime.fromisoformat(inicio_str)
-            tempo_decorrido = (agora - inicio).total_seconds()
-            
-            # Atualiza tempo total
-            tempo_atual = st.session_state.df_tempos.loc[mask, 'tempo_total_segundos'].iloc[0]
-            if pd.isna(tempo_atual):
-                tempo_atual = 0
-            
-            st.session_state.df_tempos.loc[mask, 'tempo_total_segundos'] = tempo_atual + tempo_decorrido
-            st.session_state.df_tempos.loc[mask, 'status'] = 'pausado'
-            st.session_state.df_tempos.loc[mask, 'inicio_atual'] = None
-            st.session_state.df_tempos.loc[mask, 'data_atualizacao'] = agora.isoformat()
-            
-            # Salva no GitHub
-            salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    if registro and motor_tempos.pausar(registro):
+        _gravar_registro(mask, registro)
+        salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
 
 def parar_processo(numero_os, processo):
     """Para cronômetro do processo"""
-    pausar_processo(numero_os, processo)
+    mask, registro = _registro_tempo(numero_os, processo)
     
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
-    if mask.any():
-        st.session_state.df_tempos.loc[mask, 'status'] = 'finalizado'
-        st.session_state.df_tempos.loc[mask, 'data_atualizacao'] = datetime.now().isoformat()
-        
-        # Salva no GitHub
+    # Pausa e finaliza numa única gravação
+    if registro and motor_tempos.finalizar(registro):
+        _gravar_registro(mask, registro)
         salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
 
-def get_tempo_atual_processo(numero_os, processo):
-    """Calcula tempo atual do processo"""
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
-    
-    if not mask.any():
-        return 0, 'não_iniciado'
-    
-    row = st.session_state.df_tempos.loc[mask].iloc[0]
-    tempo_total = row['tempo_total_segundos'] if pd.notna(row['tempo_total_segundos']) else 0
-    status = row['status'] if pd.notna(row['status']) else 'não_iniciado'
-    
-    # Se está em andamento, adiciona tempo desde o último início
-    if status == 'em_andamento' and pd.notna(row['inicio_atual']) and row['inicio_atual']:
-        inicio = datetime.fromisoformat(row['inicio_atual'])
-        tempo_decorrido = (datetime.now() - inicio).total_seconds()
-        tempo_total += tempo_decorrido
-    
-    return tempo_total, status
+def carregar_tempos_os(numero_os):
+    """Cronômetros de uma OS em arrays, para calcular todos os tempos de uma vez"""
+    df = st.session_state.df_tempos
+    return lote_tempos.tempos_em_arrays(df[df['numero_os'] == numero_os])
 
 # Interface principal
 st.title("⏱️ Sistema de Apontamento de Tempos de Produção")
@@ -291,32 +450,57 @@ st.title("⏱️ Sistema de Apontamento de Tempos de Produção")
 # Status do GitHub com comparação
 col_status1, col_status2 = st.columns(2)
 
+# Uma única requisição leve por intervalo, compartilhada por todas as sessões
+shas_remotos = obter_shas_remotos() if GITHUB_TOKEN else None
+
 with col_status1:
     if GITHUB_TOKEN:
-        # Teste de conectividade
-        test_response = github_api_request("GET", "")  # Info do repositório
-        if test_response:
-            st.success(f"🌐 Conectado: {test_response.get('full_name', 'N/A')}")
+        if shas_remotos is not None:
+            st.success(f"🌐 Conectado: {GITHUB_REPO}")
         else:
             st.error("❌ Token configurado mas erro de conexão")
     else:
         st.warning("⚠️ Modo offline")
 
 with col_status2:
-    if GITHUB_TOKEN:
-        # Compara dados locais vs GitHub
-        github_os, _ = get_file_from_github("ordens_servico.csv")
-        if github_os:
-            try:
-                df_github = pd.read_csv(pd.StringIO(github_os))
-                if len(st.session_state.df_os) != len(df_github):
-                    st.warning(f"⚠️ Dessincronizado: Local({len(st.session_state.df_os)}) vs GitHub({len(df_github)})")
-                else:
-                    st.success(f"✅ Sincronizado: {len(st.session_state.df_os)} OS")
-            except:
-                st.info("📄 GitHub vazio ou erro na leitura")
-        else:
+    if GITHUB_TOKEN and shas_remotos is not None:
+        # Só baixa (pelo SHA do blob) versões remotas mais novas que a da sessão, mesclando as alterações locais
+        sha_remoto = shas_remotos.get("ordens_servico.csv")
+        df_remoto = ler_blob_remoto("ordens_servico.csv", sha_remoto, st.session_state.sha_os)
+        mudou_os = df_remoto is not None
+        if mudou_os:
+            st.session_state.df_os = com_produto_id(aplicar_versao_remota(
+                st.session_state.df_os, st.session_state.get('base_os'), df_remoto, CHAVES_OS))
+            st.session_state.sha_os = sha_remoto
+            st.session_state.base_os = com_produto_id(df_remoto).copy()
+        
+        sha_remoto = shas_remotos.get("tempos_processos.csv")
+        df_remoto = ler_blob_remoto("tempos_processos.csv", sha_remoto, st.session_state.sha_tempos)
+        mudou_tempos = df_remoto is not None
+        if mudou_tempos:
+            ativos, finalizados = separar_tempos(st.session_state.df_tempos)
+            ativos = aplicar_versao_remota(ativos, st.session_state.get('base_tempos'), df_remoto, CHAVES_TEMPOS)
+            st.session_state.df_tempos = juntar_tempos(finalizados, ativos)
+            st.session_state.sha_tempos = sha_remoto
+            st.session_state.base_tempos = df_remoto.copy()
+        
+        # Histórico mensal (depois dos ativos): o SHA da pasta muda quando qualquer partição muda
+        sha_pasta = shas_remotos.get(PASTA_HISTORICO)
+        if sha_pasta and sha_pasta != st.session_state.sha_historico:
+            historico, shas_particoes = carregar_historico()
+            if historico is not None:
+                ativos, _ = separar_tempos(st.session_state.df_tempos)
+                st.session_state.df_historico = historico
+                st.session_state.shas_particoes = shas_particoes
+                st.session_state.df_tempos = juntar_tempos(historico, ativos)
+            st.session_state.sha_historico = sha_pasta
+        
+        if "ordens_servico.csv" not in shas_remotos:
             st.info("📄 Arquivo não encontrado no GitHub")
+        elif mudou_os or mudou_tempos:
+            st.warning("🔄 Alterações de outro tablet recarregadas")
+        else:
+            st.success(f"✅ Sincronizado: {len(st.session_state.df_os)} OS")
 
 # Sidebar para navegação
 st.sidebar.title("🧭 Navegação")
@@ -387,7 +571,7 @@ if st.sidebar.button("🔄 Forçar Sincronização"):
         with st.spinner("Sincronizando..."):
             # Recarrega dados do GitHub
             st.session_state.df_os, st.session_state.sha_os = carregar_dados_os()
-            st.session_state.df_tempos, st.session_state.sha_tempos = carregar_dados_tempos()
+            carregar_tempos_sessao()
             st.success("✅ Dados sincronizados!")
             st.rerun()
 
@@ -507,23 +691,28 @@ elif opcao == "🏠 Controle de Tempos":
             
             st.subheader(f"📋 Processos da {os_selecionada_str}")
             
+            # Tempos de todos os processos da OS num único cálculo vetorizado
+            processos_os = processos_da_os(os_selecionada)
+            tempos_os = carregar_tempos_os(os_selecionada)
+            segundos_os = tempos_os.tempos_atuais()
+            
             # Auto-refresh a cada 1 segundo
             placeholder = st.empty()
             
             with placeholder.container():
                 # Criar grid de processos
-                for i in range(0, len(PROCESSOS), 2):
+                for i in range(0, len(processos_os), 2):
                     col1, col2 = st.columns(2)
                     
                     # Processo 1
                     with col1:
-                        if i < len(PROCESSOS):
-                            processo = PROCESSOS[i]
-                            tempo_atual, status = get_tempo_atual_processo(os_selecionada, processo)
+                        if i < len(processos_os):
+                            processo = processos_os[i]
+                            tempo_atual, status = tempos_os.tempo_atual(os_selecionada, processo, segundos_os)
                             
                             # Card do processo
                             with st.container():
-                                st.markdown(f"### {processo}")
+                                st.markdown(f"### {CATALOGO.nome(processo)}")
                                 st.markdown(f"**⏰ Tempo:** `{formatar_tempo(tempo_atual)}`")
                                 st.markdown(f"**📊 Status:** {status.replace('_', ' ').title()}")
                                 
@@ -549,13 +738,13 @@ elif opcao == "🏠 Controle de Tempos":
                     
                     # Processo 2
                     with col2:
-                        if i + 1 < len(PROCESSOS):
-                            processo = PROCESSOS[i + 1]
-                            tempo_atual, status = get_tempo_atual_processo(os_selecionada, processo)
+                        if i + 1 < len(processos_os):
+                            processo = processos_os[i + 1]
+                            tempo_atual, status = tempos_os.tempo_atual(os_selecionada, processo, segundos_os)
                             
                             # Card do processo
                             with st.container():
-                                st.markdown(f"### {processo}")
+                                st.markdown(f"### {CATALOGO.nome(processo)}")
                                 st.markdown(f"**⏰ Tempo:** `{formatar_tempo(tempo_atual)}`")
                                 st.markdown(f"**📊 Status:** {status.replace('_', ' ').title()}")
                                 
@@ -592,17 +781,23 @@ elif opcao == "🏠 Controle de Tempos":
 elif opcao == "📊 Relatórios":
     st.header("📊 Relatórios de Tempos")
     
-    if not st.session_state.df_tempos.empty:
+    # Processos finalizados ficam no histórico mensal e no arquivo morto (a versão da sessão vence)
+    df_tempos_rel = juntar_com_arquivo_morto(
+        st.session_state.df_tempos,
+        carregar_arquivo_morto(ARQUIVO_MORTO_TEMPOS), CHAVES_TEMPOS)
+    df_os_rel = juntar_com_arquivo_morto(st.session_state.df_os, carregar_arquivo_morto(ARQUIVO_MORTO_OS), CHAVES_OS)
+    
+    if not df_tempos_rel.empty:
         # Resumo por OS
         st.subheader("📋 Resumo por Ordem de Serviço")
         
         resumo_os = []
-        for numero_os in st.session_state.df_tempos['numero_os'].unique():
-            tempos_os = st.session_state.df_tempos[st.session_state.df_tempos['numero_os'] == numero_os]
+        for numero_os in df_tempos_rel['numero_os'].unique():
+            tempos_os = df_tempos_rel[df_tempos_rel['numero_os'] == numero_os]
             tempo_total = tempos_os['tempo_total_segundos'].sum()
             
             # Buscar info da OS
-            os_info = st.session_state.df_os[st.session_state.df_os['numero_os'] == numero_os]
+            os_info = df_os_rel[df_os_rel['numero_os'] == numero_os]
             produto = os_info['produto'].iloc[0] if not os_info.empty else "N/A"
             
             resumo_os.append({
@@ -620,17 +815,19 @@ elif opcao == "📊 Relatórios":
         
         os_selecionada_rel = st.selectbox(
             "Selecione uma OS para ver detalhes:",
-            st.session_state.df_tempos['numero_os'].unique()
+            df_tempos_rel['numero_os'].unique()
         )
         
         if os_selecionada_rel:
-            detalhes = st.session_state.df_tempos[
-                st.session_state.df_tempos['numero_os'] == os_selecionada_rel
+            detalhes = df_tempos_rel[
+                df_tempos_rel['numero_os'] == os_selecionada_rel
             ].copy()
             
             if not detalhes.empty:
                 # Formatar tempo para exibição
                 detalhes['Tempo Formatado'] = detalhes['tempo_total_segundos'].apply(formatar_tempo)
+                detalhes['data_atualizacao'] = detalhes['data_atualizacao'].map(motor_tempos.formatar_data)
+                detalhes['processo'] = detalhes['processo'].map(CATALOGO.nome)
                 
                 # Selecionar colunas para exibição
                 colunas_exibir = ['processo', 'Tempo Formatado', 'status', 'data_atualizacao']
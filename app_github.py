@@ -1,10 +1,39 @@
 import streamlit as st
+import altair as alt
 import pandas as pd
+import numpy as np
 import json
 from datetime import datetime, timedelta
 import time
 import requests
 import base64
+import hashlib
+import io
+import re
+
+import intervalos
+import leitor_codigos
+import lote_tempos
+import motor_tempos
+import pausa_automatica
+import perfilador
+import previsao_carga
+import tempos_padrao
+from cadastro_produtos import (ARQUIVO_PRODUTOS, ATRIBUTOS, anexar_produtos, com_produto_id, ids_produtos,
+                               ler_produtos, produtos_para_csv, registrar_produtos)
+from catalogo_processos import CATALOGO
+from cliente_github import ArquivosLocais, ClienteGitHub
+from metricas import METRICAS
+from mesclagem import mesclar_tres_vias, CHAVES_OS, CHAVES_TEMPOS
+from migracao_datas import normalizar_tempos
+from importacao_os import importar
+from particionamento import (
+    PASTA_HISTORICO, ARQUIVO_ATIVO, ARQUIVO_MORTO_OS, ARQUIVO_MORTO_TEMPOS, caminho_particao, meses_das_linhas,
+    separar_tempos, juntar_tempos, meses_alterados, carregar_historico_local, salvar_particao_local,
+    para_parquet, de_parquet, carregar_arquivo_morto_local, anexar_ao_arquivo_morto,
+    separar_os_finalizadas, juntar_com_arquivo_morto, PASTA_ARQUIVO_MORTO, ARQUIVO_MORTO_LEGADO,
+    caminho_arquivo_morto, mes_atual, particoes_arquivo_morto, ler_parquet_local
+)
 
 # Configuração da página
 st.set_page_config(
@@ -23,6 +52,21 @@ GITHUB_TOKEN = (
 )
 GITHUB_REPO = "controleciceropapelaria-design/sistema-apontamento-tempos"
 GITHUB_API_BASE = f"https://api.github.com/repos/{GITHUB_REPO}"
+GITHUB_BRANCH = os.environ.get("GITHUB_BRANCH", "main")
+
+# Intervalo (segundos) entre consultas ao último commit do branch
+INTERVALO_VERIFICACAO_REMOTA = int(
+    st.secrets.get("INTERVALO_VERIFICACAO_REMOTA", 0) or
+    os.environ.get("INTERVALO_VERIFICACAO_REMOTA", 0) or
+    15
+)
+
+# Pausa automática de cronômetros esquecidos (secrets têm prioridade sobre as variáveis de ambiente)
+PAUSA_FIM_TURNO = st.secrets.get("PAUSA_FIM_TURNO", "") or pausa_automatica.HORARIOS_FIM_TURNO
+PAUSA_DURACAO_MAXIMA_HORAS = float(
+    st.secrets.get("PAUSA_DURACAO_MAXIMA_HORAS", 0) or
+    pausa_automatica.DURACAO_MAXIMA_HORAS
+)
 
 def get_github_headers():
     """Retorna headers corretos para GitHub API baseado no tipo de token"""
@@ -50,11 +94,21 @@ def github_api_request(method, endpoint, data=None, debug=False):
     else:
         url = GITHUB_API_BASE
     
+    inicio = time.perf_counter()
+    status = 0
+    bytes_trafegados = 0
     try:
         if method == "GET":
             response = requests.get(url, headers=headers)
         elif method == "PUT":
             response = requests.put(url, headers=headers, json=data)
+        elif method == "POST":
+            response = requests.post(url, headers=headers, json=data)
+        elif method == "PATCH":
+            response = requests.patch(url, headers=headers, json=data)
+        
+        status = response.status_code
+        bytes_trafegados = len(response.content) + len((data or {}).get("content", ""))
         
         # Log da resposta só no debug
         if debug:
@@ -72,6 +126,10 @@ def github_api_request(method, endpoint, data=None, debug=False):
         if debug:
             st.error(f"❌ Erro de conexão GitHub: {str(e)}")
         return None
+    finally:
+        # Agrupa endpoints por tipo (SHAs viram {sha})
+        rotulo = re.sub(r"[0-9a-f]{40}", "{sha}", endpoint or "root")
+        METRICAS.registrar(f"github {method} {rotulo}", time.perf_counter() - inicio, status, bytes_trafegados)
 
 def get_file_from_github(filename):
     """Baixa arquivo do GitHub"""
@@ -82,8 +140,10 @@ def get_file_from_github(filename):
     return None, None
 
 def update_file_to_github(filename, content, sha, commit_message):
-    """Atualiza arquivo no GitHub"""
-    encoded_content = base64.b64encode(content.encode("utf-8")).decode("utf-8")
+    """Atualiza arquivo no GitHub (texto ou binário)"""
+    with METRICAS.medir("base64: codificar"):
+        dados = content if isinstance(content, bytes) else content.encode("utf-8")
+        encoded_content = base64.b64encode(dados).decode("utf-8")
     
     data = {
         "message": commit_message,
@@ -96,65 +156,330 @@ def update_file_to_github(filename, content, sha, commit_message):
     
     return github_api_request("PUT", f"contents/{filename}", data)
 
+@st.cache_data(ttl=INTERVALO_VERIFICACAO_REMOTA, show_spinner=False)
+def obter_shas_remotos():
+    """Consulta o último commit do branch e retorna {arquivo: SHA do blob} (cache compartilhado entre sessões)"""
+    ref = github_api_request("GET", f"git/ref/heads/{GITHUB_BRANCH}")
+    if not ref:
+        return None
+    return obter_arvore_commit(ref["object"]["sha"])
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def obter_arvore_commit(commit_sha):
+    """Lista os SHAs dos arquivos e pastas na raiz de um commit (imutável, cache por SHA)"""
+    arvore = github_api_request("GET", f"git/trees/{commit_sha}")
+    if not arvore:
+        return None
+    return {item["path"]: item["sha"] for item in arvore.get("tree", [])}
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def baixar_blob_binario(blob_sha):
+    """Baixa o conteúdo de um blob pelo SHA (imutável, baixado uma vez para todas as sessões)"""
+    response = github_api_request("GET", f"git/blobs/{blob_sha}")
+    if response:
+        return base64.b64decode(response["content"])
+    return None
+
+def baixar_blob_github(blob_sha):
+    """Baixa um blob de texto pelo SHA"""
+    dados = baixar_blob_binario(blob_sha)
+    return dados.decode("utf-8") if dados is not None else None
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def listar_pasta_github(pasta, sha_pasta):
+    """Caminho -> SHA dos arquivos de uma pasta, pela árvore do git (imutável, cache pelo SHA da pasta)"""
+    arvore = github_api_request("GET", f"git/trees/{sha_pasta}")
+    if not arvore:
+        return {}
+    return {f"{pasta}/{item['path']}": item["sha"] for item in arvore.get("tree", []) if item.get("type") == "blob"}
+
+def shas_arquivo_morto(tipo):
+    """Caminho -> SHA das partições remotas do arquivo morto de um tipo (legado primeiro)"""
+    shas = obter_shas_remotos() or {}
+    arquivos = dict(listar_pasta_github(PASTA_ARQUIVO_MORTO, shas[PASTA_ARQUIVO_MORTO])) if shas.get(PASTA_ARQUIVO_MORTO) else {}
+    if shas.get(ARQUIVO_MORTO_LEGADO[tipo]):
+        arquivos[ARQUIVO_MORTO_LEGADO[tipo]] = shas[ARQUIVO_MORTO_LEGADO[tipo]]
+    return {caminho: arquivos[caminho] for caminho in particoes_arquivo_morto(arquivos, tipo)}
+
+@st.cache_data(max_entries=48, show_spinner=False)
+def ler_arquivo_morto_github(blob_sha):
+    """Lê uma partição do arquivo morto (Parquet) de um blob, com cache por SHA"""
+    dados = baixar_blob_binario(blob_sha)
+    return de_parquet(dados) if dados is not None else None
+
+def carregar_arquivo_morto(tipo):
+    """Carrega as partições do arquivo morto do GitHub ou local (usado apenas nos relatórios)"""
+    if GITHUB_TOKEN:
+        partes = [ler_arquivo_morto_github(sha) for sha in shas_arquivo_morto(tipo).values()]
+        partes = [df for df in partes if df is not None]
+        if partes:
+            return normalizar_tempos(pd.concat(partes, ignore_index=True))
+    return normalizar_tempos(carregar_arquivo_morto_local(tipo))
+
+@METRICAS.instrumentar()
+def verificar_alteracoes_remotas():
+    """Recarrega OS/tempos somente quando o SHA do blob no GitHub mudou"""
+    if not GITHUB_TOKEN:
+        return
+    
+    shas = obter_shas_remotos()
+    if not shas:
+        return
+    
+    # Ordens de serviço
+    sha_remoto = shas.get("ordens_servico.csv")
+    df_remoto = ler_blob_remoto("ordens_servico.csv", sha_remoto, st.session_state.sha_os)
+    if df_remoto is not None:
+        st.session_state.df_os = aplicar_versao_remota(
+            st.session_state.df_os, st.session_state.base_os, df_remoto, CHAVES_OS)
+        st.session_state.sha_os = sha_remoto
+        st.session_state.base_os = df_remoto.copy()
+    
+    # Tempos ativos
+    sha_remoto = shas.get(ARQUIVO_ATIVO)
+    df_remoto = ler_blob_remoto(ARQUIVO_ATIVO, sha_remoto, st.session_state.sha_tempos)
+    if df_remoto is not None:
+        ativos, finalizados = separar_tempos(st.session_state.df_tempos)
+        ativos = aplicar_versao_remota(ativos, st.session_state.base_tempos, df_remoto, CHAVES_TEMPOS)
+        st.session_state.df_tempos = juntar_tempos(finalizados, ativos)
+        st.session_state.sha_tempos = sha_remoto
+        st.session_state.base_tempos = df_remoto.copy()
+        # Trechos encerrados por outras sessões já foram gravados por elas
+        st.session_state.ativos_salvos = ativos.copy()
+    
+    # Histórico mensal (depois dos ativos): o SHA da pasta muda quando qualquer partição muda
+    sha_pasta = shas.get(PASTA_HISTORICO)
+    if sha_pasta and sha_pasta != st.session_state.sha_historico:
+        historico, shas_particoes = carregar_historico_tempos()
+        if historico is not None:
+            ativos, _ = separar_tempos(st.session_state.df_tempos)
+            st.session_state.df_historico = historico
+            st.session_state.shas_particoes = shas_particoes
+            st.session_state.df_tempos = juntar_tempos(historico, ativos)
+        st.session_state.sha_historico = sha_pasta
+
+def ler_blob_remoto(filename, sha_remoto, sha_sessao):
+    """Lê a versão remota de um CSV se ela for mais nova que a da sessão"""
+    antigos = st.session_state.shas_antigos.setdefault(filename, set())
+    
+    # Ignora versões que esta sessão já substituiu (cache ainda não expirou)
+    if not sha_remoto or sha_remoto == sha_sessao or sha_remoto in antigos:
+        return None
+    
+    content = baixar_blob_github(sha_remoto)
+    if content is None:
+        return None
+    try:
+        with METRICAS.medir("csv: ler"):
+            df_remoto = normalizar_tempos(pd.read_csv(io.StringIO(content)))
+    except Exception:
+        return None
+    
+    if sha_sessao:
+        antigos.add(sha_sessao)
+    return df_remoto
+
+def aplicar_versao_remota(df_local, df_base, df_remoto, chaves):
+    """Adota a versão remota, preservando alterações locais ainda não enviadas"""
+    if df_base is not None and df_local.equals(df_base):
+        return df_remoto
+    df_mesclado, _ = mesclar_tres_vias(df_base, df_local, df_remoto, chaves)
+    return df_mesclado
+
+@METRICAS.instrumentar()
 def carregar_dados_os():
     """Carrega ordens de serviço do GitHub ou local"""
     # Primeiro tenta GitHub
     content, sha = get_file_from_github("ordens_servico.csv")
     if content:
         try:
-            df = pd.read_csv(pd.StringIO(content))
+            df = com_produto_id(pd.read_csv(io.StringIO(content)))
             return df, sha
         except:
             pass
     
     # Fallback para arquivo local
     try:
-        df = pd.read_csv("ordens_servico.csv")
+        df = com_produto_id(pd.read_csv("ordens_servico.csv"))
         return df, None
     except:
-        df = pd.DataFrame(columns=['numero_os', 'produto', 'quantidade', 'data_criacao', 'status_os'])
+        df = pd.DataFrame(columns=['numero_os', 'produto', 'quantidade', 'data_criacao', 'status_os', 'produto_id'])
         return df, None
 
+@METRICAS.instrumentar()
+def carregar_produtos():
+    """Carrega a dimensão de produtos (SKU, linha, design, formato) do GitHub ou local"""
+    content, sha = get_file_from_github(ARQUIVO_PRODUTOS)
+    if content:
+        try:
+            return ler_produtos(content)
+        except Exception:
+            pass
+    
+    try:
+        with open(ARQUIVO_PRODUTOS, "rb") as f:
+            return ler_produtos(f.read())
+    except Exception:
+        return ler_produtos(None)
+
+@METRICAS.instrumentar()
 def carregar_dados_tempos():
     """Carrega tempos de processo do GitHub ou local"""
     # Primeiro tenta GitHub
     content, sha = get_file_from_github("tempos_processos.csv")
     if content:
         try:
-            df = pd.read_csv(pd.StringIO(content))
+            df = normalizar_tempos(pd.read_csv(io.StringIO(content)))
             return df, sha
         except:
             pass
     
     # Fallback para arquivo local
     try:
-        df = pd.read_csv("tempos_processos.csv")
+        df = normalizar_tempos(pd.read_csv("tempos_processos.csv"))
         return df, None
     except:
-        df = pd.DataFrame(columns=['numero_os', 'processo', 'tempo_total_segundos', 'status', 'inicio_atual', 'data_atualizacao'])
+        df = normalizar_tempos(pd.DataFrame(columns=motor_tempos.COLUNAS_TEMPOS))
         return df, None
 
+@METRICAS.instrumentar()
+def carregar_historico_tempos():
+    """Carrega as partições mensais do histórico do GitHub ou local"""
+    # Primeiro tenta GitHub (partições inalteradas vêm do cache por SHA)
+    arquivos = github_api_request("GET", f"contents/{PASTA_HISTORICO}")
+    if isinstance(arquivos, list):
+        partes = []
+        shas_particoes = {}
+        for arquivo in arquivos:
+            if not arquivo["name"].endswith(".csv"):
+                continue
+            content = baixar_blob_github(arquivo["sha"])
+            if content is None:
+                continue
+            try:
+                partes.append(pd.read_csv(io.StringIO(content)))
+                shas_particoes[arquivo["path"]] = arquivo["sha"]
+            except Exception:
+                pass
+        if partes:
+            return normalizar_tempos(pd.concat(partes, ignore_index=True)), shas_particoes
+    
+    # Fallback para arquivos locais
+    historico = carregar_historico_local()
+    return (normalizar_tempos(historico) if historico is not None else None), {}
+
+def shas_intervalos():
+    """Caminho -> SHA das partições de intervalos no GitHub, pela árvore da pasta (sem o limite da API de conteúdo)"""
+    sha_pasta = (obter_shas_remotos() or {}).get(intervalos.PASTA_INTERVALOS)
+    return listar_pasta_github(intervalos.PASTA_INTERVALOS, sha_pasta) if sha_pasta else {}
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def indice_intervalos(sha, _particao=None):
+    """Índice de uma partição de intervalos (imutável por SHA, compartilhado entre as sessões)"""
+    if _particao is None:
+        _particao = intervalos.ler_intervalos(baixar_blob_binario(sha))
+    return intervalos.IndiceIntervalos(_particao)
+
+@METRICAS.instrumentar()
+def consultar_intervalos(de, ate):
+    """Trechos que se sobrepõem à janela [de, ate) (epoch ms), com os cronômetros em andamento"""
+    # Primeiro tenta GitHub (partições inalteradas vêm do cache por SHA); senão, arquivos locais
+    shas = shas_intervalos() if GITHUB_TOKEN else {}
+    armazem = ArquivosLocais()
+    caminhos = shas if shas else armazem.listar(intervalos.PASTA_INTERVALOS)
+    # Partições gravadas por esta sessão depois da última consulta à árvore do GitHub
+    gravadas = st.session_state.get('particoes_intervalos', {})
+    partes = []
+    for caminho in intervalos.particoes_no_periodo(set(caminhos) | set(gravadas), de, ate):
+        if shas.get(caminho):
+            partes.append(indice_intervalos(shas[caminho]).consultar(de, ate))
+        elif not shas:
+            conteudo, sha = armazem.ler(caminho)
+            if conteudo:
+                partes.append(indice_intervalos(sha, intervalos.ler_intervalos(conteudo)).consultar(de, ate))
+        if caminho in gravadas and gravadas[caminho][0] != shas.get(caminho):
+            partes.append(indice_intervalos(*gravadas[caminho]).consultar(de, ate))
+    
+    abertos = intervalos.intervalos_em_andamento(separar_tempos(st.session_state.df_tempos)[0])
+    partes.append(abertos[(abertos['inicio'] < ate) & (abertos['fim'] > de)])
+    trechos = pd.concat([df for df in partes if not df.empty] or [partes[-1]], ignore_index=True)
+    return trechos.drop_duplicates(subset=intervalos.CHAVES_INTERVALOS, keep='last')
+
+def calcular_sha_blob(content):
+    """Calcula localmente o SHA que o git atribui ao conteúdo (hash do blob)"""
+    dados = content if isinstance(content, bytes) else content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(dados) + dados).hexdigest()
+
+@METRICAS.instrumentar()
+def sincronizar_csv_github(filename, df, df_base, sha_base, chaves, commit_msg):
+    """Envia CSV ao GitHub mesclando (3 vias) alterações remotas feitas desde a base"""
+    # Conteúdo idêntico ao último blob remoto conhecido: não há o que commitar
+    with METRICAS.medir("csv: serializar"):
+        content_local = df.to_csv(index=False)
+    if sha_base and calcular_sha_blob(content_local) == sha_base:
+        st.session_state.commits_evitados = st.session_state.get('commits_evitados', 0) + 1
+        return df, sha_base
+    
+    for tentativa in range(2):
+        # Busca a versão mais atual para detectar escritas de outras sessões
+        current_content, current_sha = get_file_from_github(filename)
+        df_envio = df
+        conflitos = 0
+        
+        if current_content is not None and current_sha != sha_base:
+            try:
+                df_remoto = normalizar_tempos(pd.read_csv(io.StringIO(current_content)))
+            except Exception:
+                df_remoto = None
+            if df_remoto is not None:
+                with METRICAS.medir("mesclagem: 3 vias"):
+                    df_envio, conflitos = mesclar_tres_vias(df_base, df, df_remoto, chaves)
+        
+        content = content_local
+        if df_envio is not df:
+            with METRICAS.medir("csv: serializar"):
+                content = df_envio.to_csv(index=False)
+        result = update_file_to_github(filename, content, current_sha, commit_msg)
+        if result:
+            if conflitos:
+                # Linhas alteradas nas duas sessões: ficou a de data_atualizacao mais recente
+                st.session_state.conflitos_mesclagem = st.session_state.get('conflitos_mesclagem', 0) + conflitos
+                st.warning(f"⚠️ {filename}: {conflitos} linha(s) alterada(s) também por outra sessão - "
+                           "mantida a versão mais recente de cada uma")
+            # Versões substituídas não devem ser recarregadas pela verificação remota
+            antigos = st.session_state.shas_antigos.setdefault(filename, set())
+            antigos.update(sha for sha in (sha_base, current_sha) if sha)
+            # Avisa as demais sessões na próxima verificação
+            obter_shas_remotos.clear()
+            return df_envio, result.get("content", {}).get("sha")
+        # SHA ficou obsoleto entre o GET e o PUT: tenta mais uma vez
+    
+    return None, None
+
+@METRICAS.instrumentar()
 def salvar_os_github(df, sha):
     """Salva OS no GitHub"""
-    content = df.to_csv(index=False)
     commit_msg = f"OS atualizada - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    df = com_produto_id(df)
     
     # Sempre salva local primeiro como backup
     df.to_csv("ordens_servico.csv", index=False)
     
     if GITHUB_TOKEN:
         with st.spinner('🔄 Sincronizando com GitHub...'):
-            # Primeiro, busca o SHA mais atual
-            current_content, current_sha = get_file_from_github("ordens_servico.csv")
-            if current_sha:
-                sha = current_sha  # Usa o SHA mais atual
-            
-            result = update_file_to_github("ordens_servico.csv", content, sha, commit_msg)
-            if result:
-                # Atualiza o SHA no session state
-                st.session_state.sha_os = result.get("content", {}).get("sha")
-                # Força recarregamento dos dados
-                st.session_state.df_os, st.session_state.sha_os = carregar_dados_os()
+            df_mesclado, novo_sha = sincronizar_csv_github(
+                "ordens_servico.csv", df, st.session_state.get('base_os'), sha, CHAVES_OS, commit_msg)
+            if df_mesclado is not None:
+                # Versão mesclada passa a ser a base desta sessão
+                df_mesclado.to_csv("ordens_servico.csv", index=False)
+                st.session_state.df_os = df_mesclado
+                st.session_state.sha_os = novo_sha
+                st.session_state.base_os = df_mesclado.copy()
+                try:
+                    salvar_produtos_github(df_mesclado)
+                except ValueError as erro:
+                    # Colisão de produto_id: a OS fica salva, o produto não entra na dimensão
+                    st.error(f"ERRO: {erro}")
                 return True
             else:
                 st.error("ERRO: Erro ao salvar no GitHub - mantido backup local")
@@ -163,52 +488,297 @@ def salvar_os_github(df, sha):
     
     return False
 
-def salvar_tempos_github(df, sha):
-    """Salva tempos no GitHub"""
-    content = df.to_csv(index=False)
+def salvar_produtos_github(df_os):
+    """Cadastra na dimensão de produtos os produtos das OS que ainda não estão nela"""
+    dimensao, novos = registrar_produtos(st.session_state.df_produtos, df_os['produto'])
+    if not novos:
+        return True
+    st.session_state.df_produtos = dimensao
+    with open(ARQUIVO_PRODUTOS, "w", encoding="utf-8", newline="") as f:
+        f.write(produtos_para_csv(dimensao))
+    if not GITHUB_TOKEN:
+        return True
+    
+    # Linhas derivadas só do texto do produto: basta cadastrar por cima da versão remota atual
+    commit_msg = f"Produtos cadastrados - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    for tentativa in range(2):
+        content, sha = get_file_from_github(ARQUIVO_PRODUTOS)
+        dimensao, novos = registrar_produtos(ler_produtos(content), df_os['produto'])
+        if not novos:
+            st.session_state.df_produtos = dimensao
+            return True
+        if update_file_to_github(ARQUIVO_PRODUTOS, produtos_para_csv(dimensao), sha, commit_msg):
+            obter_shas_remotos.clear()
+            st.session_state.df_produtos = dimensao
+            return True
+    return False
+
+@METRICAS.instrumentar()
+def atualizar_historico_sessao(novas):
+    """Troca no histórico da sessão as partições mensais gravadas ({mês: DataFrame})"""
+    historico = st.session_state.df_historico
+    if novas:
+        if historico is not None:
+            historico = historico[~meses_das_linhas(historico).isin(list(novas))]
+        historico = pd.concat([df for df in (historico, *novas.values()) if df is not None], ignore_index=True)
+        st.session_state.df_historico = historico
+    return historico
+
+def ler_particao_intervalos(caminho, sha):
+    """Trechos de uma partição de intervalos: os da última gravação desta sessão ou os do blob; None sem o blob"""
+    gravada = st.session_state.get('particoes_intervalos', {}).get(caminho)
+    if gravada and gravada[0] == sha:
+        return gravada[1]
+    dados = baixar_blob_binario(sha) if sha else None
+    if sha and dados is None:
+        # Sem o conteúdo atual, gravar por cima apagaria os trechos já salvos
+        return None
+    return intervalos.ler_intervalos(dados)
+
+def mesclar_blob_remoto(df, df_base, sha_base, sha_remoto, chaves):
+    """df mesclado (3 vias) com o blob remoto, se ele mudou desde a base; (df, conflitos), ou (None, 0) sem o blob"""
+    if not sha_remoto or sha_remoto == sha_base:
+        return df, 0
+    content = baixar_blob_github(sha_remoto)
+    if content is None:
+        return None, 0
+    try:
+        df_remoto = normalizar_tempos(pd.read_csv(io.StringIO(content)))
+    except Exception:
+        return df, 0
+    with METRICAS.medir("mesclagem: 3 vias"):
+        return mesclar_tres_vias(df_base, df, df_remoto, chaves)
+
+def mesclar_com_commit(commit_sha, ativos, sha_ativos, particoes, trechos_por_dia):
+    """Versões a gravar dos tempos sobre um commit: ({caminho: DataFrame}, {caminho: SHA remoto}, conflitos)
+
+    None se a árvore ou um blob remoto não puder ser lido.
+    """
+    raiz = obter_arvore_commit(commit_sha)
+    if raiz is None:
+        return None
+    remotos = dict(raiz)
+    for pasta in (PASTA_HISTORICO, intervalos.PASTA_INTERVALOS):
+        if raiz.get(pasta):
+            remotos.update(listar_pasta_github(pasta, raiz[pasta]))
+    
+    # Ativos e partições do histórico: mesclagem de 3 vias com a versão do commit
+    versoes = {}
+    conflitos = 0
+    arquivos = [(ARQUIVO_ATIVO, ativos, st.session_state.get('base_tempos'), sha_ativos)]
+    arquivos += [(caminho_particao(mes), df_mes, df_base, st.session_state.shas_particoes.get(caminho_particao(mes)))
+                 for mes, (df_mes, df_base) in particoes.items()]
+    for caminho, df, df_base, sha_base in arquivos:
+        df_mesclado, n = mesclar_blob_remoto(df, df_base, sha_base, remotos.get(caminho), CHAVES_TEMPOS)
+        if df_mesclado is None:
+            return None
+        versoes[caminho] = df_mesclado
+        conflitos += n
+    
+    # Intervalos só são acrescentados à partição do dia
+    for caminho, trechos in trechos_por_dia.items():
+        existentes = ler_particao_intervalos(caminho, remotos.get(caminho))
+        if existentes is None:
+            return None
+        versoes[caminho] = intervalos.anexar_intervalos(existentes, trechos)
+    return versoes, remotos, conflitos
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def obter_arvore_raiz(commit_sha):
+    """SHA da árvore raiz de um commit (imutável, cache por SHA)"""
+    commit = github_api_request("GET", f"git/commits/{commit_sha}")
+    return commit["tree"]["sha"] if commit else None
+
+def gravar_commit_github(arquivos, commit_msg, commit_pai):
+    """Grava vários arquivos de texto num único commit sobre commit_pai (API de árvores do git)
+
+    Retorna False também se o branch andou desde commit_pai (outra sessão gravou): basta mesclar de novo.
+    """
+    arvore_base = obter_arvore_raiz(commit_pai)
+    if not arvore_base:
+        return False
+    itens = [{"path": caminho, "mode": "100644", "type": "blob", "content": conteudo}
+             for caminho, conteudo in arquivos.items()]
+    arvore = github_api_request("POST", "git/trees", {"base_tree": arvore_base, "tree": itens})
+    if not arvore:
+        return False
+    commit = github_api_request("POST", "git/commits",
+                                {"message": commit_msg, "tree": arvore["sha"], "parents": [commit_pai]})
+    if not commit:
+        return False
+    # Sem force: se outro commit entrou no branch, a referência não anda (422) e nada é sobrescrito
+    return bool(github_api_request("PATCH", f"git/refs/heads/{GITHUB_BRANCH}", {"sha": commit["sha"], "force": False}))
+
+@METRICAS.instrumentar()
+def salvar_tempos_github(df, sha, trechos=None):
+    """Salva tempos no GitHub num único commit: ativos, partições mensais do histórico e intervalos
+
+    trechos: intervalos encerrados de linhas que já saíram de df (ex.: OS arquivadas).
+    """
     commit_msg = f"Tempos atualizados - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    ativos, finalizados = separar_tempos(df)
+    historico = st.session_state.df_historico
+    
+    # Partições mensais cujos finalizados mudaram, com a versão carregada de cada uma (base da mesclagem)
+    meses_finalizados = meses_das_linhas(finalizados)
+    meses_historico = meses_das_linhas(historico) if historico is not None else None
+    particoes = {mes: (finalizados[meses_finalizados == mes],
+                       historico[meses_historico == mes] if historico is not None else None)
+                 for mes in meses_alterados(finalizados, historico)}
+    
+    # Trechos encerrados desde a última versão gravada (df é alterado no lugar pelas ações)
+    novos = intervalos.intervalos_fechados(st.session_state.get('ativos_salvos'), df)
+    if trechos is not None and not trechos.empty:
+        novos = pd.concat([parte for parte in (trechos, novos) if not parte.empty], ignore_index=True)
+    dias = intervalos.dias_dos_intervalos(novos)
+    trechos_por_dia = {intervalos.caminho_intervalos(dia): novos[dias == dia] for dia in sorted(set(dias))}
     
     # Sempre salva local primeiro como backup
-    df.to_csv("tempos_processos.csv", index=False)
+    ativos.to_csv(ARQUIVO_ATIVO, index=False)
+    for mes, (df_mes, _) in particoes.items():
+        salvar_particao_local(mes, df_mes)
+    intervalos.gravar_intervalos(ArquivosLocais(), novos, None)
     
-    if GITHUB_TOKEN:
-        with st.spinner('🔄 Sincronizando tempos com GitHub...'):
-            # Primeiro, busca o SHA mais atual
-            current_content, current_sha = get_file_from_github("tempos_processos.csv")
-            if current_sha:
-                sha = current_sha  # Usa o SHA mais atual
-            
-            result = update_file_to_github("tempos_processos.csv", content, sha, commit_msg)
-            if result:
-                # Atualiza o SHA no session state
-                st.session_state.sha_tempos = result.get("content", {}).get("sha")
-                # Força recarregamento dos dados
-                st.session_state.df_tempos, st.session_state.sha_tempos = carregar_dados_tempos()
-                return True
-            else:
-                # Falha silenciosa - mantém backup local
-                pass
-    else:
+    if not GITHUB_TOKEN:
+        atualizar_historico_sessao({mes: df_mes for mes, (df_mes, _) in particoes.items()})
+        st.session_state.ativos_salvos = ativos.copy()
         st.warning("GitHub Token não configurado - Configure GITHUB_TOKEN nos secrets do Streamlit Cloud")
+        return False
+    
+    with st.spinner('🔄 Sincronizando tempos com GitHub...'):
+        for tentativa in range(3):
+            # Um commit para tudo: nunca fica o histórico gravado sem os ativos (nem o contrário)
+            ref = github_api_request("GET", f"git/ref/heads/{GITHUB_BRANCH}")
+            mesclado = mesclar_com_commit(ref["object"]["sha"], ativos, sha, particoes, trechos_por_dia) if ref else None
+            if mesclado is None:
+                continue
+            versoes, remotos, conflitos = mesclado
+            with METRICAS.medir("csv: serializar"):
+                conteudos = {caminho: versao.to_csv(index=False) for caminho, versao in versoes.items()}
+            shas = {caminho: calcular_sha_blob(conteudo) for caminho, conteudo in conteudos.items()}
+            # Conteúdo idêntico ao blob remoto: não entra no commit
+            arquivos = {caminho: conteudos[caminho] for caminho in conteudos if shas[caminho] != remotos.get(caminho)}
+            if not arquivos:
+                st.session_state.commits_evitados = st.session_state.get('commits_evitados', 0) + 1
+            elif not gravar_commit_github(arquivos, commit_msg, ref["object"]["sha"]):
+                # Branch andou entre a leitura e a gravação: mescla de novo sobre o commit novo
+                continue
+            
+            if conflitos:
+                # Linhas alteradas nas duas sessões: ficou a de data_atualizacao mais recente
+                st.session_state.conflitos_mesclagem = st.session_state.get('conflitos_mesclagem', 0) + conflitos
+                st.warning(f"⚠️ Tempos: {conflitos} linha(s) alterada(s) também por outra sessão - "
+                           "mantida a versão mais recente de cada uma")
+            # Versões substituídas não devem ser recarregadas pela verificação remota
+            antigos = st.session_state.shas_antigos.setdefault(ARQUIVO_ATIVO, set())
+            antigos.update(sha_antigo for sha_antigo in (sha, remotos.get(ARQUIVO_ATIVO)) if sha_antigo)
+            
+            # Versões mescladas passam a ser a base desta sessão (ativos_salvos só depois de gravar)
+            df_ativo = versoes[ARQUIVO_ATIVO]
+            df_ativo.to_csv(ARQUIVO_ATIVO, index=False)
+            for mes in particoes:
+                st.session_state.shas_particoes[caminho_particao(mes)] = shas[caminho_particao(mes)]
+            historico = atualizar_historico_sessao({mes: versoes[caminho_particao(mes)] for mes in particoes})
+            st.session_state.df_tempos = juntar_tempos(historico, df_ativo)
+            st.session_state.sha_tempos = shas[ARQUIVO_ATIVO]
+            st.session_state.base_tempos = df_ativo.copy()
+            st.session_state.ativos_salvos = df_ativo.copy()
+            # Guarda só as partições de intervalos recém-gravadas (em geral a do dia)
+            st.session_state.particoes_intervalos = {caminho: (shas[caminho], versoes[caminho]) for caminho in trechos_por_dia}
+            # Avisa as demais sessões na próxima verificação
+            obter_shas_remotos.clear()
+            return True
+    
+    # Falha: ativos_salvos fica na última versão gravada e os trechos voltam na próxima gravação
+    return False
+
+def salvar_arquivo_morto(tipo, novos, chaves):
+    """Acrescenta linhas à partição do mês corrente do arquivo morto (Parquet), local e no GitHub"""
+    filename = caminho_arquivo_morto(tipo, mes_atual())
+    
+    # Sempre salva local primeiro como backup
+    arquivo_local = anexar_ao_arquivo_morto(normalizar_tempos(ler_parquet_local(filename)), novos, chaves)
+    os.makedirs(PASTA_ARQUIVO_MORTO, exist_ok=True)
+    with open(filename, "wb") as f:
+        f.write(para_parquet(arquivo_local))
+    
+    if not GITHUB_TOKEN:
+        return True
+    
+    commit_msg = f"Arquivo de OS finalizadas atualizado - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    for tentativa in range(2):
+        # SHA do cache na primeira tentativa; se estava obsoleto (conflito), consulta o branch de novo
+        if tentativa:
+            obter_shas_remotos.clear()
+        sha = shas_arquivo_morto(tipo).get(filename)
+        atual = normalizar_tempos(ler_arquivo_morto_github(sha)) if sha else None
+        content = para_parquet(anexar_ao_arquivo_morto(atual, novos, chaves))
+        
+        if sha and calcular_sha_blob(content) == sha:
+            return True
+        if update_file_to_github(filename, content, sha, commit_msg):
+            obter_shas_remotos.clear()
+            return True
     
     return False
 
+@METRICAS.instrumentar()
+def arquivar_os_finalizadas():
+    """Move OS finalizadas e seus tempos para o arquivo morto; retorna quantas OS foram movidas"""
+    df_os, df_tempos, os_finalizadas, tempos_finalizados = separar_os_finalizadas(
+        st.session_state.df_os, st.session_state.df_tempos)
+    if os_finalizadas.empty:
+        return 0
+    
+    # Trechos encerrados ao finalizar: depois do arquivamento as linhas saem de df_tempos
+    trechos = intervalos.intervalos_fechados(st.session_state.get('ativos_salvos'), st.session_state.df_tempos)
+    
+    # Grava o arquivo morto antes de remover do conjunto de trabalho
+    with st.spinner('🗄️ Arquivando OS finalizadas...'):
+        if not salvar_arquivo_morto(ARQUIVO_MORTO_OS, os_finalizadas, CHAVES_OS):
+            return 0
+        if not salvar_arquivo_morto(ARQUIVO_MORTO_TEMPOS, tempos_finalizados, CHAVES_TEMPOS):
+            return 0
+    
+    st.session_state.df_os = df_os
+    st.session_state.df_tempos = df_tempos
+    # Arquivo morto já gravado: até o conjunto de trabalho subir, a linha fica nos dois (e a ativa vence)
+    os_salvas = salvar_os_github(st.session_state.df_os, st.session_state.sha_os)
+    tempos_salvos = salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos, trechos)
+    if not (os_salvas and tempos_salvos):
+        st.warning("⚠️ OS arquivadas, mas OS/tempos não foram atualizados no GitHub - serão na próxima gravação")
+    return len(os_finalizadas)
+
 # Inicialização dos dados
 if 'df_os' not in st.session_state or 'sha_os' not in st.session_state:
     st.session_state.df_os, st.session_state.sha_os = carregar_dados_os()
+    # Versão base para a mesclagem de 3 vias ao salvar
+    st.session_state.base_os = st.session_state.df_os.copy()
+
+if 'df_produtos' not in st.session_state:
+    st.session_state.df_produtos = carregar_produtos()
 
 if 'df_tempos' not in st.session_state or 'sha_tempos' not in st.session_state:
-    st.session_state.df_tempos, st.session_state.sha_tempos = carregar_dados_tempos()
-
-# Lista de processos
-PROCESSOS = [
-    "Aviamento de capa",
-    "Aviamento de miolo", 
-    "Encadernação e Finalização",
-    "Montagem de capa",
-    "Montagem de Miolo",
-    "Montagem do kit"
-]
+    df_ativos, st.session_state.sha_tempos = carregar_dados_tempos()
+    st.session_state.base_tempos = df_ativos.copy()
+    # Última versão gravada dos ativos, para descobrir os trechos encerrados a cada gravação
+    st.session_state.ativos_salvos = df_ativos.copy()
+    # Junta o histórico mensal de finalizados aos tempos ativos
+    st.session_state.df_historico, st.session_state.shas_particoes = carregar_historico_tempos()
+    st.session_state.sha_historico = (obter_shas_remotos() or {}).get(PASTA_HISTORICO) if GITHUB_TOKEN else None
+    st.session_state.df_tempos = juntar_tempos(st.session_state.df_historico, df_ativos)
+
+if 'shas_antigos' not in st.session_state:
+    st.session_state.shas_antigos = {}
+
+# Consulta leve (uma requisição por intervalo) por alterações de outros tablets
+verificar_alteracoes_remotas()
+
+def processos_da_os(numero_os):
+    """Códigos dos processos do roteiro do produto da OS (catálogo de processos)"""
+    df_os = st.session_state.df_os
+    produto = df_os.loc[df_os['numero_os'] == numero_os, 'produto']
+    return CATALOGO.processos_do_produto(produto.iloc[0] if not produto.empty else "")
 
 def formatar_tempo(segundos):
     """Formata tempo em HH:MM:SS"""
@@ -220,88 +790,173 @@ def formatar_tempo(segundos):
     segundos = int(segundos % 60)
     return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
 
-def iniciar_processo(numero_os, processo):
-    """Inicia cronômetro do processo"""
-    agora = datetime.now()
-    
-    # Verifica se já existe registro
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
+@st.cache_resource(show_spinner="Calculando tempos padrão...")
+def carregar_estimador(_df_os, _df_tempos, _dimensao):
+    """Tempos padrão ajustados uma vez por servidor (com o arquivo morto); OS finalizadas entram depois"""
+    df_os = juntar_com_arquivo_morto(_df_os, carregar_arquivo_morto(ARQUIVO_MORTO_OS), CHAVES_OS)
+    df_tempos = juntar_com_arquivo_morto(_df_tempos, carregar_arquivo_morto(ARQUIVO_MORTO_TEMPOS), CHAVES_TEMPOS)
+    return tempos_padrao.EstimadorTempos.ajustar(tempos_padrao.amostras_por_peca(df_tempos, df_os, _dimensao))
+
+def estimador_tempos():
+    return carregar_estimador(st.session_state.df_os, st.session_state.df_tempos, st.session_state.df_produtos)
+
+def mostrar_previsao(produto, quantidade):
+    """Tempo total previsto para uma nova OS e o detalhe por processo do roteiro"""
+    previsao = estimador_tempos().prever(produto, quantidade, CATALOGO.processos_do_produto(produto))
+    if previsao['amostras'].sum() == 0:
+        st.caption("Sem histórico de OS finalizadas para prever o tempo")
+        return
     
-    if mask.any():
-        # Atualiza registro existente
-        st.session_state.df_tempos.loc[mask, 'status'] = 'em_andamento'
-        st.session_state.df_tempos.loc[mask, 'inicio_atual'] = agora.isoformat()
-        st.session_state.df_tempos.loc[mask, 'data_atualizacao'] = agora.isoformat()
+    sem_historico = previsao['previsto_segundos'].isna()
+    st.metric("Tempo previsto", formatar_tempo(previsao['previsto_segundos'].sum()),
+              help="Mediana do tempo por peça das OS finalizadas, sem os valores fora do padrão")
+    st.caption(f"Faixa: {formatar_tempo(previsao['minimo_segundos'].sum())} (P25) a "
+               f"{formatar_tempo(previsao['maximo_segundos'].sum())} (P90)"
+               + (f" - {int(sem_historico.sum())} processo(s) sem histórico" if sem_historico.any() else ""))
+    with st.expander("Previsão por processo"):
+        tabela = pd.DataFrame({
+            'Processo': previsao['processo'].map(CATALOGO.nome),
+            'Por Peça': previsao['segundos_por_peca'].map(lambda s: f"{s:.1f} s"),
+            'Previsto': previsao['previsto_segundos'].map(formatar_tempo),
+            'Faixa': previsao['minimo_segundos'].map(formatar_tempo) + " - " + previsao['maximo_segundos'].map(formatar_tempo),
+            'Base': previsao['base'] + " (" + previsao['amostras'].astype(str) + " OS)",
+        })
+        tabela.loc[sem_historico, ['Por Peça', 'Previsto', 'Faixa', 'Base']] = "-"
+        st.dataframe(tabela, hide_index=True, use_container_width=True)
+
+def _indice_tempos():
+    """Índice (numero_os, processo) -> linha de df_tempos, refeito só quando o DataFrame é substituído"""
+    df = st.session_state.df_tempos
+    if st.session_state.get('indice_tempos_df') is not df:
+        st.session_state.indice_tempos = lote_tempos.indexar_tempos(df)
+        st.session_state.indice_tempos_df = df
+    return st.session_state.indice_tempos
+
+def _registro_tempo(numero_os, processo):
+    """Linha do processo em df_tempos e seu registro no motor de tempos (None, None se não existe)"""
+    linha = _indice_tempos().get((int(numero_os), processo))
+    if linha is None:
+        return None, None
+    return linha, motor_tempos.registro_de_linha(st.session_state.df_tempos.loc[linha])
+
+def _gravar_registro(linha, registro):
+    """Grava o registro do motor de volta no DataFrame de tempos"""
+    valores = motor_tempos.linha_de_registro(registro)
+    if linha is not None:
+        colunas = list(valores)[2:]
+        st.session_state.df_tempos.loc[linha, colunas] = [valores[coluna] for coluna in colunas]
     else:
-        # Cria novo registro
-        novo_registro = {
-            'numero_os': numero_os,
-            'processo': processo,
-            'tempo_total_segundos': 0,
-            'status': 'em_andamento',
-            'inicio_atual': agora.isoformat(),
-            'data_atualizacao': agora.isoformat()
-        }
-        st.session_state.df_tempos = pd.concat([st.session_state.df_tempos, pd.DataFrame([novo_registro])], ignore_index=True)
-    
-    # Salva no GitHub
+        st.session_state.df_tempos = pd.concat([st.session_state.df_tempos, normalizar_tempos(pd.DataFrame([valores]))], ignore_index=True)
+
+@METRICAS.instrumentar()
+def iniciar_processo(numero_os, processo):
+    """Inicia cronômetro do processo; retorna False se já estava em andamento"""
+    linha, registro = _registro_tempo(numero_os, processo)
+    registro = registro or motor_tempos.RegistroTempo(numero_os, processo)
+    
+    if not motor_tempos.iniciar(registro):
+        return False
+    _gravar_registro(linha, registro)
     salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    return True
 
+@METRICAS.instrumentar()
 def pausar_processo(numero_os, processo):
-    """Pausa cronômetro do processo"""
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
+    """Pausa cronômetro do processo; retorna False se não estava rodando"""
+    linha, registro = _registro_tempo(numero_os, processo)
     
-    if mask.any():
-        agora = datetime.now()
-        inicio_str = st.session_state.df_tempos.loc[mask, 'inicio_atual'].iloc[0]
-        
-        if pd.notna(inicio_str) and inicio_str:
-            inicio = datetime.fromisoformat(inicio_str)
-            tempo_decorrido = (agora - inicio).total_seconds()
-            
-            # Atualiza tempo total
-            tempo_atual = st.session_state.df_tempos.loc[mask, 'tempo_total_segundos'].iloc[0]
-            if pd.isna(tempo_atual):
-                tempo_atual = 0
-            
-            st.session_state.df_tempos.loc[mask, 'tempo_total_segundos'] = tempo_atual + tempo_decorrido
-            st.session_state.df_tempos.loc[mask, 'status'] = 'pausado'
-            st.session_state.df_tempos.loc[mask, 'inicio_atual'] = None
-            st.session_state.df_tempos.loc[mask, 'data_atualizacao'] = agora.isoformat()
-            
-            # Salva no GitHub
-            salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    if not (registro and motor_tempos.pausar(registro)):
+        return False
+    _gravar_registro(linha, registro)
+    salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    return True
 
+@METRICAS.instrumentar()
 def parar_processo(numero_os, processo):
-    """Para cronômetro do processo"""
-    pausar_processo(numero_os, processo)
+    """Para cronômetro do processo; retorna False se nunca foi iniciado"""
+    linha, registro = _registro_tempo(numero_os, processo)
     
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
-    if mask.any():
-        st.session_state.df_tempos.loc[mask, 'status'] = 'finalizado'
-        st.session_state.df_tempos.loc[mask, 'data_atualizacao'] = datetime.now().isoformat()
-        
-        # Salva no GitHub
+    # Pausa e finaliza numa única gravação
+    if not (registro and motor_tempos.finalizar(registro)):
+        return False
+    _gravar_registro(linha, registro)
+    salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    return True
+
+def carregar_tempos_os(numero_os):
+    """Cronômetros de uma OS em arrays, para calcular todos os tempos de uma vez"""
+    df = st.session_state.df_tempos
+    return lote_tempos.tempos_em_arrays(df[df['numero_os'] == numero_os])
+
+def aplicar_em_lote(mascara, operacao):
+    """Aplica iniciar/pausar às linhas da máscara numa atualização vetorizada e salva uma única vez"""
+    alterados = lote_tempos.aplicar_em_lote(st.session_state.df_tempos, mascara, operacao)
+    if len(alterados):
         salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    return len(alterados)
 
-def get_tempo_atual_processo(numero_os, processo):
-    """Calcula tempo atual do processo"""
-    mask = (st.session_state.df_tempos['numero_os'] == numero_os) & (st.session_state.df_tempos['processo'] == processo)
-    
-    if not mask.any():
-        return 0, 'não_iniciado'
+@METRICAS.instrumentar()
+def iniciar_processos(numero_os, processos):
+    """Inicia vários processos de uma OS numa única gravação"""
+    df = st.session_state.df_tempos
+    existentes = set(df.loc[df['numero_os'] == numero_os, 'processo'])
+    novos = [processo for processo in processos if processo not in existentes]
+    if novos:
+        linhas = [motor_tempos.linha_de_registro(motor_tempos.RegistroTempo(numero_os, processo)) for processo in novos]
+        st.session_state.df_tempos = pd.concat([df, normalizar_tempos(pd.DataFrame(linhas))], ignore_index=True)
+        df = st.session_state.df_tempos
     
-    row = st.session_state.df_tempos.loc[mask].iloc[0]
-    tempo_total = row['tempo_total_segundos'] if pd.notna(row['tempo_total_segundos']) else 0
-    status = row['status'] if pd.notna(row['status']) else 'não_iniciado'
+    return aplicar_em_lote((df['numero_os'] == numero_os) & df['processo'].isin(processos), 'iniciar')
+
+@METRICAS.instrumentar()
+def pausar_processos(numeros_os=None):
+    """Pausa os cronômetros em andamento das OS indicadas (ou de todas) numa única gravação"""
+    df = st.session_state.df_tempos
+    mascara = df['status'] == motor_tempos.EM_ANDAMENTO
+    if numeros_os is not None:
+        mascara &= df['numero_os'].isin(numeros_os)
+    return aplicar_em_lote(mascara, 'pausar')
+
+def salvar_auditoria_pausas(auditoria):
+    """Acrescenta as pausas automáticas à auditoria (local e GitHub)"""
+    # Sempre salva local primeiro como backup
+    pausa_automatica.registrar_auditoria(ArquivosLocais(), auditoria, None)
+    if not GITHUB_TOKEN:
+        return True
     
-    # Se está em andamento, adiciona tempo desde o último início
-    if status == 'em_andamento' and pd.notna(row['inicio_atual']) and row['inicio_atual']:
-        inicio = datetime.fromisoformat(row['inicio_atual'])
-        tempo_decorrido = (datetime.now() - inicio).total_seconds()
-        tempo_total += tempo_decorrido
+    commit_msg = f"Auditoria de pausas automáticas - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    try:
+        pausa_automatica.registrar_auditoria(ClienteGitHub(GITHUB_TOKEN, GITHUB_REPO), auditoria, commit_msg)
+    except RuntimeError:
+        return False
+    obter_shas_remotos.clear()
+    return True
+
+def carregar_auditoria_pausas():
+    """Auditoria das pausas automáticas do GitHub (pelo SHA do blob) ou local"""
+    if GITHUB_TOKEN:
+        sha = (obter_shas_remotos() or {}).get(pausa_automatica.ARQUIVO_AUDITORIA)
+        if sha:
+            return pausa_automatica.ler_auditoria(baixar_blob_binario(sha))
+    return pausa_automatica.carregar_auditoria(ArquivosLocais())
+
+@METRICAS.instrumentar()
+def executar_pausa_automatica():
+    """Pausa os cronômetros esquecidos numa única gravação e registra a auditoria"""
+    auditoria = pausa_automatica.pausar_esquecidos(
+        st.session_state.df_tempos,
+        horarios=pausa_automatica.ler_horarios(PAUSA_FIM_TURNO),
+        duracao_maxima_horas=PAUSA_DURACAO_MAXIMA_HORAS)
+    if auditoria.empty:
+        return 0
     
-    return tempo_total, status
+    salvar_auditoria_pausas(auditoria)
+    salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+    return len(auditoria)
+
+# Uma varredura por intervalo no servidor, feita pela sessão que chegar primeiro
+if pausa_automatica.deve_executar():
+    executar_pausa_automatica()
 
 # Interface principal
 st.title("Sistema de Apontamento de Tempos de Produção")
@@ -309,11 +964,24 @@ st.title("Sistema de Apontamento de Tempos de Produção")
 # Sidebar para navegação
 st.sidebar.title("Navegação")
 
-opcao = st.sidebar.selectbox("Escolha uma opção:", 
-    ["Controle de Tempos", "Gerenciar Ordens de Serviço", "Relatórios", "Configurações Avançadas"])
+# Modo quiosque (?modo=painel ou ?modo=leitor): uma única página, sem barra lateral
+# (TV do chão de fábrica / tablet com leitor de código de barras)
+MODOS_QUIOSQUE = {"painel": "Painel Geral", "leitor": "Leitor de Código"}
+modo_quiosque = st.query_params.get("modo") in MODOS_QUIOSQUE
+if modo_quiosque:
+    opcao = MODOS_QUIOSQUE[st.query_params["modo"]]
+    st.markdown("<style>[data-testid='stSidebar'], [data-testid='stSidebarCollapsedControl'] {display: none;}</style>",
+                unsafe_allow_html=True)
+else:
+    opcao = st.sidebar.selectbox("Escolha uma opção:", 
+        ["Controle de Tempos", "Leitor de Código", "Painel Geral", "Previsão de Carga", "Linha do Tempo",
+         "Gerenciar Ordens de Serviço", "Relatórios", "Configurações Avançadas"])
 
 # Funcionalidades de debug disponíveis apenas na página dedicada
 
+# Tempo de renderização da página (registrado ao final do script ou antes do auto-refresh)
+inicio_pagina = time.perf_counter()
+
 if opcao == "Gerenciar Ordens de Serviço":
     st.header("Gerenciar Ordens de Serviço")
     
@@ -322,52 +990,82 @@ if opcao == "Gerenciar Ordens de Serviço":
     with col1:
         st.subheader("Cadastrar Nova OS")
         
-        with st.form("cadastrar_os"):
-            numero_os = st.number_input("Número da OS:", min_value=1, step=1)
-            produto = st.text_input("Produto:")
-            quantidade = st.number_input("Quantidade:", min_value=1, step=1, value=1)
-            
-            if st.form_submit_button("Cadastrar OS"):
-                if numero_os and produto:
-                    # Verifica se OS já existe
-                    if numero_os in st.session_state.df_os['numero_os'].values:
-                        st.error("ERRO: OS já existe!")
-                    else:
-                        nova_os = {
-                            'numero_os': numero_os,
-                            'produto': produto,
-                            'quantidade': quantidade,
-                            'data_criacao': datetime.now().isoformat(),
-                            'status_os': 'ativa'
-                        }
-                        
-                        # Adiciona a OS ao DataFrame local
-                        st.session_state.df_os = pd.concat([st.session_state.df_os, pd.DataFrame([nova_os])], ignore_index=True)
-                        
-                        # Mostra progresso
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        
-                        status_text.text("Salvando localmente...")
-                        progress_bar.progress(25)
-                        
-                        # Salva no GitHub
-                        status_text.text("Sincronizando com servidor...")
-                        progress_bar.progress(50)
-                        
-                        sucesso_github = salvar_os_github(st.session_state.df_os, st.session_state.sha_os)
-                        progress_bar.progress(100)
-                        
-                        if sucesso_github:
-                            status_text.text("Dados sincronizados com sucesso!")
-                        else:
-                            status_text.text("Dados salvos localmente")
-                        
-                        st.success(f"OS {numero_os} cadastrada com sucesso!")
-                        time.sleep(1)  # Pausa para mostrar o feedback
-                        st.rerun()
+        numero_os = st.number_input("Número da OS:", min_value=1, step=1)
+        produto = st.text_input("Produto:")
+        quantidade = st.number_input("Quantidade:", min_value=1, step=1, value=1)
+        
+        # Previsão pelos tempos padrão do histórico (sem formulário: atualiza ao digitar)
+        if produto:
+            mostrar_previsao(produto, quantidade)
+        
+        if st.button("Cadastrar OS", type="primary"):
+            if numero_os and produto:
+                # Verifica se OS já existe
+                if numero_os in st.session_state.df_os['numero_os'].values:
+                    st.error("ERRO: OS já existe!")
                 else:
-                    st.error("ERRO: Preencha todos os campos obrigatórios")
+                    nova_os = {
+                        'numero_os': numero_os,
+                        'produto': produto,
+                        'quantidade': quantidade,
+                        'data_criacao': datetime.now().isoformat(),
+                        'status_os': 'ativa',
+                        'produto_id': int(ids_produtos([produto]).iloc[0])
+                    }
+                    
+                    # Adiciona a OS ao DataFrame local
+                    st.session_state.df_os = pd.concat([st.session_state.df_os, pd.DataFrame([nova_os])], ignore_index=True)
+                    
+                    # Mostra progresso
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
+                    
+                    status_text.text("Salvando localmente...")
+                    progress_bar.progress(25)
+                    
+                    # Salva no GitHub
+                    status_text.text("Sincronizando com servidor...")
+                    progress_bar.progress(50)
+                    
+                    sucesso_github = salvar_os_github(st.session_state.df_os, st.session_state.sha_os)
+                    progress_bar.progress(100)
+                    
+                    if sucesso_github:
+                        status_text.text("Dados sincronizados com sucesso!")
+                    else:
+                        status_text.text("Dados salvos localmente")
+                    
+                    st.success(f"OS {numero_os} cadastrada com sucesso!")
+                    time.sleep(1)  # Pausa para mostrar o feedback
+                    st.rerun()
+            else:
+                st.error("ERRO: Preencha todos os campos obrigatórios")
+        
+        st.subheader("Importar OS em Lote")
+        # Chave nova a cada importação: o arquivo já importado não fica no seletor
+        planilha = st.file_uploader("CSV com numero_os, produto e quantidade:", type=["csv", "txt"],
+                                    key=f"planilha_os_{st.session_state.get('importacoes_os', 0)}")
+        
+        if planilha is not None:
+            try:
+                with METRICAS.medir("importação: validar"):
+                    df_importado, novas, rejeitadas = importar(st.session_state.df_os, planilha.getvalue())
+            except ValueError as e:
+                st.error(f"ERRO: {e}")
+            else:
+                st.write(f"**{len(novas)}** OS prontas para importar, **{len(rejeitadas)}** rejeitadas")
+                if not rejeitadas.empty:
+                    with st.expander("Linhas rejeitadas"):
+                        st.dataframe(rejeitadas, hide_index=True, use_container_width=True)
+                
+                if not novas.empty and st.button(f"Importar {len(novas)} OS", type="primary"):
+                    # Todas as OS entram de uma vez: uma gravação e um commit
+                    st.session_state.df_os = df_importado
+                    st.session_state.importacoes_os = st.session_state.get('importacoes_os', 0) + 1
+                    if salvar_os_github(st.session_state.df_os, st.session_state.sha_os):
+                        st.success(f"{len(novas)} OS importadas e sincronizadas!")
+                    else:
+                        st.success(f"{len(novas)} OS importadas (salvas localmente)")
     
     with col2:
         st.subheader("Ordens de Serviço Ativas")
@@ -399,15 +1097,26 @@ if opcao == "Gerenciar Ordens de Serviço":
                             mask_os = st.session_state.df_os['numero_os'] == os_row['numero_os']
                             st.session_state.df_os.loc[mask_os, 'status_os'] = 'finalizada'
                             
-                            # Finaliza todos os processos da OS
+                            # Finaliza todos os processos da OS pelo motor (o trecho em andamento é somado)
                             mask_tempos = st.session_state.df_tempos['numero_os'] == os_row['numero_os']
-                            st.session_state.df_tempos.loc[mask_tempos, 'status'] = 'finalizado'
+                            lote_tempos.aplicar_em_lote(st.session_state.df_tempos, mask_tempos, 'finalizar')
+                            amostras = tempos_padrao.amostras_por_peca(
+                                st.session_state.df_tempos[mask_tempos], st.session_state.df_os[mask_os],
+                                st.session_state.df_produtos)
                             
-                            # Salva no GitHub
-                            salvar_os_github(st.session_state.df_os, st.session_state.sha_os)
-                            salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+                            # Move a OS para o arquivo morto (já salva no GitHub); se falhar, salva normalmente
+                            salvo = bool(arquivar_os_finalizadas())
+                            if not salvo:
+                                os_salvas = salvar_os_github(st.session_state.df_os, st.session_state.sha_os)
+                                tempos_salvos = salvar_tempos_github(st.session_state.df_tempos, st.session_state.sha_tempos)
+                                salvo = os_salvas and tempos_salvos
                             
-                            st.success(f"OS {int(os_row['numero_os'])} finalizada com sucesso")
+                            # Tempos da OS entram nos tempos padrão (compartilhados) só depois de gravados
+                            if salvo:
+                                estimador_tempos().atualizar(amostras)
+                                st.success(f"OS {int(os_row['numero_os'])} finalizada com sucesso")
+                            else:
+                                st.warning(f"⚠️ OS {int(os_row['numero_os'])} finalizada só nesta sessão - não foi possível salvar no GitHub")
                             st.rerun()
                     
                     st.divider()
@@ -430,23 +1139,42 @@ elif opcao == "Controle de Tempos":
             
             st.subheader(f"Processos da {os_selecionada_str}")
             
+            # Operações em lote nesta OS: todas as mudanças numa única gravação
+            processos_os = processos_da_os(os_selecionada)
+            with st.expander("Operações em lote"):
+                selecionados = st.multiselect("Processos:", processos_os, format_func=CATALOGO.nome,
+                                              key=f"lote_{os_selecionada}")
+                col_lote1, col_lote2 = st.columns(2)
+                with col_lote1:
+                    if st.button("Iniciar selecionados", key=f"lote_iniciar_{os_selecionada}", disabled=not selecionados):
+                        iniciar_processos(os_selecionada, selecionados)
+                        st.rerun()
+                with col_lote2:
+                    if st.button("Pausar todos desta OS", key=f"lote_pausar_{os_selecionada}"):
+                        pausar_processos([os_selecionada])
+                        st.rerun()
+            
+            # Tempos de todos os processos da OS num único cálculo vetorizado
+            tempos_os = carregar_tempos_os(os_selecionada)
+            segundos_os = tempos_os.tempos_atuais()
+            
             # Auto-refresh a cada 1 segundo
             placeholder = st.empty()
             
             with placeholder.container():
                 # Criar grid de processos
-                for i in range(0, len(PROCESSOS), 2):
+                for i in range(0, len(processos_os), 2):
                     col1, col2 = st.columns(2)
                     
                     # Processo 1
                     with col1:
-                        if i < len(PROCESSOS):
-                            processo = PROCESSOS[i]
-                            tempo_atual, status = get_tempo_atual_processo(os_selecionada, processo)
+                        if i < len(processos_os):
+                            processo = processos_os[i]
+                            tempo_atual, status = tempos_os.tempo_atual(os_selecionada, processo, segundos_os)
                             
                             # Card do processo
                             with st.container():
-                                st.markdown(f"### {processo}")
+                                st.markdown(f"### {CATALOGO.nome(processo)}")
                                 st.markdown(f"**Tempo:** `{formatar_tempo(tempo_atual)}`")
                                 st.markdown(f"**Status:** {status.replace('_', ' ').title()}")
                                 
@@ -472,13 +1200,13 @@ elif opcao == "Controle de Tempos":
                     
                     # Processo 2
                     with col2:
-                        if i + 1 < len(PROCESSOS):
-                            processo = PROCESSOS[i + 1]
-                            tempo_atual, status = get_tempo_atual_processo(os_selecionada, processo)
+                        if i + 1 < len(processos_os):
+                            processo = processos_os[i + 1]
+                            tempo_atual, status = tempos_os.tempo_atual(os_selecionada, processo, segundos_os)
                             
                             # Card do processo
                             with st.container():
-                                st.markdown(f"### {processo}")
+                                st.markdown(f"### {CATALOGO.nome(processo)}")
                                 st.markdown(f"**Tempo:** `{formatar_tempo(tempo_atual)}`")
                                 st.markdown(f"**Status:** {status.replace('_', ' ').title()}")
                                 
@@ -503,6 +1231,7 @@ elif opcao == "Controle de Tempos":
                                         st.rerun()
             
             # Auto-refresh
+            METRICAS.registrar(f"pagina: {opcao}", time.perf_counter() - inicio_pagina)
             time.sleep(1)
             st.rerun()
         
@@ -512,20 +1241,238 @@ elif opcao == "Controle de Tempos":
     else:
         st.warning("Nenhuma OS cadastrada. Vá para 'Gerenciar Ordens de Serviço' para criar uma.")
 
+elif opcao == "Leitor de Código":
+    st.header("Leitor de Código")
+    st.caption("Leia a etiqueta no formato OS|processo|ação (ação: I = iniciar, P = pausar, F = finalizar)")
+    
+    # Formulário: o Enter enviado pelo leitor aplica o código numa única execução, sem st.rerun
+    with st.form("leitura_codigo", clear_on_submit=True):
+        codigo_lido = st.text_input("Código:")
+        enviado = st.form_submit_button("Aplicar", type="primary")
+    
+    if enviado and codigo_lido.strip():
+        acoes = {'iniciar': iniciar_processo, 'pausar': pausar_processo, 'finalizar': parar_processo}
+        try:
+            numero_os, processo, acao = leitor_codigos.interpretar_codigo(codigo_lido, CATALOGO)
+            df_os = st.session_state.df_os
+            if not ((df_os['numero_os'] == numero_os) & (df_os['status_os'] == 'ativa')).any():
+                raise ValueError(f"OS {numero_os} não está ativa")
+            if processo not in processos_da_os(numero_os):
+                raise ValueError(f"{CATALOGO.nome(processo)} não faz parte do roteiro da OS {numero_os}")
+            with METRICAS.medir("leitor: aplicar código"):
+                alterou = acoes[acao](numero_os, processo)
+        except ValueError as e:
+            st.error(f"❌ {codigo_lido}: {e}")
+            resultado = f"erro: {e}"
+        else:
+            _, registro = _registro_tempo(numero_os, processo)
+            tempo = motor_tempos.tempo_atual(registro) if registro else 0
+            if alterou:
+                st.success(f"✅ OS {numero_os} - {CATALOGO.nome(processo)}: "
+                           f"{leitor_codigos.STATUS_DA_ACAO[acao].replace('_', ' ')} ({formatar_tempo(tempo)})")
+                resultado = leitor_codigos.STATUS_DA_ACAO[acao]
+            else:
+                st.warning(f"⚠️ OS {numero_os} - {CATALOGO.nome(processo)}: nada a {acao} "
+                           f"(status atual: {registro.status.replace('_', ' ') if registro else 'não iniciado'})")
+                resultado = "sem alteração"
+        
+        st.session_state.setdefault('leituras', []).insert(0, {
+            'Hora': datetime.now().strftime('%H:%M:%S'), 'Código': codigo_lido.strip(), 'Resultado': resultado})
+        del st.session_state.leituras[20:]
+    
+    if st.session_state.get('leituras'):
+        st.dataframe(pd.DataFrame(st.session_state.leituras), hide_index=True, use_container_width=True)
+    
+    with st.expander("Códigos dos processos"):
+        st.dataframe(pd.DataFrame({'Código': CATALOGO.codigos, 'Processo': list(CATALOGO.nomes.values())}),
+                     hide_index=True, use_container_width=True)
+
+elif opcao == "Painel Geral":
+    st.header("Painel Geral - Processos em Andamento")
+    
+    # Processos em andamento/pausados de todas as OS ativas
+    df_os_ativas = st.session_state.df_os[st.session_state.df_os['status_os'] == 'ativa']
+    df_painel = st.session_state.df_tempos
+    df_painel = df_painel[
+        df_painel['status'].isin([motor_tempos.EM_ANDAMENTO, motor_tempos.PAUSADO]) &
+        df_painel['numero_os'].isin(df_os_ativas['numero_os'])
+    ].reset_index(drop=True)
+    
+    if df_painel.empty:
+        st.info("Nenhum processo em andamento ou pausado.")
+    else:
+        # Tempo de todos os cronômetros num único cálculo vetorizado
+        segundos = lote_tempos.tempos_em_arrays(df_painel).tempos_atuais()
+        produtos = dict(zip(df_os_ativas['numero_os'], df_os_ativas['produto']))
+        
+        quadro = pd.DataFrame({
+            'processo': df_painel['processo'],
+            'OS': df_painel['numero_os'].astype(int),
+            'Produto': df_painel['numero_os'].map(produtos),
+            'Status': df_painel['status'].str.replace('_', ' ').str.title(),
+            'Tempo': [formatar_tempo(valor) for valor in segundos],
+            'segundos': segundos,
+        })
+        rodando = df_painel['status'] == motor_tempos.EM_ANDAMENTO
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Em andamento", int(rodando.sum()))
+        col2.metric("Pausados", int((~rodando).sum()))
+        col3.metric("OS com processos abertos", df_painel['numero_os'].nunique())
+        
+        # Fim de turno / almoço: pausa tudo numa única gravação (fora do modo quiosque)
+        if not modo_quiosque and rodando.any():
+            if st.button("⏸️ Pausar todos os cronômetros", type="primary"):
+                pausados = pausar_processos()
+                st.success(f"{pausados} cronômetros pausados")
+                st.rerun()
+        
+        # Um bloco por estação, na ordem do catálogo de processos
+        estacoes = [p for p in CATALOGO.codigos if p in set(quadro['processo'])]
+        estacoes += sorted(set(quadro['processo']) - set(estacoes))
+        for i in range(0, len(estacoes), 3):
+            colunas = st.columns(3)
+            for coluna, estacao in zip(colunas, estacoes[i:i + 3]):
+                with coluna:
+                    grupo = quadro[quadro['processo'] == estacao].sort_values(['Status', 'segundos'], ascending=[True, False])
+                    st.subheader(CATALOGO.nome(estacao))
+                    st.caption(f"{(grupo['Status'] == 'Em Andamento').sum()} em andamento · {len(grupo)} abertos")
+                    st.dataframe(grupo[['OS', 'Produto', 'Status', 'Tempo']], hide_index=True, use_container_width=True)
+    
+    # Auto-refresh
+    METRICAS.registrar(f"pagina: {opcao}", time.perf_counter() - inicio_pagina)
+    time.sleep(1)
+    st.rerun()
+
+elif opcao == "Previsão de Carga":
+    st.header("Previsão de Carga por Estação")
+    
+    col1, col2 = st.columns(2)
+    horas_turno = col1.number_input("Horas por turno:", min_value=1.0, max_value=24.0, step=0.5,
+                                    value=previsao_carga.HORAS_TURNO)
+    turnos = col2.slider("Turnos exibidos:", 1, 30, previsao_carga.TURNOS_EXIBIDOS)
+    
+    # Recalculada a cada execução: OS nova ou cronômetro alterado já entram na fila
+    trabalho = previsao_carga.trabalho_restante(
+        st.session_state.df_os, st.session_state.df_tempos, estimador_tempos(), st.session_state.df_produtos)
+    
+    if trabalho.empty:
+        st.info("Nenhuma OS ativa.")
+    else:
+        resumo, carga, ordens = previsao_carga.projetar_filas(trabalho, horas_turno, turnos)
+        gargalo = resumo.loc[resumo['turnos'].idxmax()]
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("OS ativas", len(ordens))
+        col2.metric("Trabalho restante", formatar_tempo(resumo['restante_horas'].sum() * 3600))
+        col3.metric("Gargalo", gargalo['estacao'], f"{gargalo['turnos']:.1f} turnos", delta_color="off")
+        
+        st.subheader("Fila por Estação")
+        st.dataframe(pd.DataFrame({
+            'Estação': resumo['estacao'],
+            'OS na Fila': resumo['os_na_fila'],
+            'Restante': (resumo['restante_horas'] * 3600).map(formatar_tempo),
+            'Turnos para Zerar': resumo['turnos'].round(1),
+            'Sem Tempo Padrão': resumo['sem_tempo_padrao'],
+        }), hide_index=True, use_container_width=True)
+        
+        st.subheader("Carga nos Próximos Turnos (horas)")
+        grafico = carga.T.set_axis(range(1, turnos + 1)).rename_axis("Turno")
+        st.bar_chart(grafico)
+        
+        st.subheader("Término Previsto das OS")
+        termino = np.ceil(ordens['termino_turnos']).astype(int)
+        st.dataframe(pd.DataFrame({
+            'OS': ordens['numero_os'],
+            'Produto': ordens['produto'],
+            'Quantidade': ordens['quantidade'],
+            'Restante': ordens['restante_segundos'].map(formatar_tempo),
+            'Término': termino.map(lambda t: f"Turno {t}" if t > 0 else "-")
+                       + np.where(ordens['processos_sem_padrao'] > 0, " *", ""),
+        }), hide_index=True, use_container_width=True)
+        st.caption("Fila de cada estação na ordem de cadastro das OS, com o tempo padrão por peça do histórico "
+                   "menos o tempo já apontado. * processos sem histórico não entram na previsão.")
+
+elif opcao == "Linha do Tempo":
+    st.header("Linha do Tempo de Execução")
+    
+    col1, col2, col3 = st.columns([2, 1, 3])
+    hoje = datetime.now().date()
+    periodo = col1.date_input("Período:", value=(hoje, hoje), max_value=hoje, format="DD/MM/YYYY")
+    visao = col2.radio("Uma linha por:", ["OS", "Estação"], horizontal=True)
+    filtro_os = col3.multiselect("OS:", sorted(st.session_state.df_os['numero_os'].dropna().unique()),
+                                 placeholder="Todas")
+    
+    # Janela em hora local, do início do primeiro dia ao fim do último
+    periodo = periodo if isinstance(periodo, (list, tuple)) else (periodo,)
+    de = int(datetime.combine(periodo[0], datetime.min.time()).timestamp() * 1000)
+    ate = int(datetime.combine(periodo[-1] + timedelta(days=1), datetime.min.time()).timestamp() * 1000)
+    
+    trechos = consultar_intervalos(de, ate)
+    if filtro_os:
+        trechos = trechos[trechos['numero_os'].isin(filtro_os)]
+    
+    if trechos.empty:
+        st.info("Nenhum trecho apontado no período.")
+    else:
+        # Trechos recortados à janela; separados por menos de um pixel viram uma barra só
+        trechos = trechos.assign(inicio=trechos['inicio'].clip(lower=de), fim=trechos['fim'].clip(upper=ate))
+        trechos = trechos.assign(duracao_segundos=motor_tempos.decorrido_em_lote(trechos['inicio'].to_numpy(),
+                                                                                  trechos['fim'].to_numpy()))
+        barras = intervalos.agrupar_para_exibicao(trechos, (ate - de) / 1200)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Trechos", len(trechos))
+        col2.metric("Tempo apontado", formatar_tempo(trechos['duracao_segundos'].sum()))
+        col3.metric("OS", trechos['numero_os'].nunique())
+        col4.metric("Estações", trechos['processo'].nunique())
+        
+        # Eixo em UTC deslocado para a hora local do servidor (mesma hora das demais páginas)
+        deslocamento = int(datetime.now().astimezone().utcoffset().total_seconds() * 1000)
+        grafico = pd.DataFrame({
+            'OS': "OS " + barras['numero_os'].astype(str),
+            'Estação': barras['processo'].map(CATALOGO.nome),
+            'Início': barras['inicio'] + deslocamento,
+            'Fim': barras['fim'] + deslocamento,
+            'De': barras['inicio'].map(lambda ms: motor_tempos.formatar_data(ms, '%d/%m %H:%M')),
+            'Até': barras['fim'].map(lambda ms: motor_tempos.formatar_data(ms, '%d/%m %H:%M')),
+            'Duração': barras['duracao_segundos'].map(formatar_tempo),
+            'Trechos': barras['trechos'],
+        })
+        linha, cor = ("OS", "Estação") if visao == "OS" else ("Estação", "OS")
+        ordem = sorted(grafico[linha].unique(), key=lambda v: int(v[3:]) if linha == "OS" else v)
+        legenda = alt.Legend() if grafico[cor].nunique() <= 20 else None
+        
+        st.altair_chart(alt.Chart(grafico).mark_bar().encode(
+            x=alt.X('Início:T', title=None, scale=alt.Scale(type='utc', domain=[de + deslocamento, ate + deslocamento]),
+                    axis=alt.Axis(format='%d/%m %H:%M')),
+            x2='Fim:T',
+            y=alt.Y(f'{linha}:N', title=None, sort=ordem),
+            color=alt.Color(f'{cor}:N', legend=legenda),
+            tooltip=['OS', 'Estação', 'De', 'Até', 'Duração', 'Trechos'],
+        ).properties(height=max(200, 24 * len(ordem))), use_container_width=True)
+        st.caption("Trechos de um mesmo processo separados por menos de um pixel aparecem numa única barra "
+                   "(Trechos no tooltip). Cronômetros em andamento vão até agora.")
+
 elif opcao == "Relatórios":
     st.header("Relatórios de Tempos")
     
-    if not st.session_state.df_tempos.empty:
+    # OS finalizadas ficam no arquivo morto, carregado apenas nesta página
+    df_os_rel = juntar_com_arquivo_morto(st.session_state.df_os, carregar_arquivo_morto(ARQUIVO_MORTO_OS), CHAVES_OS)
+    df_tempos_rel = juntar_com_arquivo_morto(
+        st.session_state.df_tempos, carregar_arquivo_morto(ARQUIVO_MORTO_TEMPOS), CHAVES_TEMPOS)
+    
+    if not df_tempos_rel.empty:
         # Resumo por OS
         st.subheader("Resumo por Ordem de Serviço")
         
         resumo_os = []
-        for numero_os in st.session_state.df_tempos['numero_os'].unique():
-            tempos_os = st.session_state.df_tempos[st.session_state.df_tempos['numero_os'] == numero_os]
+        for numero_os in df_tempos_rel['numero_os'].unique():
+            tempos_os = df_tempos_rel[df_tempos_rel['numero_os'] == numero_os]
             tempo_total = tempos_os['tempo_total_segundos'].sum()
             
             # Buscar info da OS
-            os_info = st.session_state.df_os[st.session_state.df_os['numero_os'] == numero_os]
+            os_info = df_os_rel[df_os_rel['numero_os'] == numero_os]
             if not os_info.empty:
                 produto = os_info['produto'].iloc[0]
                 quantidade = os_info['quantidade'].iloc[0]
@@ -546,27 +1493,48 @@ elif opcao == "Relatórios":
         
         df_resumo = pd.DataFrame(resumo_os)
         st.dataframe(df_resumo, use_container_width=True)
-        
+
+        # Agrupado por um atributo do produto (junção com a dimensão de produtos pelo produto_id)
+        st.subheader("Resumo por Produto")
+        atributo = st.selectbox("Agrupar por:", ATRIBUTOS, index=ATRIBUTOS.index('formato'),
+                                format_func=lambda a: a.upper() if a == 'sku' else a.capitalize())
+        tempos_por_os = df_tempos_rel.groupby('numero_os')['tempo_total_segundos'].sum()
+        df_produtos_os = anexar_produtos(df_os_rel.drop_duplicates(subset=CHAVES_OS), st.session_state.df_produtos)
+        df_produtos_os = df_produtos_os.join(tempos_por_os, on='numero_os', how='inner')
+        if not df_produtos_os.empty:
+            grupos = df_produtos_os.assign(grupo=df_produtos_os[atributo].fillna('(não informado)')).groupby('grupo').agg(
+                os=('numero_os', 'size'), pecas=('quantidade', 'sum'), tempo=('tempo_total_segundos', 'sum'))
+            pecas = grupos['pecas'].where(grupos['pecas'] > 0)
+            st.dataframe(pd.DataFrame({
+                atributo.upper() if atributo == 'sku' else atributo.capitalize(): grupos.index,
+                'OS': grupos['os'].values,
+                'Peças': grupos['pecas'].values,
+                'Tempo Total': grupos['tempo'].map(formatar_tempo).values,
+                'Tempo por Peça': (grupos['tempo'] / pecas).fillna(0).map(formatar_tempo).values,
+            }), use_container_width=True, hide_index=True)
+
         # Detalhes por processo
         st.subheader("Detalhes por Processo")
         
         os_selecionada_rel = st.selectbox(
             "Selecione uma OS para ver detalhes:",
-            st.session_state.df_tempos['numero_os'].unique()
+            df_tempos_rel['numero_os'].unique()
         )
         
         if os_selecionada_rel:
-            detalhes = st.session_state.df_tempos[
-                st.session_state.df_tempos['numero_os'] == os_selecionada_rel
+            detalhes = df_tempos_rel[
+                df_tempos_rel['numero_os'] == os_selecionada_rel
             ].copy()
             
             if not detalhes.empty:
                 # Buscar quantidade da OS para calcular tempo por peça
-                os_info = st.session_state.df_os[st.session_state.df_os['numero_os'] == os_selecionada_rel]
+                os_info = df_os_rel[df_os_rel['numero_os'] == os_selecionada_rel]
                 quantidade = os_info['quantidade'].iloc[0] if not os_info.empty else 1
                 
                 # Formatar tempo para exibição
                 detalhes['Tempo Formatado'] = detalhes['tempo_total_segundos'].apply(formatar_tempo)
+                detalhes['data_atualizacao'] = detalhes['data_atualizacao'].map(motor_tempos.formatar_data)
+                detalhes['processo'] = detalhes['processo'].map(CATALOGO.nome)
                 detalhes['Tempo por Peça'] = detalhes['tempo_total_segundos'].apply(
                     lambda x: formatar_tempo(x / quantidade if quantidade > 0 else 0)
                 )
@@ -586,7 +1554,7 @@ elif opcao == "Relatórios":
     else:
         st.info("Nenhum tempo registrado ainda.")
 
-elif opcao == "🔧 Debug GitHub":
+elif opcao == "Configurações Avançadas":
     st.header("🔧 Diagnóstico GitHub API")
     
     col1, col2 = st.columns(2)
@@ -604,6 +1572,19 @@ elif opcao == "🔧 Debug GitHub":
         st.markdown(f"**Dados locais:**")
         st.write(f"📋 OS: {len(st.session_state.df_os)} registros")
         st.write(f"Tempos registrados: {len(st.session_state.df_tempos)} registros")
+        st.write(f"Commits evitados (conteúdo sem alteração): {st.session_state.get('commits_evitados', 0)}")
+        st.write(f"Conflitos de mesclagem (vence a alteração mais recente): "
+                 f"{st.session_state.get('conflitos_mesclagem', 0)}")
+        
+        # OS finalizadas ainda no conjunto de trabalho (ex.: dados anteriores ao arquivo morto)
+        qtd_finalizadas = int((st.session_state.df_os['status_os'] == 'finalizada').sum())
+        if st.button(f"🗄️ Arquivar OS finalizadas ({qtd_finalizadas})", disabled=(qtd_finalizadas == 0)):
+            arquivadas = arquivar_os_finalizadas()
+            if arquivadas:
+                st.success(f"{arquivadas} OS movidas para o arquivo morto")
+                st.rerun()
+            else:
+                st.error("ERRO: Não foi possível gravar o arquivo morto")
     
     with col2:
         st.subheader("🧪 Teste Completo")
@@ -787,6 +1768,68 @@ elif opcao == "🔧 Debug GitHub":
                     else:
                         st.error("❌ Problema no fluxo de OS")
     
+    # Métricas de desempenho (compartilhadas por todas as sessões deste servidor)
+    st.subheader("⏱️ Métricas de Desempenho")
+    resumo_metricas = METRICAS.resumo()
+    if resumo_metricas:
+        st.dataframe(pd.DataFrame(resumo_metricas), use_container_width=True)
+    else:
+        st.info("Nenhuma medição registrada ainda.")
+    
+    col_m1, col_m2, col_m3 = st.columns(3)
+    with col_m1:
+        if st.button("💾 Exportar JSON", disabled=not resumo_metricas):
+            METRICAS.exportar_json("metricas_desempenho.json")
+            st.success("Salvo em metricas_desempenho.json")
+    with col_m2:
+        if st.button("💾 Exportar CSV", disabled=not resumo_metricas):
+            METRICAS.exportar_csv("metricas_desempenho.csv")
+            st.success("Salvo em metricas_desempenho.csv")
+    with col_m3:
+        if st.button("🗑️ Zerar métricas"):
+            METRICAS.zerar()
+            st.rerun()
+    
+    # Perfil (cProfile) das próximas execuções desta sessão
+    st.subheader("🔬 Perfil de Execução")
+    col_p1, col_p2 = st.columns([1, 2])
+    with col_p1:
+        execucoes_perfil = st.number_input("Execuções a perfilar:", min_value=1, max_value=50, value=5, step=1)
+        if st.button("▶️ Ativar perfil", disabled=not perfilador.disponivel(st.session_state)):
+            perfilador.ativar(st.session_state, execucoes_perfil)
+            st.rerun()
+        if not perfilador.PERFIL_POR_SESSAO:
+            st.caption("Indisponível no Python 3.12+: o cProfile perfilaria todas as sessões do processo")
+        elif not perfilador.disponivel(st.session_state):
+            st.caption("Disponível com `streamlit run app_perfilado.py`")
+        restantes = st.session_state.get('perfil_restantes', 0)
+        if restantes or 'perfil_ativo' in st.session_state:
+            st.info(f"Perfil ativo - faltam {restantes} execução(ões) após esta")
+    
+    with col_p2:
+        perfis = perfilador.listar_perfis()
+        if perfis:
+            perfil_escolhido = st.selectbox("Dump:", perfis, format_func=os.path.basename)
+            st.dataframe(pd.DataFrame(perfilador.resumo_perfil(perfil_escolhido)), use_container_width=True)
+            with open(perfil_escolhido, "rb") as f:
+                st.download_button("📥 Baixar .prof", f.read(), file_name=os.path.basename(perfil_escolhido))
+        else:
+            st.info("Nenhum perfil gravado. Ative acima ou abra a página com ?perfil=N.")
+    
+    # Pausas automáticas de cronômetros esquecidos
+    st.subheader("⏰ Pausa Automática")
+    st.write(f"Fim de turno: **{PAUSA_FIM_TURNO or 'desativado'}** · "
+             f"Duração máxima: **{f'{PAUSA_DURACAO_MAXIMA_HORAS:g} h' if PAUSA_DURACAO_MAXIMA_HORAS > 0 else 'desativada'}**")
+    auditoria_pausas = carregar_auditoria_pausas()
+    if not auditoria_pausas.empty:
+        auditoria_pausas = auditoria_pausas.head(100)
+        for coluna in ('executado_em', 'inicio_atual', 'pausado_em'):
+            auditoria_pausas[coluna] = auditoria_pausas[coluna].map(motor_tempos.formatar_data)
+        auditoria_pausas['processo'] = auditoria_pausas['processo'].map(CATALOGO.nome)
+        st.dataframe(auditoria_pausas, hide_index=True, use_container_width=True)
+    else:
+        st.info("Nenhuma pausa automática registrada.")
+    
     # Logs em tempo real
     st.subheader("📋 Arquivos no GitHub")
     if st.button("🔍 Listar Arquivos"):
@@ -796,6 +1839,8 @@ elif opcao == "🔧 Debug GitHub":
                 if file['name'].endswith('.csv'):
                     st.write(f"📄 {file['name']} - {file['size']} bytes")
 
+METRICAS.registrar(f"pagina: {opcao}", time.perf_counter() - inicio_pagina)
+
 # Rodapé
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Sistema de Produção**")
@@ -0,0 +1,28 @@
+"""Executa o app_github.py com perfil (cProfile) sob demanda, por sessão.
+
+Cada execução do script roda dentro de perfilador.execucao, que encerra o perfil
+ao fim da mesma execução (também em st.rerun/st.stop), sem mexer no corpo do app.
+
+Uso:
+    streamlit run app_perfilado.py
+    (abra com ?perfil=N ou use "Perfil de Execução" em Configurações Avançadas)
+"""
+import os
+import runpy
+
+import streamlit as st
+
+import perfilador
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_github.py")
+
+# Perfil sob demanda desta sessão: ?perfil=N perfila as próximas N execuções
+if "perfil" in st.query_params:
+    try:
+        perfilador.ativar(st.session_state, st.query_params["perfil"])
+    except ValueError:
+        pass
+    del st.query_params["perfil"]
+
+with perfilador.execucao(st.session_state):
+    runpy.run_path(APP, run_name="__main__")
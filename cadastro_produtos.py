@@ -0,0 +1,131 @@
+import io
+import re
+import zlib
+
+import pandas as pd
+
+# Dimensão de produtos: o texto livre do produto da OS ("0752 - REVISTA PLANEJAMENTO DOCE FLORADA 19X25")
+# separado em SKU, linha, design e formato, numa tabela pequena indexada por produto_id.
+# O id vem do texto normalizado (CRC32), então qualquer sessão ou script chega ao mesmo id
+# sem consultar a tabela, e duas sessões cadastrando o mesmo produto nunca conflitam.
+# Dois textos diferentes com o mesmo CRC32 são recusados no cadastro (registrar_produtos)
+ARQUIVO_PRODUTOS = "produtos.csv"
+COLUNAS_PRODUTOS = ['produto_id', 'sku', 'linha', 'design', 'formato', 'produto']
+ATRIBUTOS = ['sku', 'linha', 'design', 'formato']
+
+# Linhas com mais de uma palavra; nas demais a linha é a primeira palavra da descrição
+LINHAS = ("REVISTA PLANEJAMENTO", "MEU PEQUENO CICERO")
+
+# "<SKU> - <descrição> <formato>", todas as partes opcionais
+_PADRAO = (r'^(?:(?P<sku>\d+)(?:\s*-\s*|$))?(?P<descricao>.*?)\s*'
+           r'(?P<formato>\d+(?:[.,]\d+)?\s*X\s*\d+(?:[.,]\d+)?)?$')
+_PADRAO_LINHA = r'^(?P<linha>' + '|'.join(re.escape(l) for l in sorted(LINHAS, key=len, reverse=True)) + \
+                r'|\S+)\s*(?P<design>.*)$'
+
+
+def normalizar_produto(produtos):
+    """Texto do produto em maiúsculas, sem espaços sobrando ("0752-REVISTA 19 x 25" = "0752 - REVISTA 19X25")"""
+    serie = pd.Series(produtos, dtype=object).fillna('').astype(str)
+    # Poucos produtos distintos entre muitas OS: normaliza cada texto uma vez
+    unicos = pd.Series(serie.unique(), dtype=object)
+    texto = unicos.str.upper().str.split().str.join(' ')
+    texto = texto.str.replace(r'^(\d+)\s*-\s*', r'\1 - ', regex=True)
+    texto = texto.str.replace(r'(\d)\s*X\s*(\d)', r'\1X\2', regex=True)
+    return serie.map(dict(zip(unicos, texto)))
+
+
+def ids_produtos(produtos):
+    """produto_id (int64) de cada texto de produto, no mesmo índice"""
+    normalizados = normalizar_produto(produtos)
+    ids = {texto: zlib.crc32(texto.encode('utf-8')) & 0x7FFFFFFF for texto in normalizados.unique()}
+    return normalizados.map(ids).astype('int64')
+
+
+def interpretar_produtos(produtos):
+    """Linhas da dimensão (indexadas por produto_id) para os produtos distintos informados"""
+    normalizados = normalizar_produto(produtos).drop_duplicates().reset_index(drop=True)
+    partes = normalizados.str.extract(_PADRAO)
+    linha_design = partes['descricao'].fillna('').str.extract(_PADRAO_LINHA)
+    df = pd.DataFrame({
+        'produto_id': ids_produtos(normalizados),
+        'sku': partes['sku'],
+        'linha': linha_design['linha'],
+        'design': linha_design['design'].replace('', None),
+        'formato': partes['formato'].str.replace(' ', '', regex=False).str.replace(',', '.', regex=False),
+        'produto': normalizados,
+    })
+    return df.set_index('produto_id')
+
+
+def tabela_vazia():
+    return pd.DataFrame(columns=COLUNAS_PRODUTOS).astype({'produto_id': 'int64'}).set_index('produto_id')
+
+
+def ler_produtos(conteudo):
+    """Dimensão a partir do CSV (bytes ou texto); vazia se não houver arquivo"""
+    if not conteudo:
+        return tabela_vazia()
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+    df = pd.read_csv(io.BytesIO(conteudo), dtype={'sku': str})
+    return df.astype({'produto_id': 'int64'}).set_index('produto_id')[COLUNAS_PRODUTOS[1:]]
+
+
+def produtos_para_csv(dimensao):
+    return dimensao.sort_index().rename_axis('produto_id').reset_index()[COLUNAS_PRODUTOS].to_csv(index=False)
+
+
+def com_produto_id(df_os):
+    """OS com a coluna produto_id preenchida (arquivos antigos não têm a coluna)"""
+    if 'produto' not in df_os.columns:
+        return df_os
+    if 'produto_id' in df_os.columns and df_os['produto_id'].notna().all():
+        return df_os
+    return df_os.assign(produto_id=ids_produtos(df_os['produto']))
+
+
+def conferir_colisoes(dimensao, produtos):
+    """ValueError se textos de produto diferentes (já cadastrados ou não) caem no mesmo produto_id"""
+    normalizados = normalizar_produto(produtos).drop_duplicates()
+    pares = pd.DataFrame({'produto_id': ids_produtos(normalizados).to_numpy(), 'produto': normalizados.to_numpy()})
+    cadastrados = dimensao['produto'].rename_axis('produto_id').reset_index()
+    todos = pd.concat([df for df in (cadastrados, pares) if not df.empty]).drop_duplicates()
+    repetidos = todos[todos['produto_id'].duplicated(keep=False)]
+    if not repetidos.empty:
+        produto_id, textos = next(iter(repetidos.groupby('produto_id')['produto']))
+        raise ValueError(f"Produtos diferentes com o mesmo produto_id {produto_id}: "
+                         f"{', '.join(repr(texto) for texto in textos)} - altere o texto de um deles")
+
+
+def registrar_produtos(dimensao, produtos):
+    """Acrescenta à dimensão os produtos ainda não cadastrados; retorna (dimensão, quantos novos)
+
+    ValueError se o id de um produto colidir com o de outro texto (conferir_colisoes).
+    """
+    produtos = pd.Series(produtos, dtype=object)
+    conferir_colisoes(dimensao, produtos)
+    novos = produtos[~ids_produtos(produtos).isin(dimensao.index)]
+    if novos.empty:
+        return dimensao, 0
+    linhas = interpretar_produtos(novos)
+    partes = [df for df in (dimensao, linhas) if not df.empty]
+    return pd.concat(partes), len(linhas)
+
+
+def anexar_produtos(df, dimensao):
+    """Junta sku, linha, design e formato às linhas de df pelo produto_id (lê o produto se faltar na dimensão)"""
+    df = com_produto_id(df)
+    dimensao, _ = registrar_produtos(dimensao, df.loc[~df['produto_id'].isin(dimensao.index), 'produto'])
+    return df.join(dimensao[ATRIBUTOS], on='produto_id')
+
+
+def sincronizar_produtos(armazem, produtos, mensagem):
+    """Cadastra os produtos no CSV da dimensão de um armazém (ClienteGitHub ou ArquivosLocais)"""
+    for tentativa in range(3):
+        conteudo, sha = armazem.ler(ARQUIVO_PRODUTOS)
+        dimensao, novos = registrar_produtos(ler_produtos(conteudo), produtos)
+        if not novos:
+            return 0
+        if armazem.gravar(ARQUIVO_PRODUTOS, produtos_para_csv(dimensao), sha, mensagem):
+            return novos
+    raise RuntimeError(f"Não foi possível gravar {ARQUIVO_PRODUTOS} (conflito de versão)")
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Calendário de turnos: janelas de trabalho (turnos menos intervalos, nos dias úteis que
+# não são feriados), na hora do fuso da fábrica (não do servidor). Os limites das janelas ficam em arrays ordenados com
+# o tempo de trabalho acumulado até cada uma; o tempo trabalhado entre dois instantes sai
+# de duas buscas binárias. Sem o arquivo, o tempo decorrido continua sendo o do relógio
+ARQUIVO_CALENDARIO = os.environ.get("CALENDARIO_TURNOS") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "calendario_turnos.json")
+# Folga (dias) ao montar as janelas em volta dos instantes consultados
+DIAS_FOLGA = 31
+# Fuso dos horários do arquivo quando ele não traz "fuso"
+FUSO_PADRAO = "America/Sao_Paulo"
+
+
+def ler_faixa(texto):
+    """"07:00-12:00" -> (minuto inicial, minuto final) do dia; fim antes do início passa da meia-noite"""
+    inicio, fim = (datetime.strptime(parte.strip(), "%H:%M") for parte in texto.split("-"))
+    inicio, fim = inicio.hour * 60 + inicio.minute, fim.hour * 60 + fim.minute
+    return inicio, fim if fim > inicio else fim + 24 * 60
+
+
+def _unir(faixas):
+    """Faixas (início, fim) ordenadas e sem sobreposição"""
+    unidas = []
+    for inicio, fim in sorted(faixas):
+        if unidas and inicio <= unidas[-1][1]:
+            unidas[-1][1] = max(unidas[-1][1], fim)
+        else:
+            unidas.append([inicio, fim])
+    return unidas
+
+
+def _subtrair(janelas, pausas):
+    """Janelas menos as pausas (ambas ordenadas e sem sobreposição)"""
+    resultado = []
+    k = 0
+    for inicio, fim in janelas:
+        while k < len(pausas) and pausas[k][1] <= inicio:
+            k += 1
+        j = k
+        while j < len(pausas) and pausas[j][0] < fim:
+            if pausas[j][0] > inicio:
+                resultado.append((inicio, pausas[j][0]))
+            inicio = max(inicio, pausas[j][1])
+            j += 1
+        if inicio < fim:
+            resultado.append((inicio, fim))
+    return resultado
+
+
+class CalendarioTurnos:
+    """Janelas de trabalho em epoch ms, montadas sob demanda para os dias consultados"""
+
+    def __init__(self, turnos, intervalos=(), dias_uteis=(0, 1, 2, 3, 4), feriados=(), fuso=FUSO_PADRAO):
+        self.fuso = ZoneInfo(fuso)
+        self.turnos = [ler_faixa(faixa) for faixa in turnos]
+        self.intervalos = [ler_faixa(faixa) for faixa in intervalos]
+        self.dias_uteis = {int(dia) for dia in dias_uteis}
+        self.feriados = {date.fromisoformat(dia) if isinstance(dia, str) else dia for dia in feriados}
+        self._lock = threading.Lock()
+        # (primeiro dia, último dia, inícios, fins, ms trabalhados antes de cada janela), trocado de uma vez
+        self._janelas = None
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_CALENDARIO):
+        """Calendário do arquivo JSON; None se o arquivo não existir"""
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        return cls(dados["turnos"], dados.get("intervalos", []), dados.get("dias_uteis", [0, 1, 2, 3, 4]),
+                   dados.get("feriados", []), dados.get("fuso", FUSO_PADRAO))
+
+    def dia_util(self, dia):
+        """Dia da semana útil e fora dos feriados"""
+        return dia.weekday() in self.dias_uteis and dia not in self.feriados
+
+    def _montar(self, primeiro, ultimo):
+        """Janelas de trabalho dos turnos que começam de primeiro a ultimo (datas)"""
+        janelas, pausas = [], []
+        # Um dia antes: turnos e intervalos que passam da meia-noite
+        for k in range(-1, (ultimo - primeiro).days + 1):
+            dia = primeiro + timedelta(days=k)
+            meia_noite = datetime.combine(dia, time.min, tzinfo=self.fuso)
+
+            def ms(minutos):
+                # Soma de hora de parede: 07:00 continua 07:00 nos dias de troca de horário de verão
+                return int((meia_noite + timedelta(minutes=minutos)).timestamp() * 1000)
+
+            if k >= 0 and self.dia_util(dia):
+                janelas += [(ms(inicio), ms(fim)) for inicio, fim in self.turnos]
+            pausas += [(ms(inicio), ms(fim)) for inicio, fim in self.intervalos]
+
+        faixas = _subtrair(_unir(janelas), _unir(pausas))
+        inicios = np.array([inicio for inicio, _ in faixas], dtype=np.int64)
+        fins = np.array([fim for _, fim in faixas], dtype=np.int64)
+        acumulado = np.concatenate(([0], np.cumsum(fins - inicios)[:-1])).astype(np.int64) if len(faixas) else fins
+        return primeiro, ultimo, inicios, fins, acumulado
+
+    def _cobrir(self, *instantes):
+        """Janelas que cobrem os instantes (epoch ms), remontadas só quando algum fica de fora"""
+        menor = min(int(np.min(valores)) for valores in instantes)
+        maior = max(int(np.max(valores)) for valores in instantes)
+        primeiro = datetime.fromtimestamp(menor / 1000, self.fuso).date() - timedelta(days=1)
+        ultimo = datetime.fromtimestamp(maior / 1000, self.fuso).date()
+        janelas = self._janelas
+        if janelas is not None and janelas[0] <= primeiro and ultimo <= janelas[1]:
+            return janelas
+        with self._lock:
+            if self._janelas is not None:
+                primeiro, ultimo = min(primeiro, self._janelas[0]), max(ultimo, self._janelas[1])
+            self._janelas = self._montar(primeiro - timedelta(days=DIAS_FOLGA), ultimo + timedelta(days=DIAS_FOLGA))
+            return self._janelas
+
+    @staticmethod
+    def _trabalhado(janelas, instantes):
+        """ms de trabalho do início das janelas montadas até cada instante"""
+        _, _, inicios, fins, acumulado = janelas
+        if len(inicios) == 0:
+            return np.zeros(np.shape(instantes), dtype=np.int64)
+        k = np.searchsorted(inicios, instantes, side='right') - 1
+        anterior = np.maximum(k, 0)
+        dentro = np.clip(instantes - inicios[anterior], 0, fins[anterior] - inicios[anterior])
+        return np.where(k >= 0, acumulado[anterior] + dentro, 0)
+
+    def segundos_trabalhados(self, inicio, fim):
+        """Segundos dentro das janelas de trabalho entre inicio e fim (epoch ms; escalares ou arrays)"""
+        inicio, fim = np.broadcast_arrays(np.asarray(inicio, dtype=np.int64), np.asarray(fim, dtype=np.int64))
+        if inicio.size == 0:
+            return np.zeros(inicio.shape)
+        janelas = self._cobrir(inicio, fim)
+        segundos = np.maximum(self._trabalhado(janelas, fim) - self._trabalhado(janelas, inicio), 0) / 1000
+        return float(segundos) if segundos.ndim == 0 else segundos
+
+    def instante_apos(self, inicio, segundos):
+        """Primeiro instante (epoch ms) em que se completam os segundos de trabalho a partir do início"""
+        inicio, segundos = np.broadcast_arrays(np.asarray(inicio, dtype=np.int64),
+                                               np.asarray(segundos, dtype=np.float64))
+        if inicio.size == 0:
+            return inicio.copy()
+        # Trabalho de s segundos nunca termina antes de s segundos de relógio; monta mais dias se faltar
+        janelas = self._cobrir(inicio, inicio + (segundos * 1000).astype(np.int64))
+        for tentativa in range(12):
+            _, _, inicios, fins, acumulado = janelas
+            if len(inicios):
+                alvo = self._trabalhado(janelas, inicio) + np.round(segundos * 1000).astype(np.int64)
+                if np.all(alvo <= acumulado[-1] + fins[-1] - inicios[-1]):
+                    break
+            montado_ate = int(fins[-1]) if len(fins) else int(inicio.max())
+            janelas = self._cobrir(inicio, montado_ate + DIAS_FOLGA * 86_400_000)
+        else:
+            # Calendário sem janelas de trabalho à frente: tempo de relógio
+            return inicio + np.round(segundos * 1000).astype(np.int64)
+        k = np.searchsorted(acumulado + fins - inicios, alvo, side='left')
+        instante = inicios[k] + (alvo - acumulado[k])
+        instante = np.maximum(instante, inicio)
+        return int(instante) if instante.ndim == 0 else instante
+
+
+CALENDARIO = CalendarioTurnos.carregar()
@@ -0,0 +1,108 @@
+import json
+import os
+import unicodedata
+
+import numpy as np
+
+# Catálogo dos processos (código inteiro estável + nome de exibição) e roteiros por
+# família de produto, lidos de catalogo_processos.json. As linhas de tempos guardam
+# só o código; nomes antigos (com ou sem acento) são convertidos na leitura.
+ARQUIVO_CATALOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogo_processos.json")
+
+
+def _chave(texto):
+    """Texto sem acentos, maiúsculas e espaços repetidos, para comparar grafias"""
+    sem_acento = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.casefold().split())
+
+
+class CatalogoProcessos:
+    """Processos por código e roteiro (processos usados) de cada família de produto"""
+
+    def __init__(self, processos, roteiros=()):
+        self.nomes = {int(processo["codigo"]): processo["nome"] for processo in processos}
+        self.codigos = list(self.nomes)
+        self._por_chave = {}
+        for processo in processos:
+            for nome in [processo["nome"], *processo.get("sinonimos", [])]:
+                self._por_chave[_chave(nome)] = int(processo["codigo"])
+
+        # Roteiro: família, trechos procurados no produto e códigos dos processos, na ordem da tela
+        self.roteiros = []
+        for roteiro in roteiros:
+            codigos = [int(codigo) for codigo in roteiro["processos"]]
+            desconhecidos = [codigo for codigo in codigos if codigo not in self.nomes]
+            if desconhecidos:
+                raise ValueError(f"Roteiro {roteiro['familia']}: processos fora do catálogo {desconhecidos}")
+            self.roteiros.append((roteiro["familia"], [_chave(trecho) for trecho in roteiro["contem"]], codigos))
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_CATALOGO):
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        return cls(dados["processos"], dados.get("roteiros", []))
+
+    def codigo(self, valor):
+        """Código do processo a partir do código (int ou texto) ou do nome; ValueError se não existir"""
+        if isinstance(valor, (int, np.integer)) or str(valor).strip().isdigit():
+            codigo = int(str(valor).strip())
+            if codigo not in self.nomes:
+                raise ValueError(f"Código de processo inexistente: {codigo}")
+            return codigo
+        codigo = self._por_chave.get(_chave(valor))
+        if codigo is None:
+            raise ValueError(f"Processo desconhecido: {valor}")
+        return codigo
+
+    def nome(self, valor):
+        """Nome de exibição (valores fora do catálogo aparecem como estão)"""
+        try:
+            return self.nomes[self.codigo(valor)]
+        except ValueError:
+            return str(valor)
+
+    def familia(self, produto):
+        """Família do produto pelo primeiro roteiro que casar, ou None"""
+        texto = _chave(produto)
+        for familia, trechos, _ in self.roteiros:
+            if any(trecho in texto for trecho in trechos):
+                return familia
+        return None
+
+    def processos_do_produto(self, produto):
+        """Códigos dos processos do roteiro do produto (todos, se nenhum roteiro casar)"""
+        texto = _chave(produto)
+        for _, trechos, codigos in self.roteiros:
+            if any(trecho in texto for trecho in trechos):
+                return codigos
+        return self.codigos
+
+    def codificar(self, df):
+        """Troca nomes por códigos na coluna processo (no lugar de uma cópia); fora do catálogo fica o texto"""
+        if df is None or 'processo' not in df.columns or df['processo'].dtype.kind in "iu":
+            return df
+        valores = df['processo']
+        conversao = {}
+        for valor in valores.dropna().unique():
+            try:
+                conversao[valor] = self.codigo(valor)
+            except ValueError:
+                conversao[valor] = valor
+        df = df.copy()
+        df['processo'] = valores.map(conversao)
+        if valores.notna().all() and all(isinstance(codigo, int) for codigo in conversao.values()):
+            df['processo'] = df['processo'].astype('int64')
+        return df
+
+    def codificar_chaves(self, processos):
+        """Dicionário nome -> dados (JSON do main.py/app_simples.py) com as chaves trocadas pelo código"""
+        resultado = {}
+        for chave, dados in processos.items():
+            try:
+                resultado[str(self.codigo(chave))] = dados
+            except ValueError:
+                resultado[chave] = dados
+        return resultado
+
+
+CATALOGO = CatalogoProcessos.carregar()
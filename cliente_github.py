@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import os
+
+import requests
+
+# Mesmo repositório usado pelo app_github.py (pode ser trocado por variável de ambiente)
+GITHUB_REPO = os.environ.get("GITHUB_REPO", "controleciceropapelaria-design/sistema-apontamento-tempos")
+# Tempo máximo (segundos) de cada requisição: sem ele, uma conexão presa trava o daemon/API para sempre
+GITHUB_TIMEOUT = float(os.environ.get("GITHUB_TIMEOUT", 30))
+
+
+class ClienteGitHub:
+    """Leitura e gravação de arquivos do repositório de dados, sem Streamlit (CLI, API)"""
+
+    def __init__(self, token=None, repo=GITHUB_REPO, timeout=GITHUB_TIMEOUT):
+        self.token = token if token is not None else os.environ.get("GITHUB_TOKEN", "")
+        self.api_base = f"https://api.github.com/repos/{repo}"
+        self.timeout = timeout
+
+    def _headers(self):
+        headers = {"Accept": "application/vnd.github.v3+json"}
+        if self.token.startswith("github_pat_"):
+            headers["Authorization"] = f"Bearer {self.token}"
+        elif self.token:
+            headers["Authorization"] = f"token {self.token}"
+        return headers
+
+    def ler(self, caminho):
+        """Conteúdo (bytes) e SHA do blob de um arquivo; (None, None) se não existir"""
+        response = requests.get(f"{self.api_base}/contents/{caminho}", headers=self._headers(), timeout=self.timeout)
+        if response.status_code != 200:
+            return None, None
+        dados = response.json()
+        if dados.get("encoding") == "none" or (not dados.get("content") and dados.get("size")):
+            # Acima de 1 MB a API de conteúdo não traz o arquivo: lê o blob pelo SHA (sem limite)
+            blob = requests.get(f"{self.api_base}/git/blobs/{dados['sha']}", headers=self._headers(), timeout=self.timeout)
+            if blob.status_code != 200:
+                return None, None
+            dados = blob.json()
+        return base64.b64decode(dados["content"]), dados["sha"]
+
+    def gravar(self, caminho, conteudo, sha, mensagem):
+        """Grava o arquivo num commit; retorna o novo SHA ou None (ex.: 409, SHA obsoleto)"""
+        dados = conteudo if isinstance(conteudo, bytes) else conteudo.encode("utf-8")
+        corpo = {"message": mensagem, "content": base64.b64encode(dados).decode("utf-8")}
+        if sha:
+            corpo["sha"] = sha
+        response = requests.put(f"{self.api_base}/contents/{caminho}", headers=self._headers(), json=corpo, timeout=self.timeout)
+        if response.status_code not in (200, 201):
+            return None
+        return response.json().get("content", {}).get("sha")
+
+    def listar(self, pasta):
+        """Caminhos dos arquivos de uma pasta do repositório ([] se não existir)"""
+        response = requests.get(f"{self.api_base}/contents/{pasta}", headers=self._headers(), timeout=self.timeout)
+        if response.status_code != 200 or not isinstance(response.json(), list):
+            return []
+        return [item["path"] for item in response.json() if item.get("type", "file") == "file"]
+
+
+class ArquivosLocais:
+    """Mesma interface do ClienteGitHub sobre uma pasta local (SHA = hash de blob do git)"""
+
+    def __init__(self, pasta="."):
+        self.pasta = pasta
+
+    @staticmethod
+    def _sha(dados):
+        return hashlib.sha1(b"blob %d\0" % len(dados) + dados).hexdigest()
+
+    def ler(self, caminho):
+        """Conteúdo (bytes) e SHA do arquivo; (None, None) se não existir"""
+        try:
+            with open(os.path.join(self.pasta, caminho), "rb") as arquivo:
+                dados = arquivo.read()
+        except FileNotFoundError:
+            return None, None
+        return dados, self._sha(dados)
+
+    def gravar(self, caminho, conteudo, sha, mensagem):
+        """Grava o arquivo se ele ainda estiver na versão do SHA informado; retorna o novo SHA ou None"""
+        dados = conteudo if isinstance(conteudo, bytes) else conteudo.encode("utf-8")
+        _, sha_atual = self.ler(caminho)
+        if sha_atual is not None and sha_atual != sha:
+            return None
+        destino = os.path.join(self.pasta, caminho)
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+        with open(destino, "wb") as arquivo:
+            arquivo.write(dados)
+        return self._sha(dados)
+
+    def listar(self, pasta):
+        """Caminhos dos arquivos de uma pasta ([] se não existir)"""
+        try:
+            nomes = sorted(os.listdir(os.path.join(self.pasta, pasta)))
+        except FileNotFoundError:
+            return []
+        return [f"{pasta}/{nome}" for nome in nomes if os.path.isfile(os.path.join(self.pasta, pasta, nome))]
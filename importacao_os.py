@@ -0,0 +1,136 @@
+import argparse
+import io
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from cadastro_produtos import com_produto_id, ids_produtos, sincronizar_produtos
+
+# Importação de OS em lote de um CSV do ERP (numero_os, produto e quantidade; aceita nomes
+# alternativos e separador ; ou ,). As linhas são validadas de uma vez e as válidas entram em
+# ordens_servico.csv numa única gravação, com os produtos novos cadastrados em produtos.csv.
+# Pela linha de comando: python importacao_os.py semana.csv [--github | --simular]
+ARQUIVO_OS = "ordens_servico.csv"
+COLUNAS_OS = ['numero_os', 'produto', 'quantidade', 'data_criacao', 'status_os', 'produto_id']
+
+# Nomes de coluna comuns nas exportações, já em minúsculas
+SINONIMOS = {
+    'os': 'numero_os', 'numero': 'numero_os', 'número': 'numero_os', 'n_os': 'numero_os',
+    'numero os': 'numero_os', 'número os': 'numero_os', 'ordem': 'numero_os',
+    'descricao': 'produto', 'descrição': 'produto', 'item': 'produto',
+    'qtd': 'quantidade', 'qtde': 'quantidade', 'quant': 'quantidade',
+}
+
+
+def ler_planilha(origem):
+    """Lê o CSV (caminho, bytes ou arquivo) detectando o separador e padronizando as colunas"""
+    if isinstance(origem, bytes):
+        origem = io.BytesIO(origem)
+    df = pd.read_csv(origem, sep=None, engine='python', dtype=str, encoding='utf-8-sig')
+    nomes = {coluna: coluna.strip().lower() for coluna in df.columns}
+    df = df.rename(columns={coluna: SINONIMOS.get(nome, nome) for coluna, nome in nomes.items()})
+
+    faltando = [c for c in ('numero_os', 'produto', 'quantidade') if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    return df[['numero_os', 'produto', 'quantidade']]
+
+
+def validar_importacao(df_novas, df_os):
+    """Valida todas as linhas de uma vez; retorna (válidas, rejeitadas com o motivo)"""
+    df = pd.DataFrame({
+        'numero_os': pd.to_numeric(df_novas['numero_os'].str.strip(), errors='coerce'),
+        'produto': df_novas['produto'].fillna('').str.strip(),
+        'quantidade': pd.to_numeric(df_novas['quantidade'].str.strip().str.replace(',', '.'), errors='coerce'),
+    })
+    existentes = pd.Index(pd.to_numeric(df_os['numero_os'], errors='coerce').dropna().astype('int64'))
+
+    # Primeiro motivo encontrado vale para a linha
+    motivo = pd.Series('', index=df.index, dtype=object)
+    regras = [
+        (df['numero_os'].isna() | (df['numero_os'] % 1 != 0) | (df['numero_os'] < 1), 'número de OS inválido'),
+        (df['produto'] == '', 'produto vazio'),
+        (df['quantidade'].isna() | (df['quantidade'] % 1 != 0) | (df['quantidade'] < 1), 'quantidade inválida'),
+        (df['numero_os'].isin(existentes), 'OS já cadastrada'),
+        (df['numero_os'].notna() & df['numero_os'].duplicated(keep='first'), 'OS repetida no arquivo'),
+    ]
+    for mascara, texto in regras:
+        motivo[(motivo == '') & mascara] = texto
+
+    valida = motivo == ''
+    validas = df[valida].astype({'numero_os': 'int64', 'quantidade': 'int64'}).reset_index(drop=True)
+    rejeitadas = df_novas[~valida].assign(motivo=motivo[~valida]).reset_index(drop=True)
+    return validas, rejeitadas
+
+
+def montar_novas_os(validas, agora=None):
+    """Linhas de ordens_servico.csv para as OS importadas (ativas)"""
+    agora = agora or datetime.now()
+    return validas.assign(data_criacao=agora.isoformat(), status_os='ativa',
+                          produto_id=ids_produtos(validas['produto']))[COLUNAS_OS]
+
+
+def importar(df_os, origem):
+    """Lê, valida e acrescenta as OS; retorna (df_os atualizado, importadas, rejeitadas)"""
+    validas, rejeitadas = validar_importacao(ler_planilha(origem), df_os)
+    novas = montar_novas_os(validas)
+    if novas.empty:
+        return df_os, novas, rejeitadas
+    partes = [df for df in (df_os, novas) if not df.empty]
+    return com_produto_id(pd.concat(partes, ignore_index=True)), novas, rejeitadas
+
+
+def _importar_github(caminho, simular):
+    """Importa sobre a versão do GitHub e grava num único commit (refaz se o SHA mudar no meio)"""
+    from cliente_github import ClienteGitHub
+
+    cliente = ClienteGitHub()
+    for tentativa in range(2):
+        conteudo, sha = cliente.ler(ARQUIVO_OS)
+        df_os = pd.read_csv(io.BytesIO(conteudo)) if conteudo else pd.DataFrame(columns=COLUNAS_OS)
+        df_final, novas, rejeitadas = importar(df_os, caminho)
+        if simular or novas.empty:
+            return novas, rejeitadas
+        mensagem = f"Importação de {len(novas)} OS - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        if cliente.gravar(ARQUIVO_OS, df_final.to_csv(index=False), sha, mensagem):
+            sincronizar_produtos(cliente, df_final['produto'], f"Produtos: {mensagem}")
+            return novas, rejeitadas
+    raise RuntimeError("Não foi possível gravar no GitHub (conflito de versão)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa OS em lote a partir de um CSV")
+    parser.add_argument("arquivo", help="CSV com numero_os, produto e quantidade")
+    parser.add_argument("--github", action="store_true", help="grava no GitHub (GITHUB_TOKEN no ambiente)")
+    parser.add_argument("--destino", default=ARQUIVO_OS, help="CSV local de OS (sem --github)")
+    parser.add_argument("--simular", action="store_true", help="só valida, não grava")
+    args = parser.parse_args()
+
+    try:
+        if args.github:
+            novas, rejeitadas = _importar_github(args.arquivo, args.simular)
+        else:
+            try:
+                df_os = pd.read_csv(args.destino)
+            except FileNotFoundError:
+                df_os = pd.DataFrame(columns=COLUNAS_OS)
+            df_final, novas, rejeitadas = importar(df_os, args.arquivo)
+            if not args.simular and not novas.empty:
+                df_final.to_csv(args.destino, index=False)
+                from cliente_github import ArquivosLocais
+
+                sincronizar_produtos(ArquivosLocais(os.path.dirname(args.destino) or "."), df_final['produto'],
+                                     "Produtos importados")
+    except (ValueError, RuntimeError) as erro:
+        print(f"ERRO: {erro}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{len(novas)} OS {'válidas' if args.simular else 'importadas'}, {len(rejeitadas)} rejeitadas")
+    for linha in rejeitadas.itertuples(index=False):
+        print(f"  OS {linha.numero_os}: {linha.motivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+import motor_tempos
+from mesclagem import CHAVES_TEMPOS
+
+# Trechos de trabalho: uma linha por início → pausa/finalização de cada processo, em epoch ms
+# (fim no relógio; duracao_segundos é o tempo contado, que com calendário exclui o fora do turno),
+# com o acumulado do processo ao fim do trecho (só para auditoria: os totais continuam vindo
+# de tempo_total_segundos). Um CSV por dia do início do trecho (UTC), pequeno o bastante
+# para ser regravado a cada pausa; os CSVs mensais antigos (intervalos_AAAA-MM) ainda são lidos
+PASTA_INTERVALOS = "tempos_intervalos"
+COLUNAS_INTERVALOS = ['numero_os', 'processo', 'inicio', 'fim', 'duracao_segundos', 'acumulado_segundos']
+CHAVES_INTERVALOS = ['numero_os', 'processo', 'inicio']
+# Trechos que começam até este tanto antes de uma janela ainda são procurados nela (ms)
+FOLGA_CONSULTA_MS = 31 * 24 * 3600 * 1000
+
+
+def caminho_intervalos(dia):
+    """Caminho do CSV de intervalos de um dia (AAAA-MM-DD)"""
+    return f"{PASTA_INTERVALOS}/intervalos_{dia}.csv"
+
+
+def dias_dos_intervalos(df):
+    """Dia (AAAA-MM-DD, UTC) do início de cada intervalo"""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    return pd.to_datetime(df['inicio'], unit='ms', utc=True).dt.strftime('%Y-%m-%d').astype(object)
+
+
+def particoes_no_periodo(caminhos, de, ate):
+    """Partições (diárias ou mensais antigas) que podem ter trechos sobrepostos à janela [de, ate) em epoch ms"""
+    selecionadas = []
+    for caminho in sorted(caminhos):
+        rotulo = caminho.rsplit("/", 1)[-1].removeprefix("intervalos_").removesuffix(".csv")
+        try:
+            comeco = pd.Timestamp(rotulo, tz='UTC')
+        except ValueError:
+            continue
+        fim = comeco + (pd.DateOffset(months=1) if len(rotulo) == 7 else pd.Timedelta(days=1))
+        if fim.value // 10**6 > de - FOLGA_CONSULTA_MS and comeco.value // 10**6 < ate:
+            selecionadas.append(caminho)
+    return selecionadas
+
+
+def normalizar_intervalos(df):
+    """Tipos fixos (OS, início e fim inteiros) e ordem por processo e início"""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUNAS_INTERVALOS).astype(
+            {'numero_os': 'int64', 'inicio': 'int64', 'fim': 'int64', 'duracao_segundos': 'float64',
+             'acumulado_segundos': 'float64'})
+    df = df[COLUNAS_INTERVALOS].astype({'numero_os': 'int64', 'inicio': 'int64', 'fim': 'int64',
+                                        'duracao_segundos': 'float64', 'acumulado_segundos': 'float64'})
+    return df.sort_values(CHAVES_INTERVALOS, kind='stable').reset_index(drop=True)
+
+
+def ler_intervalos(conteudo):
+    """Intervalos a partir do CSV (bytes ou texto); vazio se não houver arquivo"""
+    if not conteudo:
+        return normalizar_intervalos(None)
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+    return normalizar_intervalos(pd.read_csv(io.BytesIO(conteudo)))
+
+
+def intervalos_fechados(antes, depois):
+    """Trechos encerrados entre duas versões dos tempos: rodando em antes, pausado/finalizado (ou reiniciado) em depois"""
+    if antes is None or antes.empty or depois.empty:
+        return normalizar_intervalos(None)
+    rodando = antes[(antes['status'] == motor_tempos.EM_ANDAMENTO) & antes['inicio_atual'].notna()]
+    if rodando.empty:
+        return normalizar_intervalos(None)
+
+    colunas = CHAVES_TEMPOS + ['tempo_total_segundos', 'status', 'inicio_atual', 'data_atualizacao']
+    df = rodando[colunas].merge(depois[colunas], on=CHAVES_TEMPOS, suffixes=('', '_depois'))
+    fechado = ((df['status_depois'] != motor_tempos.EM_ANDAMENTO) | df['inicio_atual_depois'].isna()
+               | (df['inicio_atual_depois'] != df['inicio_atual'])).fillna(True)
+    df = df[fechado]
+
+    # Duração é o tempo contado (pelo acumulado, só dentro dos turnos com calendário); o fim é o
+    # instante de relógio da pausa (data_atualizacao). Sem ela, o instante em que a duração se completa
+    duracao = (df['tempo_total_segundos_depois'].astype('float64') - df['tempo_total_segundos'].astype('float64')).clip(lower=0)
+    inicio = df['inicio_atual'].astype('int64').to_numpy()
+    pausa = pd.to_numeric(df['data_atualizacao_depois'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    fim = np.where(np.isnan(pausa), motor_tempos.instante_apos(inicio, duracao.to_numpy()),
+                   np.maximum(np.nan_to_num(pausa), inicio)).astype('int64')
+    return normalizar_intervalos(pd.DataFrame({
+        'numero_os': df['numero_os'],
+        'processo': df['processo'],
+        'inicio': inicio,
+        'fim': fim,
+        'duracao_segundos': duracao,
+        'acumulado_segundos': df['tempo_total_segundos_depois'],
+    }))
+
+
+def anexar_intervalos(existentes, novos):
+    """Junta intervalos novos a uma partição; o mesmo trecho (OS, processo, início) fica com a versão nova"""
+    partes = [df for df in (existentes, novos) if df is not None and not df.empty]
+    if not partes:
+        return normalizar_intervalos(None)
+    df = pd.concat(partes, ignore_index=True).drop_duplicates(subset=CHAVES_INTERVALOS, keep='last')
+    return normalizar_intervalos(df)
+
+
+def intervalos_em_andamento(ativos, agora=None):
+    """Trechos ainda abertos (cronômetros em andamento), com fim no instante atual"""
+    agora = motor_tempos.agora_ms() if agora is None else agora
+    rodando = ativos[(ativos['status'] == motor_tempos.EM_ANDAMENTO) & ativos['inicio_atual'].notna()]
+    if rodando.empty:
+        return normalizar_intervalos(None)
+    inicio = rodando['inicio_atual'].astype('int64')
+    duracao = motor_tempos.decorrido_em_lote(inicio.to_numpy(), agora)
+    return normalizar_intervalos(pd.DataFrame({
+        'numero_os': rodando['numero_os'],
+        'processo': rodando['processo'],
+        'inicio': inicio,
+        'fim': np.maximum(inicio, agora),
+        'duracao_segundos': duracao,
+        'acumulado_segundos': rodando['tempo_total_segundos'].astype('float64') + duracao,
+    }))
+
+
+class IndiceIntervalos:
+    """Intervalos ordenados pelo início, com o maior fim até cada posição, para consultas por janela de tempo"""
+
+    def __init__(self, df):
+        self.df = normalizar_intervalos(df).sort_values('inicio', kind='stable').reset_index(drop=True)
+        self.inicio = self.df['inicio'].to_numpy(dtype=np.int64)
+        self.fim = self.df['fim'].to_numpy(dtype=np.int64)
+        # Não decrescente: os intervalos antes da primeira posição com fim máximo > de terminam antes da janela
+        self._fim_maximo = np.maximum.accumulate(self.fim) if len(self.fim) else self.fim
+
+    def __len__(self):
+        return len(self.fim)
+
+    def consultar(self, de, ate):
+        """Intervalos que se sobrepõem à janela [de, ate) em epoch ms, em ordem de início"""
+        ultimo = int(np.searchsorted(self.inicio, ate, side='left'))
+        primeiro = int(np.searchsorted(self._fim_maximo[:ultimo], de, side='right'))
+        sobrepostos = self.fim[primeiro:ultimo] > de
+        return self.df.iloc[primeiro:ultimo][sobrepostos]
+
+
+def agrupar_para_exibicao(df, resolucao_ms):
+    """Junta os trechos do mesmo processo separados por menos que a resolução (uma barra por trecho visível)"""
+    if df.empty:
+        return df[['numero_os', 'processo', 'inicio', 'fim', 'duracao_segundos']].assign(
+            trechos=pd.Series([], dtype='int64'))
+    df = df.sort_values(CHAVES_TEMPOS + ['inicio'], kind='stable').reset_index(drop=True)
+    chave = df[CHAVES_TEMPOS]
+    mesma_chave = (chave == chave.shift()).all(axis=1).to_numpy()
+    # Maior fim entre os trechos anteriores do mesmo processo
+    fim_anterior = df.groupby(CHAVES_TEMPOS, sort=False)['fim'].cummax().shift().to_numpy()
+    novo_bloco = ~mesma_chave | (df['inicio'].to_numpy() - fim_anterior > resolucao_ms)
+    bloco = np.cumsum(novo_bloco)
+    return df.groupby(bloco).agg(
+        numero_os=('numero_os', 'first'), processo=('processo', 'first'), inicio=('inicio', 'min'),
+        fim=('fim', 'max'), duracao_segundos=('duracao_segundos', 'sum'), trechos=('inicio', 'size'),
+    ).reset_index(drop=True)
+
+
+def gravar_intervalos(armazem, novos, mensagem):
+    """Acrescenta os intervalos às partições diárias de um armazém (ClienteGitHub ou ArquivosLocais)"""
+    dias = dias_dos_intervalos(novos)
+    for dia in sorted(set(dias)):
+        caminho = caminho_intervalos(dia)
+        for tentativa in range(3):
+            conteudo, sha = armazem.ler(caminho)
+            particao = anexar_intervalos(ler_intervalos(conteudo), novos[dias == dia])
+            if armazem.gravar(caminho, particao.to_csv(index=False), sha, mensagem):
+                break
+        else:
+            raise RuntimeError(f"Não foi possível gravar {caminho} (conflito de versão)")
+
@@ -0,0 +1,44 @@
+import motor_tempos
+
+# Códigos lidos pelo leitor de código de barras (teclado USB): "<OS>|<processo>|<ação>"
+# O processo pode vir pelo código do catálogo de processos ou pelo nome
+SEPARADORES = ("|", ";")
+
+ACOES = {
+    'I': 'iniciar', 'INICIAR': 'iniciar', 'PLAY': 'iniciar', '1': 'iniciar',
+    'P': 'pausar', 'PAUSAR': 'pausar', 'PAUSE': 'pausar', '2': 'pausar',
+    'F': 'finalizar', 'FINALIZAR': 'finalizar', 'STOP': 'finalizar', '3': 'finalizar',
+}
+
+# Status de destino de cada ação, para a confirmação na tela
+STATUS_DA_ACAO = {
+    'iniciar': motor_tempos.EM_ANDAMENTO,
+    'pausar': motor_tempos.PAUSADO,
+    'finalizar': motor_tempos.FINALIZADO,
+}
+
+
+def interpretar_codigo(texto, catalogo):
+    """'1580|2|I' -> (1580, código do processo, 'iniciar'); ValueError se o código for inválido"""
+    texto = (texto or "").strip()
+    separador = next((s for s in SEPARADORES if s in texto), SEPARADORES[0])
+    partes = [parte.strip() for parte in texto.split(separador)]
+    if len(partes) != 3:
+        raise ValueError("Formato esperado: OS|processo|ação")
+
+    os_texto, processo_texto, acao_texto = partes
+    if not os_texto.isdigit():
+        raise ValueError(f"Número de OS inválido: {os_texto}")
+
+    processo = catalogo.codigo(processo_texto)
+
+    acao = ACOES.get(acao_texto.upper())
+    if acao is None:
+        raise ValueError(f"Ação desconhecida: {acao_texto} (use I, P ou F)")
+
+    return int(os_texto), processo, acao
+
+
+def montar_codigo(numero_os, codigo_processo, acao):
+    """Texto a imprimir na etiqueta: montar_codigo(1580, 2, 'I') -> '1580|2|I'"""
+    return f"{numero_os}{SEPARADORES[0]}{codigo_processo}{SEPARADORES[0]}{acao}"
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import motor_tempos
+
+# Ponte entre o DataFrame de tempos (epoch ms em Int64) e os arrays do motor,
+# usada pelas operações em lote do app, pela pausa automática e pela API
+
+
+def tempos_em_arrays(df):
+    """Cronômetros de um recorte de df_tempos em arrays, montados direto das colunas"""
+    return motor_tempos.TemposAtivos.de_colunas(
+        df['numero_os'], df['processo'], df['tempo_total_segundos'],
+        df['inicio_atual'].to_numpy(dtype='float64', na_value=float('nan')), df['status'])
+
+
+def indexar_tempos(df):
+    """Dicionário (numero_os, processo) -> rótulo da linha, para acesso O(1) a um cronômetro"""
+    return dict(zip(zip(df['numero_os'].astype('int64').tolist(), df['processo'].tolist()), df.index))
+
+
+def gravar_arrays(df, linhas, tempos, alterados, agora):
+    """Grava no DataFrame (no lugar) os cronômetros alterados; linhas = índices do recorte usado nos arrays
+
+    agora pode ser um array com o instante de cada cronômetro (ex.: o de pausa).
+    """
+    linhas = linhas[alterados]
+    inicio = tempos.inicio[alterados].tolist()
+    df.loc[linhas, 'tempo_total_segundos'] = tempos.acumulado[alterados]
+    df.loc[linhas, 'status'] = [motor_tempos.STATUS_NOMES[codigo] for codigo in tempos.status[alterados]]
+    df.loc[linhas, 'inicio_atual'] = pd.array(
+        [valor if valor != motor_tempos.SEM_INICIO else None for valor in inicio], dtype='Int64')
+    df.loc[linhas, 'data_atualizacao'] = agora[alterados] if np.ndim(agora) else agora
+    return linhas
+
+
+def aplicar_em_lote(df, mascara, operacao, agora=None):
+    """Aplica iniciar/pausar/finalizar às linhas da máscara numa atualização vetorizada; retorna os índices alterados"""
+    linhas = df.index[mascara]
+    if len(linhas) == 0:
+        return linhas
+
+    tempos = tempos_em_arrays(df.loc[linhas])
+    agora = motor_tempos.agora_ms() if agora is None else agora
+    alterados = getattr(tempos, operacao)(agora=agora)
+    return gravar_arrays(df, linhas, tempos, alterados, agora)
@@ -4,6 +4,9 @@ import os
 from datetime import datetime, timedelta
 import time
 
+import motor_tempos
+from catalogo_processos import CATALOGO
+
 # Configuracao da pagina
 st.set_page_config(
     page_title="Sistema de Apontamento de Tempos",
@@ -14,22 +17,16 @@ st.set_page_config(
 # Arquivo para armazenar os dados
 DATA_FILE = "dados_producao.json"
 
-# Processos disponiveis
-PROCESSOS = [
-    "Aviamento de capa",
-    "Aviamento de miolo", 
-    "Encadernacao e Finalizacao",
-    "Montagem de capa",
-    "Montagem de Miolo",
-    "Montagem do kit"
-]
-
 def carregar_dados():
     """Carrega os dados do arquivo JSON"""
     if os.path.exists(DATA_FILE):
         try:
             with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                dados = json.load(f)
+            # Processos pelo código do catálogo (arquivos antigos usam o nome)
+            for os_data in dados.get("ordens_servico", {}).values():
+                os_data["processos"] = CATALOGO.codificar_chaves(os_data.get("processos", {}))
+            return dados
         except:
             return {"ordens_servico": {}}
     return {"ordens_servico": {}}
@@ -51,8 +48,8 @@ def inicializar_os(numero_os, produto, quantidade):
     }
     
     # Inicializa cada processo
-    for processo in PROCESSOS:
-        dados["ordens_servico"][numero_os]["processos"][processo] = {
+    for codigo in CATALOGO.processos_do_produto(produto):
+        dados["ordens_servico"][numero_os]["processos"][str(codigo)] = {
             "tempo_total": 0,  # em segundos
             "status": "parado",  # parado, rodando, pausado
             "inicio_atual": None,
@@ -73,10 +70,17 @@ def atualizar_tempo_processo(numero_os, processo):
     
     if processo_data["status"] == "rodando" and processo_data["inicio_atual"]:
         # Calcula o tempo decorrido desde o ultimo inicio
-        inicio = datetime.fromisoformat(processo_data["inicio_atual"])
-        tempo_decorrido = (datetime.now() - inicio).total_seconds()
-        processo_data["tempo_total"] += tempo_decorrido
-        processo_data["inicio_atual"] = datetime.now().isoformat()
+        agora = motor_tempos.agora_ms()
+        duracao = motor_tempos.tempo_decorrido(processo_data["inicio_atual"], agora)
+        processo_data["tempo_total"] += duracao
+        # Guarda o trecho encerrado com o acumulado do processo ao fim dele
+        processo_data.setdefault("pausas", []).append({
+            "inicio": motor_tempos.para_ms(processo_data["inicio_atual"]),
+            "fim": agora,
+            "duracao_segundos": duracao,
+            "acumulado_segundos": processo_data["tempo_total"],
+        })
+        processo_data["inicio_atual"] = agora
     
     salvar_dados(dados)
     return dados
@@ -86,7 +90,7 @@ def iniciar_processo(numero_os, processo):
     dados = atualizar_tempo_processo(numero_os, processo)
     
     dados["ordens_servico"][numero_os]["processos"][processo]["status"] = "rodando"
-    dados["ordens_servico"][numero_os]["processos"][processo]["inicio_atual"] = datetime.now().isoformat()
+    dados["ordens_servico"][numero_os]["processos"][processo]["inicio_atual"] = motor_tempos.agora_ms()
     
     salvar_dados(dados)
 
@@ -120,9 +124,7 @@ def calcular_tempo_atual(processo_data):
     tempo_total = processo_data["tempo_total"]
     
     if processo_data["status"] == "rodando" and processo_data["inicio_atual"]:
-        inicio = datetime.fromisoformat(processo_data["inicio_atual"])
-        tempo_decorrido = (datetime.now() - inicio).total_seconds()
-        tempo_total += tempo_decorrido
+        tempo_total += motor_tempos.tempo_decorrido(processo_data["inicio_atual"])
     
     return tempo_total
 
@@ -192,7 +194,7 @@ elif pagina == "Apontamento de Tempos":
             
             with placeholder.container():
                 # Processos
-                for i, processo in enumerate(PROCESSOS):
+                for i, processo in enumerate(os_data["processos"]):
                     processo_data = os_data["processos"][processo]
                     tempo_atual = calcular_tempo_atual(processo_data)
                     
@@ -205,7 +207,7 @@ elif pagina == "Apontamento de Tempos":
                             "rodando": ":green_circle:", 
                             "pausado": ":yellow_circle:"
                         }
-                        st.write(f"{status_color[processo_data['status']]} **{processo}**")
+                        st.write(f"{status_color[processo_data['status']]} **{CATALOGO.nome(processo)}**")
                         st.write(f"Tempo: {formatar_tempo(tempo_atual)}")
                     
                     with col2:
@@ -267,14 +269,14 @@ elif pagina == "Relatorios":
             st.subheader("Tempos por Processo")
             
             tempo_total_os = 0
-            for processo in PROCESSOS:
+            for processo in os_data["processos"]:
                 processo_data = os_data["processos"][processo]
                 tempo_atual = calcular_tempo_atual(processo_data)
                 tempo_total_os += tempo_atual
                 
                 col1, col2, col3 = st.columns([2, 1, 1])
                 with col1:
-                    st.write(f"**{processo}**")
+                    st.write(f"**{CATALOGO.nome(processo)}**")
                 with col2:
                     st.write(f"{formatar_tempo(tempo_atual)}")
                 with col3:
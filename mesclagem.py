@@ -0,0 +1,94 @@
+import pandas as pd
+
+from motor_tempos import para_ms
+
+CHAVES_TEMPOS = ['numero_os', 'processo']
+CHAVES_OS = ['numero_os']
+
+
+def _normalizar(valor):
+    """Normaliza valor de célula para comparação entre versões do CSV"""
+    if valor is None:
+        return ''
+    try:
+        if pd.isna(valor):
+            return ''
+    except (TypeError, ValueError):
+        pass
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _indexar(df, chaves, colunas):
+    """Monta dicionário chave -> (linha original, assinatura normalizada)"""
+    indice = {}
+    if df is None or df.empty:
+        return indice
+
+    for linha in df.reindex(columns=colunas).itertuples(index=False, name=None):
+        registro = dict(zip(colunas, linha))
+        chave = tuple(_normalizar(registro[c]) for c in chaves)
+        assinatura = tuple(_normalizar(v) for v in linha)
+        indice[chave] = (registro, assinatura)
+    return indice
+
+
+def _mais_recente(local, remoto, coluna_data):
+    """Escolhe entre duas versões conflitantes pela data de atualização"""
+    if coluna_data:
+        # Epoch ms (aceita o ISO antigo, caso uma das versões ainda não tenha migrado)
+        data_local = para_ms(local.get(coluna_data)) or 0
+        data_remota = para_ms(remoto.get(coluna_data)) or 0
+        if data_remota > data_local:
+            return remoto
+    # Empate ou sem coluna de data: prevalece a alteração desta sessão
+    return local
+
+
+def mesclar_tres_vias(base, local, remoto, chaves=CHAVES_TEMPOS, coluna_data='data_atualizacao'):
+    """Mescla linha a linha as versões base, local e remota de um CSV
+
+    Linhas alteradas só de um lado ficam com essa alteração; alteradas dos dois
+    lados ficam com a de data_atualizacao mais recente. Retorna (df, conflitos).
+    """
+    colunas = list(local.columns)
+    for df in (remoto, base):
+        if df is not None:
+            colunas += [c for c in df.columns if c not in colunas]
+
+    idx_base = _indexar(base, chaves, colunas)
+    idx_local = _indexar(local, chaves, colunas)
+    idx_remoto = _indexar(remoto, chaves, colunas)
+
+    resultado = []
+    conflitos = 0
+
+    # Ordem: linhas da sessão local primeiro, depois as novas do remoto
+    ordem = list(idx_local) + [c for c in idx_remoto if c not in idx_local]
+
+    for chave in ordem:
+        em_base = idx_base.get(chave)
+        em_local = idx_local.get(chave)
+        em_remoto = idx_remoto.get(chave)
+        assinatura_base = em_base[1] if em_base else None
+
+        if em_local and em_remoto:
+            if em_local[1] == em_remoto[1] or em_remoto[1] == assinatura_base:
+                resultado.append(em_local[0])
+            elif em_local[1] == assinatura_base:
+                resultado.append(em_remoto[0])
+            else:
+                conflitos += 1
+                resultado.append(_mais_recente(em_local[0], em_remoto[0], coluna_data))
+        elif em_local:
+            # Ausente no remoto: excluída lá, a menos que seja nova ou alterada aqui
+            if em_base is None or em_local[1] != assinatura_base:
+                resultado.append(em_local[0])
+        elif em_remoto:
+            # Ausente no local: excluída aqui, a menos que seja nova ou alterada lá
+            if em_base is None or em_remoto[1] != assinatura_base:
+                resultado.append(em_remoto[0])
+
+    df_mesclado = pd.DataFrame(resultado, columns=colunas)
+    return df_mesclado, conflitos
@@ -0,0 +1,110 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Quantidade de medições mantidas por métrica (janela móvel)
+TAMANHO_JANELA = 500
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por interpolação linear sobre uma lista já ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    posicao = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fracao = posicao - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fracao
+
+
+class Metricas:
+    """Registro de tempos de execução por nome, com percentis em janela móvel"""
+
+    def __init__(self, tamanho_janela=TAMANHO_JANELA):
+        self.tamanho_janela = tamanho_janela
+        self._medicoes = {}
+        self._totais = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nome, segundos, status=None, bytes_=0):
+        """Registra uma medição (duração em segundos, status e bytes trafegados)"""
+        with self._lock:
+            janela = self._medicoes.get(nome)
+            if janela is None:
+                janela = self._medicoes[nome] = deque(maxlen=self.tamanho_janela)
+                self._totais[nome] = {'chamadas': 0, 'erros': 0, 'bytes': 0}
+            janela.append(segundos * 1000)
+            totais = self._totais[nome]
+            totais['chamadas'] += 1
+            totais['bytes'] += bytes_ or 0
+            if status is not None and not (200 <= status < 400):
+                totais['erros'] += 1
+
+    @contextmanager
+    def medir(self, nome):
+        """Mede o bloco de código com um nome"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def instrumentar(self, nome=None):
+        """Decorador que mede cada chamada da função"""
+        def decorador(funcao):
+            rotulo = nome or funcao.__name__
+
+            @wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with self.medir(rotulo):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    def resumo(self):
+        """Lista de estatísticas por métrica (ms), da mais lenta (p90) para a mais rápida"""
+        with self._lock:
+            copia = {nome: (sorted(janela), dict(self._totais[nome])) for nome, janela in self._medicoes.items()}
+
+        linhas = []
+        for nome, (valores, totais) in copia.items():
+            linhas.append({
+                'metrica': nome,
+                'chamadas': totais['chamadas'],
+                'erros': totais['erros'],
+                'bytes': totais['bytes'],
+                'media_ms': round(sum(valores) / len(valores), 2) if valores else 0.0,
+                'p50_ms': round(percentil(valores, 50), 2),
+                'p90_ms': round(percentil(valores, 90), 2),
+                'p99_ms': round(percentil(valores, 99), 2),
+                'max_ms': round(valores[-1], 2) if valores else 0.0,
+            })
+        return sorted(linhas, key=lambda linha: linha['p90_ms'], reverse=True)
+
+    def zerar(self):
+        """Descarta todas as medições"""
+        with self._lock:
+            self._medicoes.clear()
+            self._totais.clear()
+
+    def exportar_json(self, caminho):
+        """Grava o resumo atual em JSON"""
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.resumo(), f, ensure_ascii=False, indent=2)
+
+    def exportar_csv(self, caminho):
+        """Grava o resumo atual em CSV"""
+        linhas = self.resumo()
+        colunas = ['metrica', 'chamadas', 'erros', 'bytes', 'media_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms']
+        with open(caminho, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.DictWriter(f, fieldnames=colunas)
+            escritor.writeheader()
+            escritor.writerows(linhas)
+
+
+# Instância única do processo, compartilhada por todas as sessões do Streamlit
+METRICAS = Metricas()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from catalogo_processos import CATALOGO
+from motor_tempos import para_ms
+from particionamento import (PASTA_HISTORICO, ARQUIVO_ATIVO, ARQUIVO_MORTO_LEGADO, ARQUIVO_MORTO_TEMPOS,
+                             PASTA_ARQUIVO_MORTO, para_parquet, particoes_arquivo_morto)
+
+# Colunas de data dos tempos, gravadas como epoch em milissegundos (UTC)
+COLUNAS_DATA = ['inicio_atual', 'data_atualizacao']
+ARQUIVO_JSON = "dados_producao.json"
+
+
+def normalizar_datas(df):
+    """Converte as colunas de data para epoch ms (Int64); aceita o formato ISO antigo"""
+    if df is None:
+        return None
+    colunas = [c for c in COLUNAS_DATA if c in df.columns and df[c].dtype != 'Int64']
+    if not colunas:
+        return df
+
+    df = df.copy()
+    for coluna in colunas:
+        serie = df[coluna]
+        numerico = pd.to_numeric(serie, errors='coerce')
+        # Só o que não é número (ISO antigo) passa pela conversão linha a linha
+        pendentes = numerico.isna() & serie.notna() & serie.astype(str).str.strip().ne('')
+        if pendentes.any():
+            numerico = numerico.astype('float64')
+            numerico[pendentes] = serie[pendentes].map(para_ms)
+        df[coluna] = numerico.round().astype('Int64')
+    return df
+
+
+def normalizar_tempos(df):
+    """Tempos no formato atual: datas em epoch ms e processo pelo código do catálogo"""
+    return CATALOGO.codificar(normalizar_datas(df))
+
+
+def migrar_csv(caminho):
+    """Regrava um CSV de tempos com datas em epoch ms e códigos de processo; retorna True se mudou"""
+    original = pd.read_csv(caminho)
+    migrado = normalizar_tempos(original)
+    if migrado.astype(str).equals(original.astype(str)):
+        return False
+    migrado.to_csv(caminho, index=False)
+    return True
+
+
+def migrar_parquet(caminho):
+    """Regrava o arquivo morto de tempos com datas em epoch ms e códigos de processo"""
+    df = pd.read_parquet(caminho)
+    with open(caminho, 'wb') as f:
+        f.write(para_parquet(normalizar_tempos(df)))
+    return True
+
+
+def migrar_json(caminho):
+    """Converte inicio_atual e as chaves de processo do JSON do main.py/app_simples.py; retorna True se mudou"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+
+    alterado = False
+    for os_data in dados.get("ordens_servico", {}).values():
+        processos = CATALOGO.codificar_chaves(os_data.get("processos", {}))
+        if list(processos) != list(os_data.get("processos", {})):
+            os_data["processos"] = processos
+            alterado = True
+        for processo_data in processos.values():
+            valor = processo_data.get("inicio_atual")
+            if isinstance(valor, str):
+                processo_data["inicio_atual"] = para_ms(valor)
+                alterado = True
+
+    if alterado:
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+    return alterado
+
+
+def arquivos_para_migrar(pasta):
+    """Arquivos de dados existentes na pasta, com a função que migra cada um"""
+    arquivos = [(os.path.join(pasta, ARQUIVO_ATIVO), migrar_csv)]
+    pasta_historico = os.path.join(pasta, PASTA_HISTORICO)
+    if os.path.isdir(pasta_historico):
+        arquivos += [(os.path.join(pasta_historico, nome), migrar_csv)
+                     for nome in sorted(os.listdir(pasta_historico)) if nome.endswith('.csv')]
+    pasta_morto = os.path.join(pasta, PASTA_ARQUIVO_MORTO)
+    mortos = [f"{PASTA_ARQUIVO_MORTO}/{nome}" for nome in sorted(os.listdir(pasta_morto))] if os.path.isdir(pasta_morto) else []
+    arquivos += [(os.path.join(pasta, caminho), migrar_parquet)
+                 for caminho in particoes_arquivo_morto(mortos + [ARQUIVO_MORTO_LEGADO[ARQUIVO_MORTO_TEMPOS]],
+                                                        ARQUIVO_MORTO_TEMPOS)]
+    arquivos += [(os.path.join(pasta, ARQUIVO_JSON), migrar_json)]
+    return [(caminho, funcao) for caminho, funcao in arquivos if os.path.exists(caminho)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte inicio_atual/data_atualizacao do formato ISO para epoch ms (UTC) e os nomes "
+                    "de processo para os códigos do catálogo. "
+                    "Datas ISO sem fuso são lidas na hora local: rode com o TZ do servidor (ex.: TZ=America/Sao_Paulo).")
+    parser.add_argument("--pasta", default=".", help="pasta com os arquivos de dados")
+    args = parser.parse_args()
+
+    for caminho, migrar in arquivos_para_migrar(args.pasta):
+        print(f"{caminho}: {'migrado' if migrar(caminho) else 'já no formato novo'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import calendario_turnos
+
+# Motor dos cronômetros: transições de estado e cálculo de tempo, sem Streamlit
+# nem pandas, para ser reutilizado por benchmarks, CLI e API
+
+NAO_INICIADO = 'não_iniciado'
+EM_ANDAMENTO = 'em_andamento'
+PAUSADO = 'pausado'
+FINALIZADO = 'finalizado'
+
+# Códigos compactos dos status (int8) usados na representação em arrays
+STATUS_NOMES = [NAO_INICIADO, EM_ANDAMENTO, PAUSADO, FINALIZADO]
+STATUS_CODIGOS = {nome: codigo for codigo, nome in enumerate(STATUS_NOMES)}
+
+# Início vazio na representação em arrays (epoch ms int64)
+SEM_INICIO = 0
+
+COLUNAS_TEMPOS = ['numero_os', 'processo', 'tempo_total_segundos', 'status', 'inicio_atual', 'data_atualizacao']
+
+
+def _vazio(valor):
+    """None, texto vazio, NaN ou pd.NA"""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return True
+    try:
+        return bool(valor != valor)
+    except TypeError:
+        # pd.NA não pode ser convertido para bool
+        return True
+
+
+# Último instante entregue por agora_ms (proteção contra relógio que volta)
+_ultimo_ms = 0
+_lock_relogio = threading.Lock()
+
+
+def agora_ms():
+    """Instante atual em milissegundos desde a época (UTC), nunca menor que o anterior"""
+    global _ultimo_ms
+    atual = time.time_ns() // 1_000_000
+    with _lock_relogio:
+        # Ajuste do relógio do servidor para trás (NTP, troca manual) não gera tempo negativo
+        if atual < _ultimo_ms:
+            atual = _ultimo_ms
+        _ultimo_ms = atual
+    return atual
+
+
+def para_ms(valor):
+    """Converte o valor armazenado em epoch ms (int); aceita o formato ISO antigo. Vazio vira None"""
+    if _vazio(valor):
+        return None
+    # Datas antigas sem fuso foram gravadas com datetime.now(): hora local do servidor
+    if isinstance(valor, datetime):
+        return int(valor.timestamp() * 1000)
+    if isinstance(valor, str):
+        texto = valor.strip()
+        try:
+            return int(float(texto))
+        except ValueError:
+            return int(datetime.fromisoformat(texto).timestamp() * 1000)
+    return int(valor)
+
+
+def ms_para_datetime(ms):
+    """Epoch ms para datetime local (exibição); vazio vira None"""
+    ms = para_ms(ms)
+    return datetime.fromtimestamp(ms / 1000) if ms is not None else None
+
+
+def formatar_data(ms, formato='%d/%m/%Y %H:%M:%S'):
+    """Epoch ms formatado na hora local"""
+    data = ms_para_datetime(ms)
+    return data.strftime(formato) if data is not None else ''
+
+
+def tempo_decorrido(inicio, agora=None):
+    """Segundos entre o início (epoch ms ou ISO antigo) e agora, nunca negativo (com calendário, só o tempo de turno)"""
+    inicio = para_ms(inicio)
+    if inicio is None:
+        return 0.0
+    agora = agora_ms() if agora is None else agora
+    if calendario_turnos.CALENDARIO is not None:
+        return calendario_turnos.CALENDARIO.segundos_trabalhados(inicio, agora)
+    return max(0, agora - inicio) / 1000
+
+
+def decorrido_em_lote(inicio, fim):
+    """tempo_decorrido para arrays de instantes (epoch ms)"""
+    if calendario_turnos.CALENDARIO is not None:
+        return calendario_turnos.CALENDARIO.segundos_trabalhados(inicio, fim)
+    return np.maximum(np.asarray(fim) - np.asarray(inicio), 0) / 1000
+
+
+def instante_apos(inicio, segundos):
+    """Instante (epoch ms) em que um trecho iniciado em inicio completa os segundos contados (arrays)"""
+    if calendario_turnos.CALENDARIO is not None:
+        return calendario_turnos.CALENDARIO.instante_apos(inicio, segundos)
+    return np.asarray(inicio) + np.round(np.asarray(segundos) * 1000).astype(np.int64)
+
+
+class RegistroTempo:
+    """Estado do cronômetro de um processo de uma OS"""
+
+    __slots__ = ('numero_os', 'processo', 'tempo_total', 'status', 'inicio', 'atualizacao')
+
+    def __init__(self, numero_os, processo, tempo_total=0.0, status=NAO_INICIADO, inicio=None, atualizacao=None):
+        self.numero_os = numero_os
+        self.processo = processo
+        self.tempo_total = tempo_total
+        self.status = status
+        self.inicio = inicio
+        self.atualizacao = atualizacao
+
+    @property
+    def chave(self):
+        return (self.numero_os, self.processo)
+
+    def __repr__(self):
+        return f"RegistroTempo({self.numero_os!r}, {self.processo!r}, {self.tempo_total:.1f}s, {self.status})"
+
+
+def registro_de_linha(linha):
+    """Cria o registro a partir de uma linha do CSV (dict ou pandas.Series)"""
+    tempo_total = linha.get('tempo_total_segundos')
+    status = linha.get('status')
+    return RegistroTempo(
+        linha['numero_os'],
+        linha['processo'],
+        0.0 if _vazio(tempo_total) else float(tempo_total),
+        NAO_INICIADO if _vazio(status) else status,
+        para_ms(linha.get('inicio_atual')),
+        para_ms(linha.get('data_atualizacao')),
+    )
+
+
+def linha_de_registro(registro):
+    """Converte o registro para o formato de linha do CSV"""
+    return {
+        'numero_os': registro.numero_os,
+        'processo': registro.processo,
+        'tempo_total_segundos': registro.tempo_total,
+        'status': registro.status,
+        'inicio_atual': registro.inicio,
+        'data_atualizacao': registro.atualizacao,
+    }
+
+
+def tempo_atual(registro, agora=None):
+    """Tempo acumulado incluindo o trecho em andamento"""
+    if registro.status == EM_ANDAMENTO and registro.inicio is not None:
+        return registro.tempo_total + tempo_decorrido(registro.inicio, agora)
+    return registro.tempo_total
+
+
+def iniciar(registro, agora=None):
+    """Inicia ou retoma o cronômetro; retorna False se já estava em andamento"""
+    if registro.status == EM_ANDAMENTO:
+        return False
+    agora = agora_ms() if agora is None else agora
+    registro.status = EM_ANDAMENTO
+    registro.inicio = agora
+    registro.atualizacao = agora
+    return True
+
+
+def pausar(registro, agora=None):
+    """Acumula o trecho em andamento e pausa; retorna False se não estava rodando"""
+    if registro.inicio is None:
+        return False
+    agora = agora_ms() if agora is None else agora
+    registro.tempo_total += tempo_decorrido(registro.inicio, agora)
+    registro.status = PAUSADO
+    registro.inicio = None
+    registro.atualizacao = agora
+    return True
+
+
+def finalizar(registro, agora=None):
+    """Pausa (se rodando) e marca como finalizado"""
+    agora = agora_ms() if agora is None else agora
+    pausar(registro, agora)
+    registro.status = FINALIZADO
+    registro.atualizacao = agora
+    return True
+
+
+class MotorTempos:
+    """Conjunto de cronômetros indexado por (numero_os, processo)"""
+
+    def __init__(self, registros=()):
+        self._registros = {}
+        for registro in registros:
+            self._registros[registro.chave] = registro
+
+    @classmethod
+    def de_linhas(cls, linhas):
+        """Monta o motor a partir de linhas do CSV (dicts)"""
+        return cls(registro_de_linha(linha) for linha in linhas)
+
+    def para_linhas(self):
+        """Linhas no formato do CSV, na ordem de inserção"""
+        return [linha_de_registro(registro) for registro in self._registros.values()]
+
+    def __len__(self):
+        return len(self._registros)
+
+    def __iter__(self):
+        return iter(self._registros.values())
+
+    def obter(self, numero_os, processo):
+        """Registro do processo, ou None se nunca foi iniciado"""
+        return self._registros.get((numero_os, processo))
+
+    def _obter_ou_criar(self, numero_os, processo):
+        registro = self._registros.get((numero_os, processo))
+        if registro is None:
+            registro = self._registros[(numero_os, processo)] = RegistroTempo(numero_os, processo)
+        return registro
+
+    def iniciar(self, numero_os, processo, agora=None):
+        return iniciar(self._obter_ou_criar(numero_os, processo), agora)
+
+    def pausar(self, numero_os, processo, agora=None):
+        registro = self._registros.get((numero_os, processo))
+        return pausar(registro, agora) if registro else False
+
+    def finalizar(self, numero_os, processo, agora=None):
+        registro = self._registros.get((numero_os, processo))
+        return finalizar(registro, agora) if registro else False
+
+    def tempo_atual(self, numero_os, processo, agora=None):
+        """(segundos, status) do processo"""
+        registro = self._registros.get((numero_os, processo))
+        if registro is None:
+            return 0, NAO_INICIADO
+        return tempo_atual(registro, agora), registro.status
+
+    def da_os(self, numero_os):
+        """Registros de uma OS"""
+        return [registro for registro in self._registros.values() if registro.numero_os == numero_os]
+
+    def em_andamento(self):
+        """Registros com cronômetro rodando"""
+        return [registro for registro in self._registros.values() if registro.status == EM_ANDAMENTO]
+
+    def remover_os(self, numero_os):
+        """Remove todos os registros de uma OS"""
+        for chave in [chave for chave in self._registros if chave[0] == numero_os]:
+            del self._registros[chave]
+
+
+class TemposAtivos:
+    """Cronômetros em arrays paralelos do NumPy (OS, código do processo, acumulado, início em ms, status)"""
+
+    # Uma posição por processo; a busca por (numero_os, processo) é um acesso a dict
+
+    __slots__ = ('numero_os', 'processo', 'acumulado', 'inicio', 'status', 'processos', '_posicoes')
+
+    def __init__(self, numero_os, processo, acumulado, inicio, status, processos):
+        self.numero_os = numero_os
+        self.processo = processo
+        self.acumulado = acumulado
+        self.inicio = inicio
+        self.status = status
+        self.processos = processos
+        self._posicoes = {
+            (int(os_), processos[codigo]): posicao
+            for posicao, (os_, codigo) in enumerate(zip(numero_os.tolist(), processo.tolist()))
+        }
+
+    @classmethod
+    def de_registros(cls, registros):
+        """Monta os arrays a partir de RegistroTempo"""
+        registros = list(registros)
+        processos = []
+        codigos = {}
+        processo = []
+        for registro in registros:
+            codigo = codigos.get(registro.processo)
+            if codigo is None:
+                codigo = codigos[registro.processo] = len(processos)
+                processos.append(registro.processo)
+            processo.append(codigo)
+        return cls(
+            np.array([int(registro.numero_os) for registro in registros], dtype=np.int64),
+            np.array(processo, dtype=np.int16),
+            np.array([registro.tempo_total for registro in registros], dtype=np.float64),
+            np.array([registro.inicio or SEM_INICIO for registro in registros], dtype=np.int64),
+            np.array([STATUS_CODIGOS.get(registro.status, 0) for registro in registros], dtype=np.int8),
+            processos,
+        )
+
+    @classmethod
+    def de_linhas(cls, linhas):
+        """Monta os arrays a partir de linhas do CSV (dicts)"""
+        return cls.de_registros(registro_de_linha(linha) for linha in linhas)
+
+    @classmethod
+    def de_colunas(cls, numero_os, processo, acumulado, inicio, status):
+        """Monta os arrays direto das colunas (ex.: Series já em epoch ms), sem passar linha a linha"""
+        processo = np.asarray(processo)
+        if processo.dtype.kind not in "iu":
+            # Nomes (ou códigos misturados com nomes fora do catálogo): compara como texto
+            processo = processo.astype(object).astype(str)
+        processos, codigos = np.unique(processo, return_inverse=True)
+        inicio = np.nan_to_num(np.asarray(inicio, dtype=np.float64), nan=SEM_INICIO)
+        return cls(
+            np.asarray(numero_os, dtype=np.int64),
+            codigos.astype(np.int16),
+            np.nan_to_num(np.asarray(acumulado, dtype=np.float64)),
+            inicio.astype(np.int64),
+            np.array([STATUS_CODIGOS.get(valor, 0) for valor in status], dtype=np.int8),
+            processos.tolist(),
+        )
+
+    def __len__(self):
+        return len(self.numero_os)
+
+    def posicao(self, numero_os, processo):
+        """Índice do processo nos arrays, ou -1"""
+        return self._posicoes.get((int(numero_os), processo), -1)
+
+    def rodando(self):
+        """Máscara dos cronômetros em andamento"""
+        return (self.status == STATUS_CODIGOS[EM_ANDAMENTO]) & (self.inicio != SEM_INICIO)
+
+    def tempos_atuais(self, agora=None):
+        """Tempo acumulado de todos os cronômetros, incluindo o trecho em andamento"""
+        agora = agora_ms() if agora is None else agora
+        rodando = self.rodando()
+        decorrido = np.zeros(len(self.acumulado))
+        decorrido[rodando] = decorrido_em_lote(self.inicio[rodando], agora)
+        return self.acumulado + decorrido
+
+    def iniciar(self, selecao=None, agora=None):
+        """Inicia de uma vez os cronômetros selecionados (máscara; todos se None); retorna a máscara dos alterados"""
+        agora = agora_ms() if agora is None else agora
+        alterados = self.status != STATUS_CODIGOS[EM_ANDAMENTO]
+        if selecao is not None:
+            alterados &= selecao
+        self.status[alterados] = STATUS_CODIGOS[EM_ANDAMENTO]
+        self.inicio[alterados] = agora
+        return alterados
+
+    def pausar(self, selecao=None, agora=None):
+        """Acumula o trecho em andamento e pausa de uma vez; retorna a máscara dos alterados
+
+        agora pode ser um array com o instante de pausa de cada cronômetro.
+        """
+        agora = agora_ms() if agora is None else agora
+        alterados = self.inicio != SEM_INICIO
+        if selecao is not None:
+            alterados &= selecao
+        fim = agora[alterados] if np.ndim(agora) else agora
+        self.acumulado[alterados] += decorrido_em_lote(self.inicio[alterados], fim)
+        self.status[alterados] = STATUS_CODIGOS[PAUSADO]
+        self.inicio[alterados] = SEM_INICIO
+        return alterados
+
+    def finalizar(self, selecao=None, agora=None):
+        """Pausa (se rodando) e marca como finalizados de uma vez; retorna a máscara dos alterados"""
+        agora = agora_ms() if agora is None else agora
+        self.pausar(selecao, agora)
+        alterados = self.status != STATUS_CODIGOS[FINALIZADO]
+        if selecao is not None:
+            alterados &= selecao
+        self.status[alterados] = STATUS_CODIGOS[FINALIZADO]
+        return alterados
+
+    def tempo_atual(self, numero_os, processo, tempos=None):
+        """(segundos, status) de um processo; aceita o resultado de tempos_atuais já calculado"""
+        posicao = self.posicao(numero_os, processo)
+        if posicao < 0:
+            return 0, NAO_INICIADO
+        if tempos is None:
+            tempos = self.tempos_atuais()
+        return float(tempos[posicao]), STATUS_NOMES[self.status[posicao]]
@@ -0,0 +1,178 @@
+import io
+import os
+
+import pandas as pd
+
+from mesclagem import CHAVES_TEMPOS
+
+# Histórico de processos finalizados, um CSV por mês de data_atualizacao
+PASTA_HISTORICO = "tempos_historico"
+ARQUIVO_ATIVO = "tempos_processos.csv"
+
+# Arquivo colunar (Parquet) das OS finalizadas e seus tempos, lido só nos relatórios: um arquivo
+# por tipo e mês de arquivamento, e cada Finalizar regrava só as partições do mês corrente.
+# As linhas de uma OS finalizada pertencem ao arquivo morto (saem dos ativos e do histórico)
+PASTA_ARQUIVO_MORTO = "arquivo_morto"
+ARQUIVO_MORTO_OS = "ordens"
+ARQUIVO_MORTO_TEMPOS = "tempos"
+# Arquivo único de antes das partições, lido como a partição mais antiga
+ARQUIVO_MORTO_LEGADO = {ARQUIVO_MORTO_OS: "arquivo_ordens.parquet", ARQUIVO_MORTO_TEMPOS: "arquivo_tempos.parquet"}
+
+
+def caminho_particao(mes):
+    """Caminho do CSV de histórico de um mês (AAAA-MM)"""
+    return f"{PASTA_HISTORICO}/tempos_{mes}.csv"
+
+
+def meses_das_linhas(df):
+    """Mês (AAAA-MM, UTC) de cada linha, pela data_atualizacao em epoch ms"""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    datas = pd.to_datetime(pd.to_numeric(df['data_atualizacao'], errors='coerce'), unit='ms', utc=True)
+    return datas.dt.strftime('%Y-%m').astype(object).fillna('sem-data')
+
+
+def separar_tempos(df):
+    """Separa os tempos em ativos (em andamento/pausados) e finalizados"""
+    finalizado = df['status'] == 'finalizado'
+    return df[~finalizado].reset_index(drop=True), df[finalizado].reset_index(drop=True)
+
+
+def juntar_tempos(historico, ativos):
+    """Junta histórico e ativos; se uma linha estiver nos dois, vale a ativa"""
+    partes = [df for df in (historico, ativos) if df is not None and not df.empty]
+    if not partes:
+        return ativos.copy()
+    df = pd.concat(partes, ignore_index=True)
+    return df.drop_duplicates(subset=CHAVES_TEMPOS, keep='last').reset_index(drop=True)
+
+
+def _assinaturas(df):
+    """Conjunto (numero_os, processo, tempo, status, início, data_atualizacao, mês) de cada linha"""
+    if df is None or df.empty:
+        return set()
+    numero_os = pd.to_numeric(df['numero_os'], errors='coerce').astype('Int64').astype(str)
+    # Valores numéricos em um só tipo: o mesmo tempo lido do CSV (inteiro) e editado (real) não conta como mudança
+    tempo, inicio = (pd.to_numeric(df[coluna], errors='coerce').astype('Float64').astype('string').fillna('')
+                     for coluna in ('tempo_total_segundos', 'inicio_atual'))
+    return set(zip(numero_os, df['processo'].astype(str), tempo, df['status'].astype('string').fillna(''), inicio,
+                   df['data_atualizacao'].astype('string').fillna(''), meses_das_linhas(df)))
+
+
+def meses_alterados(finalizados, historico):
+    """Meses cujas linhas finalizadas (chaves ou valores) diferem do histórico carregado"""
+    diferenca = _assinaturas(finalizados) ^ _assinaturas(historico)
+    return sorted({assinatura[-1] for assinatura in diferenca})
+
+
+def carregar_historico_local():
+    """Lê e concatena os CSVs de histórico salvos localmente"""
+    if not os.path.isdir(PASTA_HISTORICO):
+        return None
+    partes = []
+    for nome in sorted(os.listdir(PASTA_HISTORICO)):
+        if nome.endswith('.csv'):
+            try:
+                partes.append(pd.read_csv(os.path.join(PASTA_HISTORICO, nome)))
+            except Exception:
+                pass
+    if not partes:
+        return None
+    return pd.concat(partes, ignore_index=True)
+
+
+def salvar_particao_local(mes, df):
+    """Grava o CSV de histórico de um mês como backup local"""
+    os.makedirs(PASTA_HISTORICO, exist_ok=True)
+    df.to_csv(caminho_particao(mes), index=False)
+
+
+def _tipos_para_parquet(df):
+    """Uniformiza colunas de texto/número misturados para gravação em Parquet"""
+    df = df.copy()
+    for coluna in df.columns:
+        if df[coluna].dtype == object:
+            numerico = pd.to_numeric(df[coluna], errors='coerce')
+            if numerico.notna().sum() == df[coluna].notna().sum():
+                df[coluna] = numerico
+            else:
+                df[coluna] = df[coluna].astype('string')
+    return df
+
+
+def para_parquet(df):
+    """Serializa o DataFrame em Parquet comprimido (bytes)"""
+    buffer = io.BytesIO()
+    _tipos_para_parquet(df).to_parquet(buffer, index=False, compression='zstd')
+    return buffer.getvalue()
+
+
+def de_parquet(dados):
+    """Lê Parquet a partir de bytes"""
+    return pd.read_parquet(io.BytesIO(dados))
+
+
+def caminho_arquivo_morto(tipo, mes):
+    """Caminho da partição do arquivo morto de um tipo (ordens/tempos) e mês (AAAA-MM)"""
+    return f"{PASTA_ARQUIVO_MORTO}/{tipo}_{mes}.parquet"
+
+
+def mes_atual():
+    """Mês corrente (AAAA-MM, UTC): partição que recebe as OS arquivadas agora"""
+    return pd.Timestamp.now(tz='UTC').strftime('%Y-%m')
+
+
+def particoes_arquivo_morto(caminhos, tipo):
+    """Caminhos das partições de um tipo, da mais antiga (arquivo legado) à mais recente"""
+    prefixo = f"{PASTA_ARQUIVO_MORTO}/{tipo}_"
+    legado = [caminho for caminho in caminhos if caminho == ARQUIVO_MORTO_LEGADO[tipo]]
+    return legado + sorted(caminho for caminho in caminhos
+                           if caminho.startswith(prefixo) and caminho.endswith('.parquet'))
+
+
+def ler_parquet_local(caminho):
+    """Lê um arquivo Parquet local, se existir"""
+    if not os.path.exists(caminho):
+        return None
+    try:
+        return pd.read_parquet(caminho)
+    except Exception:
+        return None
+
+
+def carregar_arquivo_morto_local(tipo, pasta="."):
+    """Lê e concatena as partições locais do arquivo morto (a mais recente por último)"""
+    caminhos = [ARQUIVO_MORTO_LEGADO[tipo]]
+    if os.path.isdir(os.path.join(pasta, PASTA_ARQUIVO_MORTO)):
+        caminhos += [f"{PASTA_ARQUIVO_MORTO}/{nome}" for nome in os.listdir(os.path.join(pasta, PASTA_ARQUIVO_MORTO))]
+    partes = [ler_parquet_local(os.path.join(pasta, caminho)) for caminho in particoes_arquivo_morto(caminhos, tipo)]
+    partes = [df for df in partes if df is not None]
+    if not partes:
+        return None
+    return pd.concat([_tipos_para_parquet(df) for df in partes], ignore_index=True)
+
+
+def anexar_ao_arquivo_morto(arquivo, novos, chaves):
+    """Acrescenta linhas ao arquivo morto; chave repetida fica com a versão nova"""
+    partes = [df for df in (arquivo, novos) if df is not None and not df.empty]
+    if not partes:
+        return novos.copy()
+    df = pd.concat([_tipos_para_parquet(df) for df in partes], ignore_index=True)
+    return df.drop_duplicates(subset=chaves, keep='last').reset_index(drop=True)
+
+
+def separar_os_finalizadas(df_os, df_tempos):
+    """Separa OS finalizadas (e seus tempos) do conjunto de trabalho"""
+    finalizada = df_os['status_os'] == 'finalizada'
+    numeros = df_os.loc[finalizada, 'numero_os']
+    do_arquivo = df_tempos['numero_os'].isin(numeros)
+    return (df_os[~finalizada].reset_index(drop=True), df_tempos[~do_arquivo].reset_index(drop=True),
+            df_os[finalizada].reset_index(drop=True), df_tempos[do_arquivo].reset_index(drop=True))
+
+
+def juntar_com_arquivo_morto(df_trabalho, df_arquivo, chaves):
+    """Junta conjunto de trabalho e arquivo morto para relatórios"""
+    if df_arquivo is None or df_arquivo.empty:
+        return df_trabalho
+    df = pd.concat([_tipos_para_parquet(df_arquivo), df_trabalho], ignore_index=True)
+    return df.drop_duplicates(subset=chaves, keep='last').reset_index(drop=True)
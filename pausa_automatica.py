@@ -0,0 +1,249 @@
+"""Pausa automática de cronômetros esquecidos em andamento
+
+Pausa, numa única varredura vetorizada, os cronômetros que passaram de um
+horário de fim de turno ou de uma duração contínua máxima. O tempo é contado
+só até o limite (fim do turno ou início + duração máxima), e cada pausa fica
+registrada no CSV de auditoria, gravado junto com os dados (local ou GitHub).
+No GitHub, dados e auditoria são commits separados: a auditoria é gravada logo
+depois, na mesma rodada, e é idempotente (pausas já registradas são ignoradas);
+se falhar, o daemon a regrava na rodada seguinte.
+
+Roda dentro do app (no máximo uma vez por intervalo) ou como processo à parte:
+    python pausa_automatica.py --uma-vez                  # cron, arquivo local
+    python pausa_automatica.py --github --intervalo 60    # daemon, um commit por rodada
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import intervalos
+import motor_tempos
+from catalogo_processos import CATALOGO
+from lote_tempos import tempos_em_arrays, gravar_arrays
+from migracao_datas import normalizar_tempos
+from particionamento import ARQUIVO_ATIVO
+
+# Horários (HH:MM, hora local) de fim de turno, separados por vírgula; vazio desativa
+HORARIOS_FIM_TURNO = os.environ.get("PAUSA_FIM_TURNO", "")
+# Duração contínua máxima de um cronômetro em andamento (horas); 0 (padrão) desativa
+DURACAO_MAXIMA_HORAS = float(os.environ.get("PAUSA_DURACAO_MAXIMA_HORAS", 0))
+# Intervalo mínimo entre execuções dentro do app (segundos)
+INTERVALO_EXECUCAO = int(os.environ.get("PAUSA_INTERVALO", 60))
+
+ARQUIVO_AUDITORIA = "auditoria_pausas.csv"
+COLUNAS_AUDITORIA = ['executado_em', 'numero_os', 'processo', 'motivo', 'inicio_atual', 'pausado_em',
+                     'segundos_descartados']
+# Identifica uma pausa: regravar a mesma auditoria não duplica linhas
+CHAVES_AUDITORIA = ['executado_em', 'numero_os', 'processo']
+
+_ultima_execucao = None
+_lock_execucao = threading.Lock()
+
+
+def ler_horarios(texto):
+    """'12:00, 18:00' -> [(12, 0), (18, 0)]"""
+    horarios = []
+    for parte in (texto or "").split(","):
+        parte = parte.strip()
+        if parte:
+            hora, minuto = parte.split(":")
+            horarios.append((int(hora), int(minuto)))
+    return horarios
+
+
+def ultimo_fim_de_turno(agora, horarios):
+    """Epoch ms do fim de turno mais recente até agora (hora local), ou None"""
+    if not horarios:
+        return None
+    data = motor_tempos.ms_para_datetime(agora)
+    candidatos = []
+    for hora, minuto in horarios:
+        fim = data.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        if fim > data:
+            fim -= timedelta(days=1)
+        candidatos.append(fim)
+    return int(max(candidatos).timestamp() * 1000)
+
+
+def selecionar_para_pausa(tempos, agora, horarios, duracao_maxima_horas):
+    """Máscara dos cronômetros a pausar, instante de pausa de cada um (ms) e motivo"""
+    rodando = tempos.rodando()
+    fim = np.full(len(tempos), agora, dtype=np.int64)
+    motivo = np.full(len(tempos), '', dtype=object)
+
+    if duracao_maxima_horas > 0:
+        limite = tempos.inicio + int(duracao_maxima_horas * 3600 * 1000)
+        estourou = rodando & (limite < agora)
+        fim[estourou] = limite[estourou]
+        motivo[estourou] = f"duração máxima ({duracao_maxima_horas:g} h)"
+
+    fim_turno = ultimo_fim_de_turno(agora, horarios)
+    if fim_turno is not None:
+        # Começou antes do fim de turno e ainda está rodando: conta só até o fim do turno
+        passou = rodando & (tempos.inicio < fim_turno) & (fim_turno < fim)
+        fim[passou] = fim_turno
+        motivo[passou] = f"fim de turno ({motor_tempos.formatar_data(fim_turno, '%H:%M')})"
+
+    return motivo != '', fim, motivo
+
+
+def pausar_esquecidos(df, agora=None, horarios=None, duracao_maxima_horas=None):
+    """Pausa no DataFrame (no lugar) os cronômetros esquecidos; retorna a auditoria das pausas"""
+    agora = motor_tempos.agora_ms() if agora is None else agora
+    horarios = ler_horarios(HORARIOS_FIM_TURNO) if horarios is None else horarios
+    duracao_maxima_horas = DURACAO_MAXIMA_HORAS if duracao_maxima_horas is None else duracao_maxima_horas
+
+    linhas = df.index[df['status'] == motor_tempos.EM_ANDAMENTO]
+    if len(linhas) == 0:
+        return pd.DataFrame(columns=COLUNAS_AUDITORIA)
+
+    tempos = tempos_em_arrays(df.loc[linhas])
+    selecao, fim, motivo = selecionar_para_pausa(tempos, agora, horarios, duracao_maxima_horas)
+    if not selecao.any():
+        return pd.DataFrame(columns=COLUNAS_AUDITORIA)
+
+    inicio = tempos.inicio[selecao]
+    alterados = tempos.pausar(selecao, agora=fim)
+    # Atualizado no instante da pausa (fim real do trecho), não no da varredura
+    gravar_arrays(df, linhas, tempos, alterados, fim)
+
+    return pd.DataFrame({
+        'executado_em': agora,
+        'numero_os': tempos.numero_os[selecao],
+        'processo': [tempos.processos[codigo] for codigo in tempos.processo[selecao]],
+        'motivo': motivo[selecao],
+        'inicio_atual': inicio,
+        'pausado_em': fim[selecao],
+        'segundos_descartados': (agora - fim[selecao]) / 1000,
+    })
+
+
+def ler_auditoria(conteudo):
+    """Auditoria das pausas automáticas a partir do CSV (bytes), mais recentes primeiro"""
+    if not conteudo:
+        return pd.DataFrame(columns=COLUNAS_AUDITORIA)
+    return pd.read_csv(io.BytesIO(conteudo)).iloc[::-1].reset_index(drop=True)
+
+
+def registrar_auditoria(armazem, auditoria, mensagem):
+    """Acrescenta as pausas automáticas ao CSV de auditoria de um armazém (ClienteGitHub ou ArquivosLocais)
+
+    Idempotente: pausas já registradas (mesmas CHAVES_AUDITORIA) não são gravadas de novo.
+    """
+    if auditoria.empty:
+        return
+    for tentativa in range(3):
+        conteudo, sha = armazem.ler(ARQUIVO_AUDITORIA)
+        anteriores = ler_auditoria(conteudo).iloc[::-1]
+        df = pd.concat([parte for parte in (anteriores, auditoria) if not parte.empty], ignore_index=True)
+        df = df.drop_duplicates(subset=CHAVES_AUDITORIA, ignore_index=True)
+        if len(df) == len(anteriores):
+            return
+        if armazem.gravar(ARQUIVO_AUDITORIA, df[COLUNAS_AUDITORIA].to_csv(index=False), sha, mensagem):
+            return
+    raise RuntimeError(f"Não foi possível gravar {ARQUIVO_AUDITORIA} (conflito de versão)")
+
+
+def carregar_auditoria(armazem):
+    """Auditoria das pausas automáticas de um armazém (mais recentes primeiro)"""
+    return ler_auditoria(armazem.ler(ARQUIVO_AUDITORIA)[0])
+
+
+def deve_executar(intervalo=INTERVALO_EXECUCAO):
+    """True no máximo uma vez por intervalo no processo (compartilhado entre as sessões do app)"""
+    global _ultima_execucao
+    agora = time.monotonic()
+    with _lock_execucao:
+        if _ultima_execucao is not None and agora - _ultima_execucao < intervalo:
+            return False
+        _ultima_execucao = agora
+        return True
+
+
+def _executar_local(caminho):
+    """Uma rodada sobre o CSV local de tempos ativos"""
+    from cliente_github import ArquivosLocais
+
+    df = normalizar_tempos(pd.read_csv(caminho))
+    antes = df.copy()
+    auditoria = pausar_esquecidos(df)
+    if not auditoria.empty:
+        df.to_csv(caminho, index=False)
+        intervalos.gravar_intervalos(ArquivosLocais(os.path.dirname(caminho) or "."),
+                                     intervalos.intervalos_fechados(antes, df), None)
+    return auditoria
+
+
+def _executar_github():
+    """Uma rodada sobre o CSV de tempos ativos do GitHub, gravada num único commit"""
+    from cliente_github import ClienteGitHub
+
+    cliente = ClienteGitHub()
+    for tentativa in range(2):
+        conteudo, sha = cliente.ler(ARQUIVO_ATIVO)
+        if conteudo is None:
+            return pd.DataFrame(columns=COLUNAS_AUDITORIA)
+        df = normalizar_tempos(pd.read_csv(io.BytesIO(conteudo)))
+        antes = df.copy()
+        auditoria = pausar_esquecidos(df)
+        if auditoria.empty:
+            return auditoria
+        mensagem = f"Pausa automática de {len(auditoria)} cronômetro(s) - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        if cliente.gravar(ARQUIVO_ATIVO, df.to_csv(index=False), sha, mensagem):
+            intervalos.gravar_intervalos(cliente, intervalos.intervalos_fechados(antes, df), mensagem)
+            return auditoria
+    raise RuntimeError("Não foi possível gravar no GitHub (conflito de versão)")
+
+
+def main():
+    global HORARIOS_FIM_TURNO, DURACAO_MAXIMA_HORAS
+
+    parser = argparse.ArgumentParser(description="Pausa automática de cronômetros esquecidos")
+    parser.add_argument("--github", action="store_true", help="usa o GitHub (GITHUB_TOKEN no ambiente)")
+    parser.add_argument("--arquivo", default=ARQUIVO_ATIVO, help="CSV local de tempos ativos (sem --github)")
+    parser.add_argument("--fim-turno", default=HORARIOS_FIM_TURNO, help="horários HH:MM separados por vírgula")
+    parser.add_argument("--duracao-maxima", type=float, default=DURACAO_MAXIMA_HORAS, help="horas; 0 desativa")
+    parser.add_argument("--intervalo", type=int, default=INTERVALO_EXECUCAO, help="segundos entre rodadas")
+    parser.add_argument("--uma-vez", action="store_true", help="executa uma rodada e sai")
+    args = parser.parse_args()
+
+    HORARIOS_FIM_TURNO = args.fim_turno
+    DURACAO_MAXIMA_HORAS = args.duracao_maxima
+
+    from cliente_github import ArquivosLocais, ClienteGitHub
+
+    # Auditoria no mesmo lugar dos dados (no GitHub, um commit por rodada com pausas)
+    armazem = ClienteGitHub() if args.github else ArquivosLocais(os.path.dirname(args.arquivo) or ".")
+    # Pausas já gravadas nos dados cuja auditoria ainda não foi gravada (regravadas na próxima rodada)
+    pendentes = pd.DataFrame(columns=COLUNAS_AUDITORIA)
+    while True:
+        try:
+            auditoria = _executar_github() if args.github else _executar_local(args.arquivo)
+            for linha in auditoria.itertuples(index=False):
+                print(f"{motor_tempos.formatar_data(linha.executado_em)} OS {linha.numero_os} - "
+                      f"{CATALOGO.nome(linha.processo)}: {linha.motivo}")
+            if not auditoria.empty:
+                pendentes = pd.concat([parte for parte in (pendentes, auditoria) if not parte.empty],
+                                      ignore_index=True)
+            registrar_auditoria(armazem, pendentes,
+                                f"Auditoria de pausas automáticas - {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+            pendentes = pendentes.iloc[0:0]
+        except Exception as erro:
+            if args.uma_vez:
+                raise
+            # Daemon: uma rodada com falha (rede, conflito) não derruba as próximas
+            print(f"{datetime.now().strftime('%d/%m/%Y %H:%M:%S')} ERRO na rodada: {erro!r}", file=sys.stderr)
+        if args.uma_vez:
+            break
+        time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
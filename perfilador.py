@@ -0,0 +1,95 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Pasta onde ficam os dumps (.prof) das execuções perfiladas
+PASTA_PERFIS = "perfis"
+
+# Até o Python 3.11 o cProfile usa o gancho de perfil da thread que o liga; a partir do 3.12 usa o
+# sys.monitoring, do processo inteiro, e o dump misturaria as execuções das outras sessões
+PERFIL_POR_SESSAO = sys.version_info < (3, 12)
+
+
+def ativar(estado, execucoes):
+    """Agenda o perfil das próximas N execuções do script para esta sessão; False se indisponível"""
+    if not PERFIL_POR_SESSAO:
+        return False
+    estado['perfil_restantes'] = max(0, int(execucoes))
+    return True
+
+
+def disponivel(estado):
+    """Perfil possível nesta sessão: app aberto por execucao (app_perfilado.py) e Python até 3.11"""
+    return PERFIL_POR_SESSAO and estado.get('perfil_disponivel', False)
+
+
+@contextmanager
+def execucao(estado):
+    """Envolve uma execução inteira do script: o perfil é encerrado ao sair, também em st.rerun/st.stop"""
+    estado['perfil_disponivel'] = True
+    iniciar_execucao(estado)
+    try:
+        yield
+    finally:
+        encerrar_execucao(estado)
+
+
+def iniciar_execucao(estado):
+    """Inicia o perfil desta execução, se agendado (encerrar_execucao ao fim da mesma execução)"""
+    if not PERFIL_POR_SESSAO or estado.get('perfil_restantes', 0) <= 0:
+        return
+
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        # Outro perfilador já ativo nesta thread
+        return
+    estado['perfil_ativo'] = (perfil, threading.get_ident())
+    estado['perfil_restantes'] -= 1
+
+
+def encerrar_execucao(estado):
+    """Desliga o perfil desta execução e grava o dump; retorna o caminho ou None"""
+    ativo = estado.pop('perfil_ativo', None)
+    if ativo is None:
+        return None
+
+    perfil, thread = ativo
+    if thread != threading.get_ident():
+        # Só a thread que ligou o perfil consegue desligá-lo (o dump teria outras execuções)
+        return None
+    perfil.disable()
+    os.makedirs(PASTA_PERFIS, exist_ok=True)
+    caminho = os.path.join(PASTA_PERFIS, f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.prof")
+    perfil.dump_stats(caminho)
+    estado.setdefault('perfis_gerados', []).append(caminho)
+    return caminho
+
+
+def listar_perfis():
+    """Dumps gravados, do mais recente para o mais antigo"""
+    if not os.path.isdir(PASTA_PERFIS):
+        return []
+    nomes = [nome for nome in os.listdir(PASTA_PERFIS) if nome.endswith('.prof')]
+    return [os.path.join(PASTA_PERFIS, nome) for nome in sorted(nomes, reverse=True)]
+
+
+def resumo_perfil(caminho, limite=25):
+    """Funções com maior tempo acumulado em um dump"""
+    estatisticas = pstats.Stats(caminho).stats
+    linhas = []
+    for (arquivo, linha, funcao), (_, chamadas, tempo_proprio, tempo_acumulado, _) in estatisticas.items():
+        linhas.append({
+            'funcao': funcao,
+            'local': f"{os.path.basename(arquivo)}:{linha}",
+            'chamadas': chamadas,
+            'tempo_proprio_ms': round(tempo_proprio * 1000, 2),
+            'tempo_acumulado_ms': round(tempo_acumulado * 1000, 2),
+        })
+    linhas.sort(key=lambda item: item['tempo_acumulado_ms'], reverse=True)
+    return linhas[:limite]
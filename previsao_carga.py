@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import lote_tempos
+import motor_tempos
+from cadastro_produtos import anexar_produtos
+from catalogo_processos import CATALOGO
+
+# Previsão da fila das OS ativas em cada estação (processo): o trabalho restante é o tempo
+# padrão por peça × quantidade menos o tempo já apontado, e cada estação atende as OS
+# na ordem de cadastro, turno após turno
+HORAS_TURNO = float(os.environ.get("PREVISAO_HORAS_TURNO", 0) or 8)
+TURNOS_EXIBIDOS = 10
+# Postos de trabalho em paralelo por estação (código do processo -> quantidade); as demais têm 1
+POSTOS = {}
+
+
+def trabalho_restante(df_os, df_tempos, estimador, dimensao, catalogo=CATALOGO, agora=None):
+    """Uma linha por (OS ativa, processo do roteiro), na ordem da fila, com segundos previstos, apontados e restantes"""
+    colunas = ['numero_os', 'produto', 'quantidade', 'processo', 'previsto_segundos', 'apontado_segundos',
+               'restante_segundos', 'status']
+    ordens = df_os[df_os['status_os'] == 'ativa']
+    if ordens.empty:
+        return pd.DataFrame(columns=colunas)
+
+    # Fila: ordem de cadastro (a OS de número menor desempata)
+    ordens = ordens.assign(numero_os=pd.to_numeric(ordens['numero_os'], errors='coerce'),
+                           quantidade=pd.to_numeric(ordens['quantidade'], errors='coerce').fillna(0))
+    ordens = ordens.dropna(subset=['numero_os']).astype({'numero_os': 'int64'})
+    ordens = anexar_produtos(ordens.sort_values(['data_criacao', 'numero_os'], kind='stable'), dimensao)
+    roteiros = {produto: catalogo.processos_do_produto(produto) for produto in ordens['produto'].unique()}
+    df = ordens.assign(processo=ordens['produto'].map(roteiros)).explode('processo', ignore_index=True)
+    df = df.dropna(subset=['processo']).astype({'processo': 'int64'})
+
+    # Tempo padrão por peça: uma consulta por combinação distinta de processo, linha e formato
+    combinacoes = df[['processo', 'linha', 'formato']].drop_duplicates()
+    padroes = [(estimador.tempo_padrao(p, l, f)[0] or {}).get('p50', np.nan)
+               for p, l, f in combinacoes.itertuples(index=False, name=None)]
+    combinacoes = combinacoes.assign(por_peca=padroes)
+    df = df.merge(combinacoes, on=['processo', 'linha', 'formato'], how='left')
+
+    # Tempo já apontado (com o trecho em andamento) e status de cada processo
+    tempos = df_tempos[df_tempos['numero_os'].isin(ordens['numero_os'])].reset_index(drop=True)
+    apontado = pd.DataFrame({
+        'numero_os': pd.to_numeric(tempos['numero_os']).astype('int64'),
+        'processo': tempos['processo'],
+        'apontado_segundos': lote_tempos.tempos_em_arrays(tempos).tempos_atuais(agora) if len(tempos) else [],
+        'status': tempos['status'],
+    }).drop_duplicates(subset=['numero_os', 'processo'], keep='last')
+    df = df.merge(apontado, on=['numero_os', 'processo'], how='left')
+    df['apontado_segundos'] = df['apontado_segundos'].fillna(0.0)
+    df['status'] = df['status'].fillna(motor_tempos.NAO_INICIADO)
+
+    df['previsto_segundos'] = df['por_peca'] * df['quantidade']
+    restante = (df['previsto_segundos'] - df['apontado_segundos']).clip(lower=0)
+    df['restante_segundos'] = restante.where(df['status'] != motor_tempos.FINALIZADO, 0.0)
+    return df[colunas]
+
+
+def projetar_filas(trabalho, horas_turno=HORAS_TURNO, turnos=TURNOS_EXIBIDOS, postos=None):
+    """(resumo por estação, horas de carga por estação × turno, término previsto de cada OS em turnos)"""
+    postos = POSTOS if postos is None else postos
+    estacoes, estacao = np.unique(trabalho['processo'].to_numpy(dtype=np.int64), return_inverse=True)
+    restante = np.nan_to_num(trabalho['restante_segundos'].to_numpy(dtype=np.float64))
+    capacidade = np.array([postos.get(int(p), 1) for p in estacoes], dtype=np.float64) * horas_turno * 3600
+
+    # Fila de cada estação: soma acumulada na ordem das OS, descontado o total das estações anteriores
+    ordem = np.argsort(estacao, kind='stable')
+    total = np.bincount(estacao, weights=restante, minlength=len(estacoes))
+    acumulado = np.cumsum(restante[ordem]) - np.concatenate(([0.0], np.cumsum(total)[:-1]))[estacao[ordem]]
+    fim = np.empty_like(restante)
+    fim[ordem] = acumulado
+    termino = np.where(restante > 0, fim / capacidade[estacao], 0.0)
+
+    # Carga de cada turno: o que resta da fila no início dele, limitado à capacidade
+    inicio_turno = capacidade[:, None] * np.arange(turnos)[None, :]
+    carga = np.clip(total[:, None] - inicio_turno, 0, capacidade[:, None]) / 3600
+
+    nomes = [CATALOGO.nome(int(p)) for p in estacoes]
+    fila = restante > 0
+    resumo = pd.DataFrame({
+        'processo': estacoes,
+        'estacao': nomes,
+        'postos': capacidade / (horas_turno * 3600),
+        'os_na_fila': np.bincount(estacao[fila], minlength=len(estacoes)),
+        'restante_horas': total / 3600,
+        'turnos': total / capacidade,
+        'sem_tempo_padrao': np.bincount(estacao, weights=trabalho['previsto_segundos'].isna().to_numpy(),
+                                        minlength=len(estacoes)).astype(int),
+    })
+    carga = pd.DataFrame(carga, index=nomes, columns=[f"Turno {k + 1}" for k in range(turnos)])
+
+    por_os = pd.DataFrame({'numero_os': trabalho['numero_os'].to_numpy(), 'restante_segundos': restante,
+                           'termino_turnos': termino, 'sem_padrao': trabalho['previsto_segundos'].isna().to_numpy()})
+    ordens = por_os.groupby('numero_os', sort=False).agg(
+        restante_segundos=('restante_segundos', 'sum'), termino_turnos=('termino_turnos', 'max'),
+        processos_sem_padrao=('sem_padrao', 'sum'))
+    ordens = trabalho.drop_duplicates('numero_os').set_index('numero_os')[['produto', 'quantidade']].join(ordens)
+    return resumo, carga, ordens.reset_index()
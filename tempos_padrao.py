@@ -0,0 +1,145 @@
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cadastro_produtos import anexar_produtos, interpretar_produtos
+
+# Tempo padrão por peça de cada processo, a partir das OS finalizadas: uma amostra por
+# processo (tempo total / quantidade da OS), agrupada por processo, linha e formato do produto.
+# Sem amostras suficientes no grupo mais específico, cai para um nível mais geral
+NIVEIS = [('processo', 'linha', 'formato'), ('processo', 'formato'), ('processo', 'linha'), ('processo',)]
+DESCRICAO_NIVEIS = ["linha e formato", "formato", "linha", "todos os produtos"]
+MINIMO_AMOSTRAS = 3
+# Amostras fora de [Q1 - k·IQR, Q3 + k·IQR] são descartadas (cronômetro esquecido, OS parcial)
+FATOR_IQR = 1.5
+
+
+def amostras_por_peca(df_tempos, df_os, dimensao):
+    """Segundos por peça de cada processo finalizado de OS finalizada, com linha e formato do produto"""
+    colunas = ['numero_os', 'processo', 'linha', 'formato', 'segundos_por_peca']
+    if df_tempos.empty or df_os.empty:
+        return pd.DataFrame(columns=colunas)
+
+    tempos = df_tempos[df_tempos['status'] == 'finalizado']
+    tempos = tempos.assign(numero_os=pd.to_numeric(tempos['numero_os'], errors='coerce'))
+    ordens = df_os[df_os['status_os'] == 'finalizada']
+    ordens = ordens.assign(numero_os=pd.to_numeric(ordens['numero_os'], errors='coerce'),
+                           quantidade=pd.to_numeric(ordens['quantidade'], errors='coerce'))
+    ordens = anexar_produtos(ordens.drop_duplicates(subset='numero_os', keep='last'), dimensao)
+
+    df = tempos.merge(ordens[['numero_os', 'quantidade', 'linha', 'formato']], on='numero_os')
+    df = df[(df['quantidade'] > 0) & (df['tempo_total_segundos'] > 0)]
+    return df.assign(numero_os=df['numero_os'].astype('int64'),
+                     segundos_por_peca=df['tempo_total_segundos'] / df['quantidade'])[colunas]
+
+
+def _grupos_da_amostra(processo, linha, formato):
+    """Chave de cada nível em que a amostra entra (níveis com atributo desconhecido ficam de fora)"""
+    valores = {'processo': processo, 'linha': linha, 'formato': formato}
+    grupos = []
+    for nivel, atributos in enumerate(NIVEIS):
+        chave = tuple(valores[a] for a in atributos)
+        if not any(v is None or v != v for v in chave):
+            grupos.append((nivel,) + chave)
+    return grupos
+
+
+def estatisticas(valores, fator_iqr=FATOR_IQR):
+    """Percentis dos segundos por peça (lista ordenada) após descartar os valores fora das cercas do IQR"""
+    valores = np.asarray(valores, dtype='float64')
+    q1, q3 = np.percentile(valores, [25, 75])
+    iqr = q3 - q1
+    aparados = valores[(valores >= q1 - fator_iqr * iqr) & (valores <= q3 + fator_iqr * iqr)]
+    p25, p50, p75, p90 = np.percentile(aparados, [25, 50, 75, 90])
+    return {'amostras': len(aparados), 'descartadas': len(valores) - len(aparados),
+            'p25': p25, 'p50': p50, 'p75': p75, 'p90': p90, 'media': aparados.mean()}
+
+
+class EstimadorTempos:
+    """Amostras ordenadas por grupo; ao finalizar uma OS só os grupos dela são recalculados"""
+
+    def __init__(self, minimo_amostras=MINIMO_AMOSTRAS):
+        self.minimo_amostras = minimo_amostras
+        self._lock = threading.Lock()
+        # grupo (nível, processo, ...) -> segundos por peça em ordem crescente
+        self._grupos = {}
+        # (numero_os, processo) -> (processo, linha, formato, valor), para substituir a amostra se o processo mudar
+        self._amostras = {}
+        # grupo -> estatísticas, descartadas quando o grupo recebe amostras
+        self._cache = {}
+
+    @classmethod
+    def ajustar(cls, amostras, minimo_amostras=MINIMO_AMOSTRAS):
+        """Estimador com todas as amostras do histórico (ordenação em bloco, por nível)"""
+        estimador = cls(minimo_amostras)
+        amostras = amostras.drop_duplicates(subset=['numero_os', 'processo'], keep='last')
+        for nivel, atributos in enumerate(NIVEIS):
+            for chave, serie in amostras.groupby(list(atributos))['segundos_por_peca']:
+                estimador._grupos[(nivel,) + chave] = np.sort(serie.to_numpy()).tolist()
+        colunas = [amostras[c].tolist() for c in ('numero_os', 'processo', 'linha', 'formato', 'segundos_por_peca')]
+        estimador._amostras = dict(zip(zip(*colunas[:2]), zip(*colunas[1:])))
+        return estimador
+
+    def atualizar(self, amostras):
+        """Acrescenta (ou substitui) as amostras de OS recém-finalizadas"""
+        with self._lock:
+            for numero_os, processo, linha, formato, valor in amostras.itertuples(index=False, name=None):
+                anterior = self._amostras.get((numero_os, processo))
+                if anterior is not None:
+                    for grupo in _grupos_da_amostra(*anterior[:3]):
+                        lista = self._grupos[grupo]
+                        del lista[bisect.bisect_left(lista, anterior[3])]
+                        self._cache.pop(grupo, None)
+                for grupo in _grupos_da_amostra(processo, linha, formato):
+                    bisect.insort(self._grupos.setdefault(grupo, []), valor)
+                    self._cache.pop(grupo, None)
+                self._amostras[(numero_os, processo)] = (processo, linha, formato, valor)
+
+    def _estatisticas(self, grupo):
+        if grupo not in self._cache:
+            valores = self._grupos.get(grupo)
+            self._cache[grupo] = estatisticas(valores) if valores else None
+        return self._cache[grupo]
+
+    def tempo_padrao(self, processo, linha=None, formato=None):
+        """(estatísticas, nível) do grupo mais específico com amostras suficientes; (None, None) sem histórico"""
+        with self._lock:
+            reserva = (None, None)
+            for grupo in _grupos_da_amostra(processo, linha, formato):
+                resultado = self._estatisticas(grupo)
+                if resultado is None:
+                    continue
+                if resultado['amostras'] >= self.minimo_amostras:
+                    return resultado, grupo[0]
+                if reserva[0] is None or resultado['amostras'] > reserva[0]['amostras']:
+                    reserva = (resultado, grupo[0])
+            return reserva
+
+    def prever(self, produto, quantidade, processos):
+        """Tempo previsto de cada processo para uma OS: mediana, faixa P25–P90 e a base usada"""
+        atributos = interpretar_produtos([produto]).iloc[0]
+        linhas = []
+        for processo in processos:
+            resultado, nivel = self.tempo_padrao(processo, atributos['linha'], atributos['formato'])
+            resultado = resultado or {}
+            linhas.append({
+                'processo': processo,
+                'base': DESCRICAO_NIVEIS[nivel] if nivel is not None else None,
+                'amostras': resultado.get('amostras', 0),
+                'segundos_por_peca': resultado.get('p50', np.nan),
+                'previsto_segundos': resultado.get('p50', np.nan) * quantidade,
+                'minimo_segundos': resultado.get('p25', np.nan) * quantidade,
+                'maximo_segundos': resultado.get('p90', np.nan) * quantidade,
+            })
+        return pd.DataFrame(linhas, columns=['processo', 'base', 'amostras', 'segundos_por_peca',
+                                             'previsto_segundos', 'minimo_segundos', 'maximo_segundos'])
+
+    def tabela(self, nivel=0):
+        """Estatísticas de todos os grupos de um nível (para cotação e conferência)"""
+        with self._lock:
+            grupos = sorted((g for g in self._grupos if g[0] == nivel and self._grupos[g]), key=str)
+            linhas = [dict(zip(NIVEIS[nivel], grupo[1:]), **self._estatisticas(grupo)) for grupo in grupos]
+        return pd.DataFrame(linhas, columns=list(NIVEIS[nivel]) + ['amostras', 'descartadas', 'p25', 'p50', 'p75',
+                                                                   'p90', 'media'])
@@ -0,0 +1,416 @@
+"""Teste de carga: simula N tablets usando o app ao mesmo tempo (sem navegador)
+
+Cada sessão simulada (Streamlit AppTest) seleciona uma OS, inicia e pausa
+processos e fica parada com o auto-refresh de 1 segundo. No modo padrão
+(threads) as N sessões são threads de um único processo, como num servidor
+Streamlit: caches (st.cache_data/st.cache_resource) e GIL são compartilhados.
+No modo processos cada sessão roda em um processo próprio (sem cache nem GIL
+em comum), e a CPU de cada processo é mostrada em separado. O backend é o
+arquivo local ou um GitHub simulado em memória, servido às sessões por um
+processo gerenciador (multiprocessing).
+
+Uso:
+    python teste_carga.py --app app_github.py --backend github --sessoes 1 5 10 --duracao 30
+    python teste_carga.py --modo processos --sessoes 5
+"""
+import argparse
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from multiprocessing.managers import BaseManager
+
+import requests
+import streamlit as st
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+from metricas import percentil
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVOS_DADOS = ["ordens_servico.csv", "tempos_processos.csv"]
+THREAD_SCRIPT = "ScriptRunner.scriptThread"
+
+ROTULOS_SELECAO_OS = ("Selecione a OS:", "🎯 Selecione a OS:")
+ROTULOS_INICIAR = ("Iniciar", "▶️ Play")
+ROTULOS_PAUSAR = ("Pausar", "⏸️ Pause")
+
+
+def _sha_blob(dados):
+    return hashlib.sha1(b"blob %d\0" % len(dados) + dados).hexdigest()
+
+
+class _Resposta:
+    """Resposta mínima compatível com o uso de requests pelos apps"""
+
+    def __init__(self, status_code, corpo):
+        self.status_code = status_code
+        self._corpo = corpo
+        self.text = json.dumps(corpo)
+        self.content = self.text.encode("utf-8")
+
+    def json(self):
+        return self._corpo
+
+
+class GitHubSimulado:
+    """GitHub em memória: contents (GET/PUT com conflito de SHA), refs, trees, commits e blobs"""
+
+    def __init__(self):
+        self.arquivos = {}
+        self.commits = 0
+        self.chamadas = Counter()
+        self._lock = threading.Lock()
+        # Árvores e commits criados pela API do git, aplicados quando a referência do branch anda
+        self._arvores = {}
+        self._novos_commits = {}
+
+    def carregar(self, caminho, dados):
+        """Arquivo inicial do repositório simulado"""
+        with self._lock:
+            self.arquivos[caminho] = dados
+
+    def totais(self):
+        """(chamadas à API, commits) até agora"""
+        with self._lock:
+            return sum(self.chamadas.values()), self.commits
+
+    def responder(self, metodo, url, corpo=None):
+        """(status, corpo JSON) de uma requisição; usado pelas sessões em outros processos"""
+        resposta = self._responder(metodo, url, corpo)
+        return resposta.status_code, resposta.json()
+
+    def _head(self):
+        return hashlib.sha1(f"commit {self.commits}".encode()).hexdigest()
+
+    def _responder(self, metodo, url, corpo=None):
+        endpoint = url.split("/repos/", 1)[1].split("/", 2)[2] if url.count("/") > 5 else ""
+        endpoint = endpoint.split("?")[0]
+        with self._lock:
+            self.chamadas[metodo] += 1
+            if endpoint.startswith("contents/"):
+                return self._contents(metodo, endpoint[len("contents/"):], corpo)
+            if endpoint.startswith("git/ref/heads/"):
+                return _Resposta(200, {"object": {"sha": self._head()}})
+            if endpoint == "git/trees" and metodo == "POST":
+                sha = hashlib.sha1(json.dumps(corpo, sort_keys=True).encode()).hexdigest()
+                self._arvores[sha] = {item["path"]: item["content"].encode() for item in corpo["tree"]}
+                return _Resposta(201, {"sha": sha})
+            if endpoint == "git/commits" and metodo == "POST":
+                sha = hashlib.sha1(json.dumps(corpo, sort_keys=True).encode()).hexdigest()
+                self._novos_commits[sha] = (corpo["tree"], corpo["parents"][0])
+                return _Resposta(201, {"sha": sha})
+            if endpoint.startswith("git/commits/"):
+                # Árvore raiz identificada pelo próprio commit (só serve de base_tree)
+                return _Resposta(200, {"tree": {"sha": endpoint.rsplit("/", 1)[1]}})
+            if endpoint.startswith("git/refs/heads/") and metodo == "PATCH":
+                arvore, pai = self._novos_commits[corpo["sha"]]
+                if pai != self._head():
+                    return _Resposta(422, {"message": "Update is not a fast forward"})
+                self.arquivos.update(self._arvores[arvore])
+                self.commits += 1
+                return _Resposta(200, {"object": {"sha": self._head()}})
+            if endpoint.startswith("git/trees/"):
+                return _Resposta(200, {"tree": self._arvore(endpoint.rsplit("/", 1)[1])})
+            if endpoint.startswith("git/blobs/"):
+                sha = endpoint.rsplit("/", 1)[1]
+                for dados in self.arquivos.values():
+                    if _sha_blob(dados) == sha:
+                        return _Resposta(200, {"sha": sha, "content": base64.b64encode(dados).decode()})
+                return _Resposta(404, {"message": "Not Found"})
+            if endpoint == "":
+                return _Resposta(200, {"full_name": "simulado/simulado"})
+            return _Resposta(404, {"message": "Not Found"})
+
+    def _contents(self, metodo, caminho, corpo):
+        caminho = caminho.rstrip("/")
+        atual = self.arquivos.get(caminho)
+        if metodo == "PUT":
+            if atual is not None and corpo.get("sha") != _sha_blob(atual):
+                return _Resposta(409, {"message": "sha mismatch"})
+            dados = base64.b64decode(corpo["content"])
+            self.arquivos[caminho] = dados
+            self.commits += 1
+            return _Resposta(201, {"content": {"sha": _sha_blob(dados)}, "commit": {"sha": self._head()}})
+        if atual is not None:
+            return _Resposta(200, {"sha": _sha_blob(atual), "size": len(atual),
+                                   "content": base64.b64encode(atual).decode()})
+        # Listagem de pasta
+        itens = [{"name": p.rsplit("/", 1)[-1], "path": p, "sha": _sha_blob(d), "size": len(d), "type": "file"}
+                 for p, d in self.arquivos.items() if p.startswith(caminho + "/") or caminho == ""]
+        return _Resposta(200, itens) if itens else _Resposta(404, {"message": "Not Found"})
+
+    def _arvore(self, sha):
+        """Raiz do repositório ou, se o SHA for o de uma pasta, os arquivos dela"""
+        pastas = {}
+        for caminho, dados in self.arquivos.items():
+            if "/" in caminho:
+                pastas.setdefault(caminho.split("/", 1)[0], []).append(_sha_blob(dados))
+        shas_pastas = {p: _sha_blob("".join(sorted(s)).encode()) for p, s in pastas.items()}
+        for pasta, sha_pasta in shas_pastas.items():
+            if sha_pasta == sha:
+                return [{"path": p[len(pasta) + 1:], "sha": _sha_blob(d), "type": "blob"}
+                        for p, d in self.arquivos.items() if p.startswith(pasta + "/")]
+        arvore = [{"path": p, "sha": _sha_blob(d), "type": "blob"} for p, d in self.arquivos.items() if "/" not in p]
+        return arvore + [{"path": p, "sha": sha_pasta, "type": "tree"} for p, sha_pasta in shas_pastas.items()]
+
+
+
+class _GerenciadorGitHub(BaseManager):
+    """Processo que mantém o GitHubSimulado compartilhado pelas sessões"""
+
+
+_GerenciadorGitHub.register("GitHubSimulado", GitHubSimulado)
+
+
+def _instalar_github(simulador):
+    """Substitui requests.get/put/post/patch pelo simulador (objeto local ou proxy do gerenciador)"""
+    requests.get = lambda url, headers=None, **kwargs: _Resposta(*simulador.responder("GET", url))
+    requests.put = lambda url, headers=None, json=None, **kwargs: _Resposta(*simulador.responder("PUT", url, json))
+    requests.post = lambda url, headers=None, json=None, **kwargs: _Resposta(*simulador.responder("POST", url, json))
+    requests.patch = lambda url, headers=None, json=None, **kwargs: _Resposta(*simulador.responder("PATCH", url, json))
+
+
+def _instalar_sem_auto_refresh():
+    """Nas threads de script, time.sleep vira no-op e st.rerun encerra a execução
+
+    O auto-refresh (sleep 1 s + st.rerun) é emulado pelo intervalo entre as
+    execuções de cada sessão simulada. Vale para o processo inteiro e todas as
+    sessões dele.
+    """
+    sleep_original = time.sleep
+
+    def sleep(segundos):
+        if threading.current_thread().name != THREAD_SCRIPT:
+            sleep_original(segundos)
+
+    time.sleep = sleep
+    st.rerun = lambda *args, **kwargs: st.stop()
+
+
+def _compartilhar_bytecode():
+    """Um cache de bytecode do script para todas as sessões do processo, como no servidor
+
+    O AppTest cria um ScriptCache (e recompila o app) a cada execução; compilar em
+    várias threads ao mesmo tempo ainda esbarra num erro do ast no Python 3.11.
+    """
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+
+def _preparar_dados(pasta, qtd_os, backend):
+    """Copia os CSVs do projeto, acrescenta OS ativas sintéticas e grava os secrets"""
+    os.makedirs(os.path.join(pasta, ".streamlit"), exist_ok=True)
+    with open(os.path.join(pasta, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        f.write(f'GITHUB_TOKEN = "{"simulado" if backend == "github" else ""}"\n')
+
+    for nome in ARQUIVOS_DADOS:
+        origem = os.path.join(PASTA_PROJETO, nome)
+        if os.path.exists(origem):
+            shutil.copy(origem, pasta)
+    caminho_os = os.path.join(pasta, "ordens_servico.csv")
+    agora = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(caminho_os, "a", encoding="utf-8") as f:
+        for i in range(qtd_os):
+            f.write(f"{90000 + i},CARGA {i:03d} - PRODUTO SIMULADO 14X21,{random.randint(50, 500)},{agora},ativa\n")
+
+
+def _botoes(at, rotulos, habilitados=True):
+    return [b for b in at.button if b.label in rotulos and (not habilitados or not b.disabled)]
+
+
+def _simular_sessao(at, intervalo, fim, latencias, erros):
+    """Uma sessão: seleciona OS, inicia/pausa processos e fica parada no auto-refresh"""
+
+    def executar(acao):
+        inicio = time.perf_counter()
+        try:
+            acao()
+        except Exception as e:
+            erros.append(repr(e))
+            return
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if at.exception:
+            erros.append(at.exception[0].value)
+
+    executar(at.run)
+    while time.time() < fim:
+        selecao = [s for s in at.selectbox if s.label in ROTULOS_SELECAO_OS]
+        if selecao and selecao[0].options:
+            executar(selecao[0].select(random.choice(selecao[0].options)).run)
+
+        iniciar = _botoes(at, ROTULOS_INICIAR)
+        if iniciar:
+            executar(random.choice(iniciar).click().run)
+
+        # Parada: uma execução por intervalo, como o auto-refresh
+        for _ in range(random.randint(3, 8)):
+            if time.time() >= fim:
+                break
+            time.sleep(intervalo)
+            executar(at.run)
+
+        pausar = _botoes(at, ROTULOS_PAUSAR)
+        if pausar:
+            executar(random.choice(pausar).click().run)
+
+
+def _memoria_rss_mb():
+    """RSS atual do processo em MB (Linux), ou pico via resource"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _processo_sessoes(caminho_app, pasta, simulador, sessoes, intervalo, duracao, largada, resultados):
+    """Processo com uma ou mais sessões (threads): aquece o app, espera os demais e mede só a execução"""
+    sys.path.insert(0, PASTA_PROJETO)
+    os.chdir(pasta)
+    _instalar_sem_auto_refresh()
+    _compartilhar_bytecode()
+    if simulador is not None:
+        _instalar_github(simulador)
+
+    # Aquecimento: importa o app e dependências fora da medição
+    AppTest.from_file(caminho_app, default_timeout=60).run()
+    st.cache_data.clear()
+    apps = [AppTest.from_file(caminho_app, default_timeout=60) for _ in range(sessoes)]
+    largada.wait()
+
+    latencias = []
+    erros = []
+    memoria_inicial = _memoria_rss_mb()
+    cpu_inicial = time.process_time()
+    fim = time.time() + duracao
+    threads = [threading.Thread(target=_simular_sessao, args=(at, intervalo, fim, latencias, erros)) for at in apps]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    resultados.put({
+        "latencias": latencias,
+        "erros": erros,
+        "cpu_s": time.process_time() - cpu_inicial,
+        "memoria_mb": _memoria_rss_mb() - memoria_inicial,
+    })
+
+
+def rodar_cenario(caminho_app, backend, sessoes, duracao, intervalo, qtd_os, modo="threads"):
+    """Executa um cenário com N sessões simultâneas e retorna as estatísticas
+
+    modo threads: um processo com N threads; modo processos: N processos com uma sessão cada.
+    """
+    pasta = tempfile.mkdtemp(prefix="carga_")
+    _preparar_dados(pasta, qtd_os, backend)
+
+    gerenciador = simulador = None
+    if backend == "github":
+        gerenciador = _GerenciadorGitHub()
+        gerenciador.start()
+        simulador = gerenciador.GitHubSimulado()
+        for nome in ARQUIVOS_DADOS:
+            with open(os.path.join(pasta, nome), "rb") as f:
+                simulador.carregar(nome, f.read())
+
+    por_processo = [sessoes] if modo == "threads" else [1] * sessoes
+    contexto = multiprocessing.get_context("spawn")
+    largada = contexto.Barrier(len(por_processo) + 1)
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=_processo_sessoes,
+                                  args=(caminho_app, pasta, simulador, n, intervalo, duracao, largada, fila))
+                 for n in por_processo]
+    for p in processos:
+        p.start()
+
+    # Todas as sessões aquecidas: a medição começa junto para todas
+    largada.wait()
+    inicio = time.time()
+    chamadas_iniciais, commits_iniciais = simulador.totais() if simulador else (0, 0)
+    medidas = [fila.get() for _ in processos]
+    decorrido = time.time() - inicio
+    for p in processos:
+        p.join()
+
+    chamadas, commits = simulador.totais() if simulador else (0, 0)
+    chamadas, commits = chamadas - chamadas_iniciais, commits - commits_iniciais
+    if gerenciador is not None:
+        gerenciador.shutdown()
+    shutil.rmtree(pasta, ignore_errors=True)
+
+    ordenadas = sorted(latencia for medida in medidas for latencia in medida["latencias"])
+    erros = [erro for medida in medidas for erro in medida["erros"]]
+    cpu = sum(medida["cpu_s"] for medida in medidas)
+    return {
+        "modo": modo,
+        "sessoes": sessoes,
+        "execucoes": len(ordenadas),
+        "p50_ms": round(percentil(ordenadas, 50), 1),
+        "p90_ms": round(percentil(ordenadas, 90), 1),
+        "p99_ms": round(percentil(ordenadas, 99), 1),
+        "cpu_pct": round(100 * cpu / decorrido, 1),
+        "cpu_ms_por_sessao_s": round(1000 * cpu / decorrido / sessoes, 1),
+        # Cada processo em separado: no modo processos, a soma não é a CPU de um servidor
+        "cpu_pct_por_processo": "/".join(f"{100 * medida['cpu_s'] / decorrido:.1f}" for medida in medidas),
+        "memoria_mb_por_sessao": round(sum(medida["memoria_mb"] for medida in medidas) / sessoes, 2),
+        "chamadas_api": chamadas,
+        "chamadas_api_por_sessao_min": round(chamadas / sessoes / (decorrido / 60), 1),
+        "commits": commits,
+        "erros": len(erros),
+        "exemplo_erro": erros[0] if erros else "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga multi-sessão dos apps Streamlit")
+    parser.add_argument("--app", default="app_github.py", help="app_github.py ou app_cloud.py")
+    parser.add_argument("--backend", choices=["local", "github"], default="github",
+                        help="arquivo local ou GitHub simulado em memória")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 5, 10], help="quantidades de sessões (N)")
+    parser.add_argument("--modo", choices=["threads", "processos"], default="threads",
+                        help="sessões como threads de um processo (caches e GIL compartilhados) ou um processo cada")
+    parser.add_argument("--duracao", type=float, default=30, help="segundos por cenário")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="segundos entre execuções (auto-refresh)")
+    parser.add_argument("--os", type=int, default=20, dest="qtd_os", help="OS ativas sintéticas")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    caminho_app = os.path.join(PASTA_PROJETO, args.app)
+
+    resultados = []
+    for n in args.sessoes:
+        print(f"Cenário: {n} sessão(ões), {args.duracao:.0f}s, backend {args.backend}, modo {args.modo}...", flush=True)
+        resultados.append(rodar_cenario(caminho_app, args.backend, n, args.duracao, args.intervalo, args.qtd_os,
+                                        args.modo))
+
+    colunas = ["sessoes", "execucoes", "p50_ms", "p90_ms", "p99_ms", "cpu_pct", "cpu_ms_por_sessao_s",
+               "memoria_mb_por_sessao", "chamadas_api", "chamadas_api_por_sessao_min", "commits", "erros"]
+    print()
+    print(" | ".join(colunas))
+    for r in resultados:
+        print(" | ".join(str(r[c]) for c in colunas))
+    print()
+    print("CPU por processo (%):")
+    for r in resultados:
+        print(f"  {r['sessoes']} sessão(ões), modo {r['modo']}: {r['cpu_pct_por_processo']}")
+    for r in resultados:
+        if r["exemplo_erro"]:
+            print(f"Erro ({r['sessoes']} sessões): {r['exemplo_erro']}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()